@@ -0,0 +1,165 @@
+import logging
+import math
+import os
+import pickle
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# "subclass 417", "DS-160", "I-94" 같은 번호/양식명을 하나의 토큰으로 유지
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-/.][a-z0-9]+)*|[가-힣]+")
+
+STOPWORDS = {
+    "a", "an", "the", "and", "or", "of", "to", "in", "on", "for", "is", "are", "be",
+    "with", "by", "as", "at", "it", "this", "that", "from", "can", "do", "i", "you", "how", "what"
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """BM25용 토큰화 (소문자, 불용어 제거)"""
+    return [token for token in TOKEN_PATTERN.findall((text or "").lower()) if token not in STOPWORDS]
+
+
+class BM25Index:
+    """인메모리 BM25 역색인 (디스크에 pickle로 저장)
+
+    청크 ID 단위로 추가/삭제할 수 있어서 벡터 인덱스와 같이 증분 갱신됩니다.
+    """
+
+    def __init__(self, path: Optional[str] = None, k1: float = 1.5, b: float = 0.75):
+        self.path = os.path.abspath(path) if path else None
+        self.k1 = k1
+        self.b = b
+
+        self._lock = threading.RLock()
+        self._loaded_mtime = None
+        self._reset_state()
+        self.load()
+
+    def _reset_state(self):
+        self.docs: Dict[str, Dict[str, Any]] = {}  # chunk_id -> {"text", "metadata", "length"}
+        self.postings: Dict[str, Dict[str, int]] = defaultdict(dict)  # term -> {chunk_id: tf}
+        self.total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def load(self):
+        """디스크에서 색인 로드"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        with self._lock:
+            try:
+                mtime = os.stat(self.path).st_mtime
+                with open(self.path, "rb") as f:
+                    state = pickle.load(f)
+                self.docs = state["docs"]
+                self.postings = defaultdict(dict, state["postings"])
+                self.total_length = state["total_length"]
+                self._loaded_mtime = mtime
+                logger.info(f"BM25 index loaded: {len(self.docs)} chunks")
+            except Exception as e:
+                logger.warning(f"Failed to load BM25 index, starting empty: {e}")
+                self._reset_state()
+
+    def reload_if_changed(self):
+        """다른 프로세스(index_pdfs)가 색인을 갱신했으면 다시 로드"""
+        if not self.path:
+            return
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            return
+        if mtime != self._loaded_mtime:
+            self.load()
+
+    def save(self):
+        """디스크에 색인 저장 (임시 파일에 쓰고 교체)"""
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._lock:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump(
+                    {"docs": self.docs, "postings": dict(self.postings), "total_length": self.total_length},
+                    f,
+                    protocol=pickle.HIGHEST_PROTOCOL
+                )
+            os.replace(tmp_path, self.path)
+            self._loaded_mtime = os.stat(self.path).st_mtime
+
+    def add(self, chunk_ids: List[str], texts: List[str], metadatas: List[Dict[str, Any]]):
+        """청크 추가 (같은 ID가 있으면 교체)"""
+        with self._lock:
+            for chunk_id, text, metadata in zip(chunk_ids, texts, metadatas):
+                if chunk_id in self.docs:
+                    self._remove_one(chunk_id)
+                counts = Counter(tokenize(text))
+                length = sum(counts.values())
+                self.docs[chunk_id] = {"text": text, "metadata": metadata, "length": length}
+                self.total_length += length
+                for term, tf in counts.items():
+                    self.postings[term][chunk_id] = tf
+
+    def _remove_one(self, chunk_id: str):
+        doc = self.docs.pop(chunk_id)
+        self.total_length -= doc["length"]
+        for term in set(tokenize(doc["text"])):
+            posting = self.postings.get(term)
+            if posting is not None:
+                posting.pop(chunk_id, None)
+                if not posting:
+                    del self.postings[term]
+
+    def remove_where(self, predicate: Callable[[Dict[str, Any]], bool]) -> int:
+        """메타데이터 조건에 맞는 청크 삭제"""
+        with self._lock:
+            targets = [chunk_id for chunk_id, doc in self.docs.items() if predicate(doc["metadata"])]
+            for chunk_id in targets:
+                self._remove_one(chunk_id)
+        return len(targets)
+
+    def clear(self):
+        """색인 전체 삭제"""
+        with self._lock:
+            self._reset_state()
+
+    def search(
+        self,
+        query: str,
+        k: int = 10,
+        metadata_filter: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[str, float, Dict[str, Any]]]:
+        """BM25 검색
+
+        Returns:
+            [(chunk_id, 점수, {"text", "metadata"}), ...]
+        """
+        terms = set(tokenize(query))
+        with self._lock:
+            n_docs = len(self.docs)
+            if not terms or not n_docs:
+                return []
+            avg_length = self.total_length / n_docs
+
+            scores: Dict[str, float] = defaultdict(float)
+            for term in terms:
+                posting = self.postings.get(term)
+                if not posting:
+                    continue
+                idf = math.log(1 + (n_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+                for chunk_id, tf in posting.items():
+                    if metadata_filter:
+                        metadata = self.docs[chunk_id]["metadata"]
+                        if any(metadata.get(key) != value for key, value in metadata_filter.items()):
+                            continue
+                    length = self.docs[chunk_id]["length"]
+                    denom = tf + self.k1 * (1 - self.b + self.b * length / avg_length)
+                    scores[chunk_id] += idf * tf * (self.k1 + 1) / denom
+
+            top = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+            return [(chunk_id, score, self.docs[chunk_id]) for chunk_id, score in top]
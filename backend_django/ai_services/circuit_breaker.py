@@ -0,0 +1,168 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """서킷이 열려 있어서 요청을 보내지 않음"""
+
+
+class CircuitBreaker:
+    """공급자 장애 시 요청을 바로 차단하는 서킷 브레이커
+
+    - closed: 정상. 연속 실패가 failure_threshold에 도달하면 open
+    - open: reset_timeout 동안 모든 요청을 즉시 거부 (폴백 공급자로 바로 이동)
+    - half_open: 시험 요청 하나만 통과시켜서 성공하면 closed, 실패하면 다시 open
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 3,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._half_open_in_flight = False
+        self.consecutive_failures = 0
+
+        # 통계
+        self.total_successes = 0
+        self.total_failures = 0
+        self.rejected = 0
+        self.times_opened = 0
+        self.last_error: Optional[str] = None
+        self.last_failure_at: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._half_open_in_flight = False
+            logger.info(f"Circuit {self.name} half-open, allowing a trial request")
+        return self._state
+
+    def allow_request(self) -> bool:
+        """요청을 보내도 되는지 확인 (half-open이면 시험 요청 하나만 허용)"""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._half_open_in_flight:
+                self._half_open_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.total_successes += 1
+            self.consecutive_failures = 0
+            if self._state != CLOSED:
+                logger.info(f"Circuit {self.name} closed")
+            self._state = CLOSED
+            self._half_open_in_flight = False
+
+    def record_failure(self, error: Any = None):
+        with self._lock:
+            self.total_failures += 1
+            self.consecutive_failures += 1
+            self.last_error = str(error) if error is not None else None
+            self.last_failure_at = time.time()
+
+            state = self._current_state()
+            if state == HALF_OPEN or (state == CLOSED and self.consecutive_failures >= self.failure_threshold):
+                self._state = OPEN
+                self._opened_at = self._clock()
+                self._half_open_in_flight = False
+                self.times_opened += 1
+                logger.warning(f"Circuit {self.name} opened after {self.consecutive_failures} failures: {error}")
+
+    def release(self):
+        """결과 없이 끝난 요청(취소 등) - half-open 시험 요청 슬롯만 반환"""
+        with self._lock:
+            self._half_open_in_flight = False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            state = self._current_state()
+            return {
+                "state": state,
+                "consecutive_failures": self.consecutive_failures,
+                "total_successes": self.total_successes,
+                "total_failures": self.total_failures,
+                "rejected": self.rejected,
+                "times_opened": self.times_opened,
+                "last_error": self.last_error,
+                "last_failure_at": self.last_failure_at,
+                "retry_in_seconds": max(0.0, self.reset_timeout - (self._clock() - self._opened_at)) if state == OPEN else 0.0
+            }
+
+
+class HealthMonitor:
+    """헬스 체크 결과 캐시 (만료되면 응답을 기다리지 않고 백그라운드에서 갱신)
+
+    결과가 아직 없을 때만 헬스 체크를 직접 기다립니다.
+    """
+
+    def __init__(self, name: str, ttl_seconds: float = 15.0, clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self.healthy: Optional[bool] = None
+        self.checked_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.checks = 0
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    def _is_stale(self) -> bool:
+        return self.checked_at is None or self._clock() - self.checked_at >= self.ttl_seconds
+
+    async def _refresh(self, check: Callable[[], Awaitable[bool]]) -> bool:
+        self.checks += 1
+        try:
+            healthy = bool(await check())
+            self.last_error = None if healthy else "unhealthy status"
+        except Exception as e:
+            healthy = False
+            self.last_error = str(e)
+        self.healthy = healthy
+        self.checked_at = self._clock()
+        if not healthy:
+            logger.warning(f"{self.name} health check failed: {self.last_error}")
+        return healthy
+
+    async def is_healthy(self, check: Callable[[], Awaitable[bool]]) -> bool:
+        """캐시된 헬스 상태 (만료되었으면 백그라운드 갱신 예약)"""
+        if self.healthy is None:
+            return await self._refresh(check)
+        if self._is_stale() and (self._refresh_task is None or self._refresh_task.done()):
+            self._refresh_task = asyncio.create_task(self._refresh(check))
+        return self.healthy
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "healthy": self.healthy,
+            "age_seconds": None if self.checked_at is None else round(self._clock() - self.checked_at, 1),
+            "checks": self.checks,
+            "last_error": self.last_error
+        }
@@ -0,0 +1,125 @@
+import re
+import threading
+from typing import Any, Dict
+
+# OpenAI 이어쓰기 요청 (잘린 답변을 assistant 메시지로 넣은 뒤 전달)
+CONTINUE_PROMPT = (
+    "Your previous answer was cut off. Continue exactly where it stopped, "
+    "without repeating anything already written."
+)
+
+SENTENCE_END = re.compile(r"[.!?…][\"'”’)\]]*$")
+INCOMPLETE_TAIL = re.compile(r"\b(and|but|because|so|if|or|although|maybe|I think|such as)$", re.IGNORECASE)
+LAST_SENTENCE_END = re.compile(r"[.!?…][\"'”’)\]]*(?=\s|$)")
+
+# 이어쓴 부분이 앞부분을 반복했는지 확인할 길이 범위 (문자)
+# 스트리밍에서는 이어쓴 부분을 MAX_OVERLAP_CHARS까지 모은 뒤 연결합니다
+MAX_OVERLAP_CHARS = 200
+MIN_OVERLAP_CHARS = 10
+
+CLOSING_PUNCTUATION = ".,;:!?)…'’”"
+
+
+def is_complete(text: str) -> bool:
+    """답변이 문장 중간에서 끊기지 않았는지 판단"""
+    text = text.strip()
+
+    if text.endswith(","):
+        return False
+    # 문장부호로 정상 종료했는지 확인
+    if SENTENCE_END.search(text):
+        return True
+    # 의미적으로 미완성처럼 보이는 경우 (조심스럽게 판단)
+    if INCOMPLETE_TAIL.search(text):
+        return False
+    # 길이가 너무 짧은 경우도 미완성 가능성 있음
+    if len(text.split()) < 4:
+        return False
+    return True
+
+
+def _overlap(previous: str, continuation: str) -> int:
+    """이어쓴 부분의 앞쪽이 앞부분의 끝과 겹치는 길이 (단어 경계 기준, 짧은 우연한 일치는 무시)"""
+    tail = previous[-MAX_OVERLAP_CHARS:]
+    for size in range(min(len(tail), len(continuation)), MIN_OVERLAP_CHARS - 1, -1):
+        if not tail.endswith(continuation[:size]):
+            continue
+        starts_at_word = size == len(tail) or not tail[-size - 1].isalnum()
+        ends_at_word = size == len(continuation) or not continuation[size].isalnum()
+        if starts_at_word and ends_at_word:
+            return size
+    return 0
+
+
+def _join(previous: str, body: str) -> str:
+    separator = "" if previous[-1].isspace() or body[0] in CLOSING_PUNCTUATION else " "
+    return previous + separator + body
+
+
+def stitch(previous: str, continuation: str, new_message: bool = False) -> str:
+    """잘린 답변과 이어쓴 부분 연결
+
+    앞부분의 끝을 반복했으면 반복된 부분을 제거합니다.
+    Phi 서버는 새 토큰을 그대로 디코딩하므로 이어쓴 부분이 공백 없이 시작하면 단어 중간에서 잘린 것으로 보고 그대로 붙입니다.
+    new_message이면(OpenAI처럼 이어쓴 부분이 새 assistant 메시지로 오는 경우) 앞의 공백이 없어도 단어 사이에 공백을 넣습니다.
+    """
+    if not previous:
+        return continuation
+    if not continuation.strip():
+        return previous
+
+    body = continuation.lstrip()
+    overlap = _overlap(previous, body)
+    if overlap:
+        body = body[overlap:].lstrip()
+        if not body:
+            return previous
+        return _join(previous, body)
+    if new_message:
+        return _join(previous, body)
+    return previous + continuation
+
+
+def trim_to_last_sentence(text: str) -> str:
+    """마지막 완성된 문장까지만 남김 (완성된 문장이 없으면 원문)"""
+    matches = list(LAST_SENTENCE_END.finditer(text))
+    if not matches:
+        return text
+    return text[:matches[-1].end()]
+
+
+class TruncationStats:
+    """공급자별 답변 잘림/이어쓰기 통계"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def record(self, provider: str, continuations: int, complete: bool):
+        """답변 하나에 대한 결과 기록
+
+        Args:
+            continuations: 이어쓰기 요청 횟수 (0이면 처음부터 완성된 답변)
+            complete: 이어쓰기 후 최종적으로 완성되었는지
+        """
+        with self._lock:
+            stats = self._stats.setdefault(
+                provider,
+                {"responses": 0, "truncated": 0, "continuation_calls": 0, "unresolved": 0}
+            )
+            stats["responses"] += 1
+            if continuations or not complete:
+                stats["truncated"] += 1
+            stats["continuation_calls"] += continuations
+            if not complete:
+                stats["unresolved"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                provider: {
+                    **stats,
+                    "truncation_rate": round(stats["truncated"] / stats["responses"], 4) if stats["responses"] else 0.0
+                }
+                for provider, stats in self._stats.items()
+            }
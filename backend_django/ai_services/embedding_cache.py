@@ -0,0 +1,142 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+from array import array
+from typing import List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+from ai_services.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+
+class CachedEmbeddings(Embeddings):
+    """청크 텍스트 해시 기반 임베딩 캐시 (SQLite 디스크 저장)
+
+    키는 (모델, 차원 수, 텍스트)의 SHA-256 해시이므로 모델이나 차원이 바뀌면
+    자연스럽게 캐시 미스가 발생합니다.
+    """
+
+    def __init__(
+        self,
+        underlying: Embeddings,
+        cache_path: str,
+        model_name: str,
+        dimensions: Optional[int] = None,
+        cache_queries: bool = False
+    ):
+        self.underlying = underlying
+        self.cache_path = os.path.abspath(cache_path)
+        self.model_name = model_name
+        self.dimensions = dimensions
+        self.cache_queries = cache_queries
+
+        # 통계
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+
+        # 인제스트 파이프라인에서 여러 스레드가 동시에 접근할 수 있음
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.cache_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+        )
+        self._conn.commit()
+        logger.info(f"Embedding cache path: {self.cache_path}")
+
+    def _key(self, text: str) -> str:
+        """캐시 키 생성"""
+        raw = f"{self.model_name}\x00{self.dimensions}\x00{text}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _encode(vector: List[float]) -> bytes:
+        return array("f", vector).tobytes()
+
+    @staticmethod
+    def _decode(blob: bytes) -> List[float]:
+        vector = array("f")
+        vector.frombytes(blob)
+        return vector.tolist()
+
+    def _get_many(self, keys: List[str]) -> dict:
+        """캐시에서 여러 키 조회"""
+        found = {}
+        # SQLite 변수 개수 제한을 피하기 위해 나눠서 조회
+        for i in range(0, len(keys), 500):
+            batch = keys[i:i + 500]
+            placeholders = ",".join("?" for _ in batch)
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    batch
+                ).fetchall()
+            for key, blob in rows:
+                found[key] = self._decode(blob)
+        return found
+
+    def _put_many(self, items: List[tuple]):
+        """캐시에 여러 벡터 저장"""
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(key, self._encode(vector)) for key, vector in items]
+            )
+            self._conn.commit()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """캐시에 없는 청크만 임베딩"""
+        keys = [self._key(text) for text in texts]
+        cached = self._get_many(list(set(keys)))
+
+        # 중복 텍스트는 한 번만 임베딩
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+
+        if missing:
+            missing_keys = list(missing.keys())
+            vectors = self.underlying.embed_documents([missing[k] for k in missing_keys])
+            new_items = list(zip(missing_keys, vectors))
+            self._put_many(new_items)
+            cached.update(new_items)
+
+        hits = len(texts) - len(missing)
+        self.hits += hits
+        self.misses += len(missing)
+        logger.info(f"Embedding cache: {hits} hits, {len(missing)} misses")
+
+        return [cached[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        """쿼리 임베딩 (cache_queries가 켜진 경우에만 캐시 사용)"""
+        with get_metrics().timer("embed_query"):
+            return self._embed_query(text)
+
+    def _embed_query(self, text: str) -> List[float]:
+        if not self.cache_queries:
+            return self.underlying.embed_query(text)
+
+        key = self._key(text)
+        cached = self._get_many([key])
+        if key in cached:
+            self.hits += 1
+            return cached[key]
+
+        self.misses += 1
+        vector = self.underlying.embed_query(text)
+        self._put_many([(key, vector)])
+        return vector
+
+    def stats(self) -> dict:
+        """캐시 통계"""
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "size": size}
@@ -0,0 +1,91 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+
+class LocalEmbeddings(Embeddings):
+    """CPU에서 실행하는 로컬 임베딩 모델 (sentence-transformers, ONNX 런타임 선택 가능)
+
+    배치 단위로 추론하고, 여러 배치는 스레드 풀에서 나눠 실행합니다.
+    (torch/onnxruntime은 추론 중 GIL을 놓기 때문에 스레드로도 병렬 처리됨)
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        runtime: str = "torch",
+        batch_size: int = 64,
+        max_workers: int = 2,
+        dimensions: Optional[int] = None
+    ):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise ImportError(
+                "로컬 임베딩을 사용하려면 sentence-transformers를 설치하세요: "
+                "pip install 'sentence-transformers[onnx]'"
+            ) from e
+
+        self.model_name = model_name
+        self.runtime = runtime
+        self.batch_size = batch_size
+        self.dimensions = dimensions
+
+        model_kwargs = {"device": "cpu"}
+        if runtime == "onnx":
+            model_kwargs["backend"] = "onnx"
+        self.model = SentenceTransformer(model_name, **model_kwargs)
+
+        native_dimensions = self.model.get_sentence_embedding_dimension()
+        if dimensions and dimensions > native_dimensions:
+            raise ValueError(
+                f"{model_name} produces {native_dimensions}-dim vectors, cannot serve {dimensions} dimensions"
+            )
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="local-embed")
+        logger.info(f"Local embedding model loaded: {model_name} ({runtime}, {native_dimensions} dims)")
+
+    def _encode(self, texts: List[str]) -> List[List[float]]:
+        vectors = self.model.encode(
+            texts,
+            batch_size=self.batch_size,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+            show_progress_bar=False
+        )
+        if self.dimensions:
+            # Matryoshka 방식 모델은 앞쪽 차원만 잘라서 사용 가능
+            vectors = vectors[:, :self.dimensions]
+        return vectors.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """문서 임베딩 (배치를 스레드 풀에서 병렬 실행)"""
+        if not texts:
+            return []
+        if len(texts) <= self.batch_size:
+            return self._encode(texts)
+
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        results = []
+        for vectors in self._executor.map(self._encode, batches):
+            results.extend(vectors)
+        return results
+
+    def embed_query(self, text: str) -> List[float]:
+        """쿼리 임베딩"""
+        return self._encode([text])[0]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        """이벤트 루프를 막지 않는 쿼리 임베딩"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.embed_query, text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        """이벤트 루프를 막지 않는 문서 임베딩"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.embed_documents, texts)
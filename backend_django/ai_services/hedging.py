@@ -0,0 +1,181 @@
+import asyncio
+import bisect
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 지연 시간 히스토그램 버킷 상한 (초)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 7.5, 10.0, 15.0, 20.0, 30.0, 45.0, 60.0, 120.0)
+
+
+class LatencyHistogram:
+    """고정 버킷 지연 시간 히스토그램 (Prometheus histogram과 같은 방식)
+
+    분위수는 버킷 안에서 선형 보간으로 추정합니다.
+    """
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # 마지막은 +Inf
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.sum += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """분위수 추정 (관측값이 없으면 None)"""
+        with self._lock:
+            if not self.count:
+                return None
+            rank = q * self.count
+            cumulative = 0
+            for i, bucket_count in enumerate(self.counts):
+                if cumulative + bucket_count >= rank and bucket_count:
+                    if i == len(self.buckets):
+                        return self.buckets[-1]
+                    lower = self.buckets[i - 1] if i else 0.0
+                    upper = self.buckets[i]
+                    return lower + (upper - lower) * (rank - cumulative) / bucket_count
+                cumulative += bucket_count
+            return self.buckets[-1]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """누적 버킷 카운트 (le → count)"""
+        with self._lock:
+            cumulative, buckets = 0, []
+            for upper, bucket_count in zip(self.buckets + (float("inf"),), self.counts):
+                cumulative += bucket_count
+                buckets.append((upper, cumulative))
+            return {"buckets": buckets, "count": self.count, "sum": self.sum}
+
+
+class LatencyTracker:
+    """공급자별 지연 시간 히스토그램과 헤징 기준 시간
+
+    관측값이 min_samples보다 적으면 default_delay를 사용합니다.
+    """
+
+    def __init__(
+        self,
+        quantile: float = 0.95,
+        default_delay: float = 8.0,
+        min_delay: float = 1.0,
+        max_delay: float = 30.0,
+        min_samples: int = 20
+    ):
+        self.quantile = quantile
+        self.default_delay = default_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.min_samples = min_samples
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+        # 헤징 통계
+        self.hedges_fired: Dict[str, int] = {}
+        self.hedge_wins: Dict[str, int] = {}
+
+    def histogram(self, provider: str) -> LatencyHistogram:
+        with self._lock:
+            if provider not in self._histograms:
+                self._histograms[provider] = LatencyHistogram()
+            return self._histograms[provider]
+
+    def observe(self, provider: str, seconds: float):
+        self.histogram(provider).observe(seconds)
+
+    def deadline(self, provider: str) -> float:
+        """백업 요청을 보내기 전까지 기다릴 시간 (관측된 p95 기준)"""
+        histogram = self.histogram(provider)
+        if histogram.count < self.min_samples:
+            return self.default_delay
+        value = histogram.quantile(self.quantile)
+        return min(self.max_delay, max(self.min_delay, value))
+
+    def record_hedge(self, provider: str):
+        """provider가 기준 시간을 넘겨서 백업 요청을 보냄"""
+        with self._lock:
+            self.hedges_fired[provider] = self.hedges_fired.get(provider, 0) + 1
+
+    def record_hedge_win(self, provider: str):
+        """provider 대신 백업 요청의 응답을 사용"""
+        with self._lock:
+            self.hedge_wins[provider] = self.hedge_wins.get(provider, 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            providers = list(self._histograms)
+        return {
+            provider: {
+                "count": self.histogram(provider).count,
+                "p50": self.histogram(provider).quantile(0.5),
+                "p95": self.histogram(provider).quantile(0.95),
+                "hedge_deadline": self.deadline(provider),
+                "hedges_fired": self.hedges_fired.get(provider, 0),
+                "hedge_wins": self.hedge_wins.get(provider, 0)
+            }
+            for provider in providers
+        }
+
+
+def _consume_result(task: asyncio.Task):
+    """취소된/실패한 작업의 예외가 'never retrieved' 경고로 남지 않도록 처리"""
+    if not task.cancelled():
+        task.exception()
+
+
+async def hedged_call(
+    primary: Callable[[], Awaitable[Any]],
+    backup: Callable[[], Awaitable[Any]],
+    delay: float,
+    is_good: Callable[[Any], bool] = bool,
+    on_hedge: Optional[Callable[[], None]] = None
+) -> Tuple[Any, str]:
+    """헤징 요청
+
+    primary가 delay 안에 끝나지 않으면 backup을 동시에 시작하고, 먼저 도착한 정상 결과를 사용합니다.
+    진 쪽은 취소합니다. primary가 delay 안에 실패하면 일반 폴백처럼 backup만 실행합니다.
+
+    Returns:
+        (결과, "primary" | "backup"(헤징 후 백업 응답) | "fallback"(primary 실패 후 백업))
+    """
+    primary_task = asyncio.ensure_future(primary())
+    primary_task.add_done_callback(_consume_result)
+    tasks = {primary_task: "primary"}
+
+    try:
+        done, _ = await asyncio.wait({primary_task}, timeout=delay)
+        if done:
+            if primary_task.exception() is None and is_good(primary_task.result()):
+                return primary_task.result(), "primary"
+            logger.warning(f"Primary failed before hedge deadline, falling back: {primary_task.exception()}")
+            return await backup(), "fallback"
+
+        if on_hedge:
+            on_hedge()
+        backup_task = asyncio.ensure_future(backup())
+        backup_task.add_done_callback(_consume_result)
+        tasks[backup_task] = "backup"
+        pending = set(tasks)
+        errors: List[BaseException] = []
+
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None and is_good(task.result()):
+                    return task.result(), tasks[task]
+                errors.append(task.exception() or ValueError("empty response"))
+
+        raise Exception(f"Both hedged requests failed: {errors}")
+    finally:
+        # 진 쪽(또는 호출자가 취소된 경우 모든 요청) 취소
+        for task in tasks:
+            if not task.done():
+                task.cancel()
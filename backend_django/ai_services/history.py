@@ -0,0 +1,60 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import tiktoken
+
+# 요약을 히스토리 맨 앞에 넣을 때 사용하는 머리말
+SUMMARY_PREFIX = "Summary of the earlier conversation:"
+
+
+class HistoryWindow:
+    """LLM에 보내는 대화 히스토리 창
+
+    최근 max_turns턴(질문+답변)은 원문 그대로, token_budget 안에서 최신 메시지부터 채웁니다.
+    창에서 밀려난 이전 메시지는 대화의 누적 요약에 합칩니다.
+    """
+
+    def __init__(
+        self,
+        max_turns: int = 6,
+        token_budget: int = 2000,
+        count_tokens: Optional[Callable[[str], int]] = None
+    ):
+        self.max_turns = max_turns
+        self.token_budget = token_budget
+        self._count_tokens = count_tokens
+        self._tokenizer = None
+
+    def count_tokens(self, text: str) -> int:
+        if self._count_tokens:
+            return self._count_tokens(text)
+        if self._tokenizer is None:
+            self._tokenizer = tiktoken.get_encoding("cl100k_base")
+        return len(self._tokenizer.encode(text))
+
+    def split(self, messages: List[Dict[str, Any]], summary: str = "") -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """(창에 남길 최근 메시지, 요약에 합칠 이전 메시지) - 둘 다 시간순
+
+        요약도 token_budget에 포함합니다. 창은 항상 사용자 메시지로 시작합니다.
+        """
+        used = self.count_tokens(summary) if summary else 0
+        start = len(messages)
+        for index in range(len(messages) - 1, -1, -1):
+            if len(messages) - index > self.max_turns * 2:
+                break
+            used += self.count_tokens(messages[index]["content"])
+            if used > self.token_budget:
+                break
+            start = index
+
+        # 답변만 남고 질문이 밀려난 경우 답변도 요약으로
+        while start < len(messages) and messages[start]["role"] != "user":
+            start += 1
+        return messages[start:], messages[:start]
+
+    @staticmethod
+    def build(summary: str, recent: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+        """LLM history 형식 (요약이 있으면 system 메시지로 맨 앞에)"""
+        history = [{"role": message["role"], "content": message["content"]} for message in recent]
+        if summary:
+            history.insert(0, {"role": "system", "content": f"{SUMMARY_PREFIX}\n{summary}"})
+        return history
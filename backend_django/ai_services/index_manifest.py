@@ -0,0 +1,114 @@
+import hashlib
+import json
+import logging
+import os
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def file_sha256(path: str) -> str:
+    """파일 내용 SHA-256 해시"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class IndexManifest:
+    """인덱싱된 PDF 파일 목록 (크기, 수정 시각, 해시)
+
+    manifest 파일 구조:
+        {
+            "version": "<인덱스가 바뀔 때마다 갱신되는 값>",
+            "updated_at": "...",
+            "files": {"france_visa_info.pdf": {"size": ..., "mtime": ..., "sha256": ..., "chunks": ...}}
+        }
+    """
+
+    def __init__(self, path: str):
+        self.path = os.path.abspath(path)
+        self.version = None
+        self.updated_at = None
+        self.files: Dict[str, Dict] = {}
+        self.load()
+
+    def load(self):
+        """디스크에서 manifest 로드"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.version = data.get("version")
+            self.updated_at = data.get("updated_at")
+            self.files = data.get("files", {})
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Failed to load index manifest, starting fresh: {e}")
+            self.files = {}
+
+    def save(self, bump_version: bool = True):
+        """manifest 저장 (임시 파일에 쓰고 교체)
+
+        bump_version이 True이면 인덱스 버전을 갱신합니다. 버전은 인덱스 내용이
+        바뀌었는지 판단하는 데 사용됩니다.
+        """
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        if bump_version or not self.version:
+            self.version = uuid.uuid4().hex
+        self.updated_at = datetime.now().isoformat()
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"version": self.version, "updated_at": self.updated_at, "files": self.files},
+                f,
+                ensure_ascii=False,
+                indent=2
+            )
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        """모든 파일 기록 삭제"""
+        self.files = {}
+
+    def diff(self, pdf_dir: str, filenames: List[str]) -> Tuple[List[str], List[str], List[str], Dict[str, Dict]]:
+        """디렉토리 상태와 manifest 비교
+
+        Returns:
+            (새 파일, 변경된 파일, 삭제된 파일, 파일별 현재 상태)
+        """
+        new_files, changed_files = [], []
+        current: Dict[str, Dict] = {}
+
+        for filename in filenames:
+            stat = os.stat(os.path.join(pdf_dir, filename))
+            entry = {"size": stat.st_size, "mtime": stat.st_mtime}
+            previous = self.files.get(filename)
+
+            # 크기와 수정 시각이 같으면 해시 계산 생략
+            if previous and previous.get("size") == entry["size"] and previous.get("mtime") == entry["mtime"]:
+                entry["sha256"] = previous.get("sha256")
+                current[filename] = entry
+                continue
+
+            entry["sha256"] = file_sha256(os.path.join(pdf_dir, filename))
+            current[filename] = entry
+
+            if previous is None:
+                new_files.append(filename)
+            elif previous.get("sha256") != entry["sha256"]:
+                changed_files.append(filename)
+
+        removed_files = [name for name in self.files if name not in current]
+        return new_files, changed_files, removed_files, current
+
+    def record(self, filename: str, entry: Dict, chunks: Optional[int] = None):
+        """파일 인덱싱 결과 기록"""
+        self.files[filename] = {**entry, "chunks": chunks}
+
+    def remove(self, filename: str):
+        """파일 기록 삭제"""
+        self.files.pop(filename, None)
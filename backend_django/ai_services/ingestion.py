@@ -0,0 +1,188 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def load_and_split(pdf_path: str, chunk_size: int, chunk_overlap: int) -> Tuple[int, List[str], List[int], float]:
+    """PDF 로드 및 분할 (프로세스 풀 워커에서 실행)
+
+    Returns:
+        (페이지 수, 청크 텍스트, 청크별 페이지 번호, 소요 시간)
+    """
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+    from langchain_community.document_loaders import PyMuPDFLoader
+
+    started = time.perf_counter()
+    docs = PyMuPDFLoader(pdf_path).load()
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    splits = splitter.split_documents(docs)
+
+    texts = [doc.page_content for doc in splits]
+    pages = [doc.metadata.get("page", 0) for doc in splits]
+    return len(docs), texts, pages, time.perf_counter() - started
+
+
+class RateLimiter:
+    """스레드 안전한 토큰 버킷 (분당 요청 수 제한)"""
+
+    def __init__(self, requests_per_minute: Optional[int]):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute else 0.0
+        self._lock = threading.Lock()
+        self._next_time = 0.0
+
+    def acquire(self):
+        """다음 요청 가능 시각까지 대기"""
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            wait_time = self._next_time - now
+            self._next_time = max(now, self._next_time) + self.interval
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+
+@dataclass
+class IngestionStats:
+    """인제스트 실행 통계"""
+    files: int = 0
+    failed_files: int = 0
+    pages: int = 0
+    chunks: int = 0
+    embed_batches: int = 0
+    stage_seconds: Dict[str, float] = field(default_factory=lambda: {"parse": 0.0, "embed": 0.0, "write": 0.0})
+    wall_seconds: float = 0.0
+
+    def summary(self) -> str:
+        wall = self.wall_seconds or 1e-9
+        stages = ", ".join(f"{name}={seconds:.2f}s" for name, seconds in self.stage_seconds.items())
+        return (
+            f"{self.files} files ({self.failed_files} failed), {self.pages} pages, {self.chunks} chunks "
+            f"in {self.wall_seconds:.2f}s | {self.pages / wall:.1f} pages/s, {self.chunks / wall:.1f} chunks/s | "
+            f"stage time: {stages}"
+        )
+
+
+class IngestionPipeline:
+    """단계별 병렬 PDF 인제스트 파이프라인
+
+    1. 프로세스 풀에서 PDF 파싱 및 분할
+    2. 스레드 풀에서 임베딩 배치를 동시에 요청 (RateLimiter로 요청 속도 제한)
+    3. 메인 스레드 하나만 Chroma에 기록
+    """
+
+    def __init__(
+        self,
+        rag,
+        parse_workers: Optional[int] = None,
+        embed_concurrency: int = 4,
+        embed_batch_size: int = 100,
+        requests_per_minute: Optional[int] = None
+    ):
+        self.rag = rag
+        self.parse_workers = parse_workers or os.cpu_count() or 1
+        self.embed_concurrency = embed_concurrency
+        self.embed_batch_size = embed_batch_size
+        self.rate_limiter = RateLimiter(requests_per_minute)
+
+    def _embed_batch(self, texts: List[str]) -> Tuple[List[List[float]], float]:
+        """임베딩 배치 요청 (임베딩 스레드 풀에서 실행)"""
+        self.rate_limiter.acquire()
+        started = time.perf_counter()
+        vectors = self.rag.embedding_function.embed_documents(texts)
+        return vectors, time.perf_counter() - started
+
+    def run(self, pdf_dir: str, filenames: List[str]) -> Tuple[Dict[str, int], IngestionStats]:
+        """파일 목록 인제스트 후 (파일별 청크 수, 통계) 반환"""
+        stats = IngestionStats()
+        started = time.perf_counter()
+
+        processed: Dict[str, int] = {}
+        failed = set()
+        remaining_batches: Dict[str, int] = {}
+        chunk_counts: Dict[str, int] = {}
+
+        with ProcessPoolExecutor(max_workers=self.parse_workers) as parse_pool, \
+                ThreadPoolExecutor(max_workers=self.embed_concurrency) as embed_pool:
+            parse_futures = {
+                parse_pool.submit(
+                    load_and_split,
+                    os.path.join(pdf_dir, filename),
+                    settings.CHUNK_SIZE,
+                    settings.CHUNK_OVERLAP
+                ): filename
+                for filename in filenames
+            }
+            embed_futures = {}
+
+            while parse_futures or embed_futures:
+                done, _ = wait(list(parse_futures) + list(embed_futures), return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    if future in parse_futures:
+                        filename = parse_futures.pop(future)
+                        try:
+                            page_count, texts, pages, elapsed = future.result()
+                        except Exception as e:
+                            logger.error(f"Error parsing {filename}: {e}")
+                            failed.add(filename)
+                            continue
+
+                        stats.pages += page_count
+                        stats.stage_seconds["parse"] += elapsed
+                        metadatas = self.rag.build_chunk_metadatas(filename, len(texts), pages)
+                        chunk_counts[filename] = len(texts)
+                        remaining_batches[filename] = 0
+                        logger.info(f"Parsed {filename}: {page_count} pages, {len(texts)} chunks")
+
+                        if not texts:
+                            processed[filename] = 0
+                            continue
+
+                        for i in range(0, len(texts), self.embed_batch_size):
+                            batch_texts = texts[i:i + self.embed_batch_size]
+                            batch_metadatas = metadatas[i:i + self.embed_batch_size]
+                            embed_future = embed_pool.submit(self._embed_batch, batch_texts)
+                            embed_futures[embed_future] = (filename, batch_texts, batch_metadatas)
+                            remaining_batches[filename] += 1
+                    else:
+                        filename, batch_texts, batch_metadatas = embed_futures.pop(future)
+                        remaining_batches[filename] -= 1
+                        if filename in failed:
+                            continue
+                        try:
+                            vectors, elapsed = future.result()
+                            stats.stage_seconds["embed"] += elapsed
+                            stats.embed_batches += 1
+
+                            # 단일 writer: Chroma 기록은 메인 스레드에서만 수행
+                            write_started = time.perf_counter()
+                            self.rag.write_chunks(batch_texts, vectors, batch_metadatas)
+                            stats.stage_seconds["write"] += time.perf_counter() - write_started
+                        except Exception as e:
+                            logger.error(f"Error embedding/writing {filename}: {e}")
+                            failed.add(filename)
+                            continue
+
+                        if remaining_batches[filename] == 0:
+                            processed[filename] = chunk_counts[filename]
+                            logger.info(f"Successfully indexed {filename}")
+
+        # 일부 배치만 기록된 파일은 정리해서 다음 실행 때 다시 처리되도록 함
+        for filename in failed:
+            if filename in chunk_counts:
+                self.rag.delete_source(filename)
+
+        stats.files = len(processed)
+        stats.failed_files = len(failed)
+        stats.chunks = sum(processed.values())
+        stats.wall_seconds = time.perf_counter() - started
+        logger.info(f"Ingestion finished: {stats.summary()}")
+        return processed, stats
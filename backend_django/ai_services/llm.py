@@ -1,161 +1,251 @@
+import asyncio
 import logging
-from typing import Dict, Any, Optional, List
+import time
+from typing import Dict, Any, AsyncIterator, Optional, List
 import openai
 from openai import AsyncOpenAI
-import google.generativeai as genai
-from langchain_openai import ChatOpenAI
-from deep_translator import GoogleTranslator
-import httpx
 from django.conf import settings
 import re
+from ai_services.circuit_breaker import CircuitOpenError
+from ai_services.continuation import CONTINUE_PROMPT, MAX_OVERLAP_CHARS, is_complete, stitch, trim_to_last_sentence
+from ai_services.hedging import hedged_call
+from ai_services.metrics import get_metrics
+from ai_services.providers import get_provider_registry
+from ai_services.translation import get_translation_service, has_hangul, is_korean
 
 logger = logging.getLogger(__name__)
 
+# 답변 생성 실패 시 반환하는 고정 메시지 (캐시하면 안 되는 응답)
+EMPTY_ANSWER_MESSAGE = "죄송합니다. 해당 질문에 대한 답변을 생성할 수 없습니다. 다시 질문해주세요."
+SERVICE_ERROR_MESSAGE = "죄송합니다. 현재 서비스에 일시적인 문제가 있습니다. 잠시 후 다시 시도해주세요."
+FALLBACK_MESSAGES = (EMPTY_ANSWER_MESSAGE, SERVICE_ERROR_MESSAGE)
+
+DEFAULT_SYSTEM_PROMPT = """You are Ready To Go, a friendly travel, immigration information assistant.
+You specialize in providing accurate information about visa requirements, insurance, and immigration regulations.
+
+IMPORTANT GUIDELINES:
+1. NEVER mention "based on the context" or "according to the provided context"
+2. Answer directly and naturally as if you know the information
+3. Be conversational and helpful
+4. If you have specific information, share it confidently
+5. If you don't have specific information, provide general helpful advice
+
+Remember: You are having a natural conversation with a traveler who needs help."""
+
+# 스트리밍 번역 단위: 문장 끝(. ! ? 뒤 공백) 또는 줄바꿈
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n+")
+
+# 한국어 답변 방식
+# - direct: 영어 context로 한국어 답변을 바로 생성 (영어로 답하면 그때만 번역)
+# - translate: 영어로 답변을 생성한 뒤 번역
+ANSWER_MODE_DIRECT = "direct"
+ANSWER_MODE_TRANSLATE = "translate"
+
+KOREAN_ANSWER_INSTRUCTION = (
+    "Write your entire answer in natural Korean (한국어), even though the question and "
+    "the relevant information are in English. Keep proper nouns, numbers and URLs as they are."
+)
+
+# 스트리밍에서 답변 언어를 판단하기 전에 모으는 최소 글자 수
+LANGUAGE_DETECT_CHARS = 20
+
+SUMMARY_SYSTEM_PROMPT = """You maintain a running summary of a conversation between a traveler and a travel, immigration information assistant.
+Merge the new messages into the current summary. Keep what later answers depend on: destination countries, the traveler's nationality, plans, dates and constraints, and what has already been answered.
+Write concise English prose. Do not add information that is not in the conversation."""
+
 class LLM:
     """번역 기능이 추가된 LLM 모듈 - GPU AI 서버 연동"""
     
     def __init__(self, model_name: Optional[str] = None):
         self.model_name = model_name or getattr(settings, 'DEFAULT_LLM_MODEL', 'gpt-3.5-turbo')
         
-        # 클라이언트 초기화
-        self.openai_client = AsyncOpenAI(
-            api_key=settings.OPENAI_API_KEY,
-            timeout=60.0,
-            max_retries=3
-        ) if getattr(settings, 'OPENAI_API_KEY', None) else None
+        # 공급자 클라이언트는 프로세스 전체에서 공유 (연결 풀 재사용)
+        self.providers = get_provider_registry()
+        
+        # 번역 서비스 (RAG와 공유, 캐시 사용)
+        self.translation_service = get_translation_service()
         
-        if getattr(settings, 'GOOGLE_API_KEY', None):
-            genai.configure(api_key=settings.GOOGLE_API_KEY)
+        # 답변이 잘렸을 때 이어쓰기 요청 최대 횟수
+        self.max_continuations = getattr(settings, 'LLM_MAX_CONTINUATIONS', 2)
         
-        self.ko_to_en = GoogleTranslator(source='ko', target='en')
+        # Gemini 요청 타임아웃 (초, OpenAI 클라이언트와 같은 기준)
+        self.gemini_timeout = getattr(settings, 'GEMINI_TIMEOUT', 60.0)
         
-        self.translator = ChatOpenAI(
-            model="gpt-3.5-turbo", 
-            temperature=0, 
-            openai_api_key=settings.OPENAI_API_KEY
-        ) if getattr(settings, 'OPENAI_API_KEY', None) else None
+        # 응답이 느리면 폴백 공급자에도 요청 (헤징)
+        self.hedging_enabled = getattr(settings, 'LLM_HEDGING_ENABLED', False)
+        
+        # 한국어 답변 방식 (direct / translate)
+        self.answer_mode = getattr(settings, 'LLM_ANSWER_MODE', ANSWER_MODE_DIRECT)
+        
+        # 대화 요약 최대 토큰 수
+        self.summary_max_tokens = getattr(settings, 'CHAT_SUMMARY_MAX_TOKENS', 300)
+        
+        # 단계별 시간, 응답 공급자 지표
+        self.metrics = get_metrics()
         
         # GPU AI 서버 설정
         self.AI_SERVER_URL = getattr(settings, 'GPU_AI_SERVER_URL', "https://9c6b-34-168-217-150.ngrok-free.app")
-        self.ai_timeout = httpx.Timeout(60.0, connect=10.0)
         
         logger.info(f"LLM initialized with model: {self.model_name}")
     
-    async def _generate_gemini_response(self, query: str, context: str, system_prompt: str, history: Optional[List[Dict[str, str]]]) -> str:
-        """Gemini 모델을 사용한 응답 생성"""
-        if not getattr(settings, 'GOOGLE_API_KEY', None):
-            raise Exception("Google API key not configured")
-        
+    @property
+    def openai_client(self) -> Optional[AsyncOpenAI]:
+        return self.providers.openai_client()
+    
+    def _start_gemini_chat(self, system_prompt: str, history: Optional[List[Dict[str, str]]]):
+        """Gemini 채팅 세션 시작 (히스토리를 Gemini 형식으로 변환)"""
         model_name = self.model_name if self.model_name.startswith("gemini-") else "gemini-1.5-flash"
+        model = self.providers.gemini_model(model_name, system_prompt)
         
-        # System prompt와 context를 결합한 초기 메시지 준비
-        system_message = system_prompt
-        
-        model = genai.GenerativeModel(
-            model_name,
-            system_instruction=system_message
-        )
-        # Context를 query에 추가 (context가 있는 경우에만)
+        # Gemini의 chat history 형식으로 변환
+        gemini_history = []
+        for message in history or []:
+            role = message.get("role", "")
+            content = message.get("content", "")
+            
+            if role == "user":
+                gemini_history.append({
+                    "role": "user",
+                    "parts": [content]
+                })
+            elif role == "assistant":
+                gemini_history.append({
+                    "role": "model",
+                    "parts": [content]
+                })
+            elif role == "system":
+                # 대화 요약 - Gemini 히스토리는 user/model만 받으므로 확인 응답과 함께 전달
+                gemini_history.append({
+                    "role": "user",
+                    "parts": [content]
+                })
+                gemini_history.append({
+                    "role": "model",
+                    "parts": ["Understood."]
+                })
         
+        return model.start_chat(history=gemini_history)
+
+    @staticmethod
+    def _gemini_query(query: str, context: str) -> str:
+        """Context를 query에 추가 (context가 있는 경우에만)"""
         if context and context.strip():
-            enhanced_query = f"""Please answer the following question using the provided context information:
+            return f"""Please answer the following question using the provided context information:
 
                 Context:
                 {context}
 
                 Question: {query}"""
-        else :
-            enhanced_query = query
-            
-        # 히스토리가 있는 경우 채팅 세션으로 시작
-        if history and len(history) > 0:
-            # Gemini의 chat history 형식으로 변환
-            gemini_history = []
-            
-            for message in history:
-                role = message.get("role", "")
-                content = message.get("content", "")
-                
-                if role == "user":
-                    gemini_history.append({
-                        "role": "user",
-                        "parts": [content]
-                    })
-                elif role == "assistant":
-                    gemini_history.append({
-                        "role": "model",
-                        "parts": [content]
-                    })
-            
-            # 히스토리와 함께 채팅 시작
-            chat = model.start_chat(history=gemini_history)
-            response = chat.send_message(enhanced_query)
-        else:
-            # 히스토리가 없는 경우 새 채팅 시작
-            chat = model.start_chat()
-            response = chat.send_message(enhanced_query)
-        
+        return query
+
+    async def _generate_gemini_response(self, query: str, context: str, system_prompt: str, history: Optional[List[Dict[str, str]]]) -> str:
+        """Gemini 모델을 사용한 응답 생성 (SDK async API, 동시 요청 수/타임아웃 제한)"""
+        chat = self._start_gemini_chat(system_prompt, history)
+        async with self.providers.gemini_slot():
+            response = await asyncio.wait_for(
+                chat.send_message_async(self._gemini_query(query, context)),
+                timeout=self.gemini_timeout
+            )
         return response.text
-            
 
+    async def _stream_gemini_response(self, query: str, context: str, system_prompt: str, history: Optional[List[Dict[str, str]]]) -> AsyncIterator[str]:
+        """Gemini 스트리밍 응답 (전체 응답 시간은 gemini_timeout으로 제한)"""
+        chat = self._start_gemini_chat(system_prompt, history)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.gemini_timeout
+        
+        async with self.providers.gemini_slot():
+            response = await asyncio.wait_for(
+                chat.send_message_async(self._gemini_query(query, context), stream=True),
+                timeout=self.gemini_timeout
+            )
+            chunks = response.__aiter__()
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), timeout=max(deadline - loop.time(), 0))
+                except StopAsyncIteration:
+                    break
+                try:
+                    text = chunk.text
+                except ValueError:
+                    # 안전 필터 등으로 텍스트가 없는 청크
+                    continue
+                if text:
+                    yield text
+
+    async def _check_phi_health(self) -> bool:
+        client = self.providers.phi_client(self.AI_SERVER_URL)
+        health_response = await client.get("/api/health", timeout=5.0)
+        return health_response.json().get("status") == "healthy"
 
     async def _generate_phi_response(self, query: str, context: str) -> str:
-        """Phi 모델(GPU 서버)을 사용한 응답 생성. 응답이 불완전하면 재시도."""
-        
-        # 서버 상태 확인
-        async with httpx.AsyncClient(timeout=httpx.Timeout(5.0)) as client:
-            health_response = await client.get(f"{self.AI_SERVER_URL}/api/health")
-            if health_response.json().get("status") != "healthy":
-                raise Exception("GPU server not healthy")
-
-        def is_complete(sentence: str) -> bool:
-            sentence = sentence.strip()
-
-            if sentence.endswith(","):
-                return False
-            # 문장부호로 정상 종료했는지 확인
-            if sentence[-1:] in {".", "?", "!", "…", ".”", "?”", "!”"}:
-                return True
-            # 의미적으로 미완성처럼 보이는 경우 (조심스럽게 판단)
-            if re.search(r"\b(and|but|because|so|if|or|although|maybe|I think|such as)$", sentence, re.IGNORECASE):
-                return False
-            # 길이가 너무 짧은 경우도 미완성 가능성 있음
-            if len(sentence.split()) < 4:
-                return False
-            return True
+        """Phi 모델(GPU 서버)을 사용한 응답 생성. 응답이 잘렸으면 이어서 생성.
 
+        서버 상태는 캐시된 헬스 체크로 확인하고, 서킷이 열려 있으면 요청 없이 바로 실패해서 폴백으로 넘어갑니다.
+        """
+        # 서버 상태 확인 (캐시, 만료 시 백그라운드 갱신)
+        if not await self.providers.health_monitor("phi").is_healthy(self._check_phi_health):
+            raise CircuitOpenError("GPU server not healthy")
+        
+        breaker = self.providers.circuit_breaker("phi")
+        if not breaker.allow_request():
+            raise CircuitOpenError("GPU server circuit open")
+        
+        client = self.providers.phi_client(self.AI_SERVER_URL)
+        payload = {"question": query, "context": context}
+        answer = ""
         attempt = 0
 
-        while attempt <= 3:
-            async with httpx.AsyncClient(timeout=self.ai_timeout) as client:
-                payload = {"question": query, "context": context}
-                response = await client.post(f"{self.AI_SERVER_URL}/api/ask", json=payload)
+        while attempt <= self.max_continuations:
+            if answer:
+                # 잘린 답변을 처음부터 다시 생성하지 않고 뒷부분만 이어서 생성
+                payload["answer_prefix"] = answer
+            try:
+                response = await client.post("/api/ask", json=payload)
                 response.raise_for_status()
-
                 result = response.json()
-                answer = result.get("answer", "").strip()
-
-                logger.info(f"GPU server response time: {result.get('inference_time', 0):.2f}s")
+            except asyncio.CancelledError:
+                # 헤징 등으로 취소된 경우는 실패로 세지 않음
+                breaker.release()
+                raise
+            except Exception as e:
+                breaker.record_failure(e)
+                raise
+            # 서버는 응답했으므로 답변이 불완전해도 서킷 기준으로는 성공
+            breaker.record_success()
+            attempt += 1
 
-                if result.get("success") and answer:
-                    if is_complete(answer):
-                        return answer
-                    else:
-                        logger.warning(f"Incomplete response: '{answer}', retrying... (attempt {attempt + 1})")
-                else:
-                    logger.warning("GPU server returned no answer, retrying...")
+            logger.info(f"GPU server response time: {result.get('inference_time', 0):.2f}s")
 
-            attempt += 1
+            piece = result.get("answer", "")
+            if not (result.get("success") and piece.strip()):
+                logger.warning("GPU server returned no answer")
+                if answer:
+                    break
+                continue
 
-        raise Exception("GPU server failed to return a complete response after retries")
+            if answer and result.get("continued"):
+                answer = stitch(answer, piece)
+            else:
+                # 첫 답변, 또는 이어쓰기를 지원하지 않는 서버가 새로 생성한 답변
+                answer = piece.strip()
 
-    
+            if is_complete(answer):
+                self.providers.truncation.record("phi", continuations=attempt - 1, complete=True)
+                return answer
+            logger.info(f"Truncated response, requesting continuation (attempt {attempt})")
 
-    async def _generate_openai_response(self, query: str, context: str, system_prompt: str, history: Optional[List[Dict[str, str]]]) -> str:
-        """OpenAI 모델을 사용한 응답 생성"""
-        if not self.openai_client:
-            raise Exception("OpenAI client not available")
+        self.providers.truncation.record("phi", continuations=max(attempt - 1, 0), complete=False)
         
+        # 이어쓰기 후에도 끝나지 않았으면 마지막 완성된 문장까지만 사용
+        trimmed = trim_to_last_sentence(answer)
+        if trimmed and is_complete(trimmed):
+            return trimmed
+        raise Exception("GPU server failed to return a complete response")
+
+    @staticmethod
+    def _openai_messages(query: str, context: str, system_prompt: str, history: Optional[List[Dict[str, str]]]) -> List[Dict[str, str]]:
+        """OpenAI 채팅 메시지 구성"""
         messages = [{"role": "system", "content": system_prompt}]
         
         if history:
@@ -168,36 +258,218 @@ class LLM:
         user_content += "Please provide a direct and natural answer."
         
         messages.append({"role": "user", "content": user_content})
+        return messages
+
+    @staticmethod
+    def _continuation_messages(messages: List[Dict[str, str]], answer: str) -> List[Dict[str, str]]:
+        """잘린 답변을 assistant 메시지로 넣고 이어서 쓰도록 요청"""
+        if not answer:
+            return messages
+        return messages + [
+            {"role": "assistant", "content": answer},
+            {"role": "user", "content": CONTINUE_PROMPT}
+        ]
+
+    async def _generate_openai_response(self, query: str, context: str, system_prompt: str, history: Optional[List[Dict[str, str]]]) -> str:
+        """OpenAI 모델을 사용한 응답 생성 (max_tokens에서 잘리면 이어쓰기)"""
+        if not self.openai_client:
+            raise Exception("OpenAI client not available")
+        
+        # gemini 모델에서 폴백된 경우에는 OpenAI 기본 모델 사용
+        model_name = self.model_name if not self.model_name.startswith("gemini-") else "gpt-3.5-turbo"
+        messages = self._openai_messages(query, context, system_prompt, history)
+        answer = ""
         
-        response = await self.openai_client.chat.completions.create(
-            model=self.model_name,
-            messages=messages,
-            temperature=0,
-            max_tokens=1000
-        )
-        return response.choices[0].message.content
+        for continuation in range(self.max_continuations + 1):
+            response = await self.openai_client.chat.completions.create(
+                model=model_name,
+                messages=self._continuation_messages(messages, answer),
+                temperature=0,
+                max_tokens=1000
+            )
+            self.providers.usage.record_response("openai", "answer", response)
+            choice = response.choices[0]
+            answer = stitch(answer, choice.message.content or "", new_message=True)
+            if choice.finish_reason != "length":
+                self.providers.truncation.record("openai", continuations=continuation, complete=True)
+                return answer
+        
+        self.providers.truncation.record("openai", continuations=self.max_continuations, complete=False)
+        return trim_to_last_sentence(answer)
 
-    async def _generate_response(self, query: str, context: str, history: Optional[List[Dict[str, str]]], system_prompt: str) -> str:
-        """모델별 응답 생성"""
+    async def _stream_openai_response(self, query: str, context: str, system_prompt: str, history: Optional[List[Dict[str, str]]]) -> AsyncIterator[str]:
+        """OpenAI 스트리밍 응답 (토큰 단위 delta, max_tokens에서 잘리면 이어쓴 부분을 계속 스트리밍)"""
+        if not self.openai_client:
+            raise Exception("OpenAI client not available")
+        
+        # gemini 모델에서 폴백된 경우에는 OpenAI 기본 모델 사용
+        model_name = self.model_name if not self.model_name.startswith("gemini-") else "gpt-3.5-turbo"
+        messages = self._openai_messages(query, context, system_prompt, history)
+        answer = ""
+        
+        for continuation in range(self.max_continuations + 1):
+            stream = await self.openai_client.chat.completions.create(
+                model=model_name,
+                messages=self._continuation_messages(messages, answer),
+                temperature=0,
+                max_tokens=1000,
+                stream=True
+            )
+            finish_reason = None
+            # 이어쓴 부분은 앞부분 끝을 반복했는지 확인할 수 있을 만큼(MAX_OVERLAP_CHARS) 모은 뒤 연결
+            pending = "" if answer else None
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                choice = chunk.choices[0]
+                finish_reason = choice.finish_reason or finish_reason
+                delta = choice.delta.content
+                if not delta:
+                    continue
+                if pending is not None:
+                    pending += delta
+                    if len(pending) < MAX_OVERLAP_CHARS:
+                        continue
+                    delta = stitch(answer, pending, new_message=True)[len(answer):]
+                    pending = None
+                answer += delta
+                if delta:
+                    yield delta
+            
+            if pending:
+                # 이어쓴 부분이 모으는 길이보다 짧게 끝난 경우
+                delta = stitch(answer, pending, new_message=True)[len(answer):]
+                answer += delta
+                if delta:
+                    yield delta
+            
+            if finish_reason != "length":
+                self.providers.truncation.record("openai", continuations=continuation, complete=True)
+                return
+        
+        self.providers.truncation.record("openai", continuations=self.max_continuations, complete=False)
+
+    def _provider_chain(self, query: str, context: str, history: Optional[List[Dict[str, str]]], system_prompt: str):
+        """(기본 공급자, 폴백 공급자) - 각각 (이름, 호출 함수)"""
+        gemini = ("gemini", lambda: self._generate_gemini_response(query, context, system_prompt, history))
+        openai_ = ("openai", lambda: self._generate_openai_response(query, context, system_prompt, history))
+        if self.model_name.startswith("gemini-"):
+            return gemini, openai_
+        if "phi" in self.model_name.lower():
+            return ("phi", lambda: self._generate_phi_response(query, context)), gemini
+        return openai_, gemini
+
+    async def _timed(self, provider: str, call) -> str:
+        """공급자 호출 지연 시간 기록 (헤징 기준 시간 계산용)"""
+        started = time.perf_counter()
         try:
-            if self.model_name.startswith("gemini-"):
-                try:
-                    return await self._generate_gemini_response(query, context, system_prompt, history)
-                except Exception as e:
-                    logger.warning(f"Gemini failed, falling back to OpenAI: {e}")
-                    return await self._generate_openai_response(query, context, system_prompt, history)
-            elif "phi" in self.model_name.lower():
-                try:
-                    return await self._generate_phi_response(query, context)
-                except Exception as e:
-                    logger.warning(f"Phi failed, falling back to Gemini: {e}")
-                    return await self._generate_gemini_response(query, context, system_prompt, history)
-            else:
+            result = await call()
+        except asyncio.CancelledError:
+            # 헤징에서 취소된 느린 요청도 최소 이만큼은 걸렸으므로 기록해서 꼬리 지연이 사라지지 않게 함
+            self.providers.latency.observe(provider, time.perf_counter() - started)
+            raise
+        finally:
+            self.metrics.observe_stage("generate", time.perf_counter() - started, provider)
+        self.providers.latency.observe(provider, time.perf_counter() - started)
+        return result
+
+    async def _timed_stream(self, provider: str, stream: AsyncIterator[str]) -> AsyncIterator[str]:
+        """공급자 스트림을 기다린 시간만 generate 단계로 기록 (소비하는 쪽의 번역/SSE 전송 시간은 제외)"""
+        elapsed = 0.0
+        try:
+            while True:
+                started = time.perf_counter()
                 try:
-                    return await self._generate_openai_response(query, context, system_prompt, history)
-                except Exception as e:
-                    logger.warning(f"OpenAI failed, falling back to Gemini: {e}")
-                    return await self._generate_gemini_response(query, context, system_prompt, history)
+                    delta = await stream.__anext__()
+                except StopAsyncIteration:
+                    return
+                finally:
+                    elapsed += time.perf_counter() - started
+                yield delta
+        finally:
+            self.metrics.observe_stage("generate", elapsed, provider)
+            await stream.aclose()
+
+    async def _generate_response(self, query: str, context: str, history: Optional[List[Dict[str, str]]], system_prompt: str) -> str:
+        """모델별 응답 생성
+
+        헤징 모드에서는 기본 공급자가 관측된 p95 안에 응답하지 않으면 폴백 공급자에도 요청을 보내고
+        먼저 온 정상 응답을 사용합니다.
+        """
+        (primary_name, primary), (backup_name, backup) = self._provider_chain(query, context, history, system_prompt)
+        try:
+            if self.hedging_enabled:
+                latency = self.providers.latency
+                answer, winner = await hedged_call(
+                    lambda: self._timed(primary_name, primary),
+                    lambda: self._timed(backup_name, backup),
+                    delay=latency.deadline(primary_name),
+                    is_good=lambda answer: bool(answer and answer.strip()),
+                    on_hedge=lambda: latency.record_hedge(primary_name)
+                )
+                if winner == "backup":
+                    latency.record_hedge_win(primary_name)
+                self.metrics.record_served(
+                    primary_name if winner == "primary" else backup_name,
+                    "hedge" if winner == "backup" else winner
+                )
+                return answer
+            
+            try:
+                answer = await self._timed(primary_name, primary)
+                self.metrics.record_served(primary_name, "primary")
+                return answer
+            except CircuitOpenError as e:
+                logger.info(f"{primary_name} unavailable ({e}), routing to {backup_name}")
+            except Exception as e:
+                logger.warning(f"{primary_name} failed, falling back to {backup_name}: {e}")
+            answer = await self._timed(backup_name, backup)
+            self.metrics.record_served(backup_name, "fallback")
+            return answer
+        except Exception as e:
+            logger.error(f"All models failed: {e}")
+            raise Exception(f"Failed to generate response: {e}")
+
+    async def _stream_phi_response(self, query: str, context: str) -> AsyncIterator[str]:
+        """Phi(GPU 서버)는 스트리밍을 지원하지 않으므로 완성된 답변을 한 번에 전달"""
+        yield await self._generate_phi_response(query, context)
+
+    async def _stream_response(self, query: str, context: str, history: Optional[List[Dict[str, str]]], system_prompt: str) -> AsyncIterator[str]:
+        """모델별 스트리밍 응답 생성
+
+        폴백 순서는 _generate_response와 같고, 첫 토큰을 보내기 전에 실패한 경우에만 폴백합니다.
+        (이미 보낸 토큰은 되돌릴 수 없으므로 중간 실패는 호출자에게 전달)
+        """
+        if self.model_name.startswith("gemini-"):
+            primary_name, primary = "gemini", self._stream_gemini_response(query, context, system_prompt, history)
+            fallback_name, fallback = "openai", lambda: self._stream_openai_response(query, context, system_prompt, history)
+        elif "phi" in self.model_name.lower():
+            primary_name, primary = "phi", self._stream_phi_response(query, context)
+            fallback_name, fallback = "gemini", lambda: self._stream_gemini_response(query, context, system_prompt, history)
+        else:
+            primary_name, primary = "openai", self._stream_openai_response(query, context, system_prompt, history)
+            fallback_name, fallback = "gemini", lambda: self._stream_gemini_response(query, context, system_prompt, history)
+
+        started = False
+        try:
+            async for delta in self._timed_stream(primary_name, primary):
+                if not started:
+                    self.metrics.record_served(primary_name, "primary")
+                started = True
+                yield delta
+            return
+        except Exception as e:
+            if started:
+                raise
+            logger.warning(f"{self.model_name} stream failed, falling back to {fallback_name}: {e}")
+
+        try:
+            served = False
+            async for delta in self._timed_stream(fallback_name, fallback()):
+                if not served:
+                    self.metrics.record_served(fallback_name, "fallback")
+                    served = True
+                yield delta
         except Exception as e:
             logger.error(f"All models failed: {e}")
             raise Exception(f"Failed to generate response: {e}")
@@ -284,22 +556,69 @@ class LLM:
         return f"번역 실패: {english_text}"
     
     async def _translate_to_korean(self, text: str) -> str:
-        """영어 텍스트를 한국어로 번역"""
+        """영어 텍스트를 한국어로 번역 (공유 OpenAI 클라이언트 사용)"""
         try:
             # 이미 한국어인지 확인
             if any(0xAC00 <= ord(char) <= 0xD7A3 for char in text[:50]):
                 return text
             
-            if not self.translator:
+            if not self.openai_client:
                 return text
             
             translate_prompt = f"Translate to Korean naturally: {text}"
-            translated = self.translator.invoke(translate_prompt)
-            return translated.content
+            with self.metrics.timer("translate_answer"):
+                response = await self.openai_client.chat.completions.create(
+                    model="gpt-3.5-turbo",
+                    messages=[{"role": "user", "content": translate_prompt}],
+                    temperature=0
+                )
+            self.providers.usage.record_response("openai", "translation", response)
+            return response.choices[0].message.content or text
             
         except Exception as e:
             logger.error(f"Translation failed: {e}")
             return text
+
+    async def summarize_history(self, summary: str, messages: List[Dict[str, str]]) -> str:
+        """기존 요약에 새 메시지를 합친 요약 (이전 대화 전체가 아니라 밀려난 메시지만 전달)"""
+        transcript = "\n".join(f"{message['role']}: {message['content']}" for message in messages)
+        prompt = f"Current summary:\n{summary or '(none)'}\n\nNew messages:\n{transcript}\n\nUpdated summary:"
+        
+        if self.openai_client:
+            response = await self.openai_client.chat.completions.create(
+                model="gpt-3.5-turbo",
+                messages=[
+                    {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0,
+                max_tokens=self.summary_max_tokens
+            )
+            self.providers.usage.record_response("openai", "summary", response)
+            return (response.choices[0].message.content or "").strip()
+        
+        model = self.providers.gemini_model("gemini-1.5-flash", SUMMARY_SYSTEM_PROMPT)
+        async with self.providers.gemini_slot():
+            response = await asyncio.wait_for(
+                model.generate_content_async(prompt, generation_config={"max_output_tokens": self.summary_max_tokens}),
+                timeout=self.gemini_timeout
+            )
+        return response.text.strip()
+
+    def _answers_in_korean(self, answer_mode: Optional[str]) -> bool:
+        """한국어 답변을 바로 요청할지 (Phi는 영어로 파인튜닝된 모델이라 항상 번역)"""
+        mode = answer_mode or self.answer_mode
+        return mode == ANSWER_MODE_DIRECT and "phi" not in self.model_name.lower()
+
+    async def _prepare_query(self, query: str, instructions: Optional[str], korean_answer: bool) -> str:
+        """질문을 영어로 번역하고 고정 지시문을 붙임"""
+        with self.metrics.timer("translate_query"):
+            translated_query = await self.translation_service.atranslate(query, source='ko', target='en')
+        if instructions:
+            translated_query = f"{translated_query}\n\n{instructions}"
+        if korean_answer:
+            translated_query = f"{translated_query}\n\n{KOREAN_ANSWER_INSTRUCTION}"
+        return translated_query
     
     async def generate_with_translation(
         self,
@@ -308,39 +627,132 @@ class LLM:
         references: List[Dict[str, Any]],
         translate_to_korean: bool = True,
         history: Optional[List[Dict[str, str]]] = None,
-        system_prompt: Optional[str] = None
+        system_prompt: Optional[str] = None,
+        instructions: Optional[str] = None,
+        answer_mode: Optional[str] = None
     ) -> str:
-        """응답 생성 후 한국어로 번역"""
+        """응답 생성 후 한국어로 번역
+
+        instructions는 번역하지 않고 번역된 질문 뒤에 그대로 붙는 고정 영어 지시문입니다.
+        answer_mode가 direct(기본값은 LLM_ANSWER_MODE)면 한국어 답변을 바로 요청하고,
+        답변이 영어로 돌아온 경우에만 번역합니다.
+        """
         
         # 기본 시스템 프롬프트
         if not system_prompt:
-            system_prompt = """You are Ready To Go, a friendly travel, immigration information assistant.
-You specialize in providing accurate information about visa requirements, insurance, and immigration regulations.
-
-IMPORTANT GUIDELINES:
-1. NEVER mention "based on the context" or "according to the provided context"
-2. Answer directly and naturally as if you know the information
-3. Be conversational and helpful
-4. If you have specific information, share it confidently
-5. If you don't have specific information, provide general helpful advice
-
-Remember: You are having a natural conversation with a traveler who needs help."""
+            system_prompt = DEFAULT_SYSTEM_PROMPT
+        
+        korean_answer = translate_to_korean and self._answers_in_korean(answer_mode)
         
         try:
-            translated_query = self.ko_to_en.translate(query)
+            translated_query = await self._prepare_query(query, instructions, korean_answer)
             # 응답 생성
             answer = await self._generate_response(translated_query, context, history, system_prompt)
             
             # 빈 응답 처리
             if not answer or answer.strip() == "":
-                answer = "죄송합니다. 해당 질문에 대한 답변을 생성할 수 없습니다. 다시 질문해주세요."
+                answer = EMPTY_ANSWER_MESSAGE
             
-            # 한국어 번역
+            # 한국어 번역 (바로 한국어로 답한 경우는 생략)
             if translate_to_korean:
-                answer = await self._translate_to_korean(answer)
+                if korean_answer and is_korean(answer):
+                    self.providers.record_answer_path("direct")
+                else:
+                    self.providers.record_answer_path("translated_fallback" if korean_answer else "translated")
+                    answer = await self._translate_to_korean(answer)
             
             return answer
             
         except Exception as e:
             logger.error(f"Error in generate_with_translation: {e}")
-            return "죄송합니다. 현재 서비스에 일시적인 문제가 있습니다. 잠시 후 다시 시도해주세요."
+            return SERVICE_ERROR_MESSAGE
+
+    async def _translate_segment(self, segment: str) -> str:
+        """스트리밍 중 완성된 문장 단위 번역 (이미 한국어면 그대로)"""
+        if has_hangul(segment):
+            return segment
+        with self.metrics.timer("translate_answer"):
+            return await self.translation_service.atranslate(segment, source='en', target='ko')
+
+    async def stream_with_translation(
+        self,
+        query: str,
+        context: str,
+        references: List[Dict[str, Any]],
+        translate_to_korean: bool = True,
+        history: Optional[List[Dict[str, str]]] = None,
+        system_prompt: Optional[str] = None,
+        instructions: Optional[str] = None,
+        answer_mode: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """응답을 스트리밍하면서 한국어로 번역
+
+        영어 토큰을 모아 두었다가 문장이 끝날 때마다 번역해서 내보냅니다.
+        한국어 답변을 바로 요청한 경우(direct)에는 앞부분으로 답변 언어를 확인해서
+        한국어면 토큰을 그대로 내보내고, 영어면 문장 단위 번역으로 전환합니다.
+        첫 토큰 전에 실패하면 SERVICE_ERROR_MESSAGE를 내보내고, 중간에 실패하면 예외를 전달합니다.
+        """
+        if not system_prompt:
+            system_prompt = DEFAULT_SYSTEM_PROMPT
+
+        korean_answer = translate_to_korean and self._answers_in_korean(answer_mode)
+        # passthrough: 그대로 전달, translate: 문장 단위 번역, None: 답변 언어 확인 전
+        mode = None if korean_answer else ("translate" if translate_to_korean else "passthrough")
+
+        def resolve_mode(text: str) -> str:
+            if is_korean(text):
+                self.providers.record_answer_path("direct")
+                return "passthrough"
+            self.providers.record_answer_path("translated_fallback")
+            return "translate"
+
+        started = False
+        buffer = ""
+        try:
+            translated_query = await self._prepare_query(query, instructions, korean_answer)
+            if mode == "translate":
+                self.providers.record_answer_path("translated")
+
+            async for delta in self._stream_response(translated_query, context, history, system_prompt):
+                if mode == "passthrough":
+                    started = True
+                    yield delta
+                    continue
+
+                buffer += delta
+                if mode is None:
+                    if len(buffer.strip()) < LANGUAGE_DETECT_CHARS:
+                        continue
+                    mode = resolve_mode(buffer)
+                    if mode == "passthrough":
+                        started = True
+                        yield buffer
+                        buffer = ""
+                        continue
+
+                boundaries = list(SENTENCE_BOUNDARY.finditer(buffer))
+                if not boundaries:
+                    continue
+                last = boundaries[-1]
+                segment, separator, buffer = buffer[:last.start()], last.group(), buffer[last.end():]
+                if not segment.strip():
+                    continue
+                translated = await self._translate_segment(segment.strip())
+                started = True
+                yield translated + ("\n" * separator.count("\n") or " ")
+
+            if buffer.strip():
+                if mode is None:
+                    mode = resolve_mode(buffer)
+                translated = await self._translate_segment(buffer.strip()) if mode == "translate" else buffer
+                started = True
+                yield translated
+
+            if not started:
+                yield EMPTY_ANSWER_MESSAGE
+
+        except Exception as e:
+            logger.error(f"Error in stream_with_translation: {e}")
+            if started:
+                raise
+            yield SERVICE_ERROR_MESSAGE
@@ -0,0 +1,178 @@
+import contextvars
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from ai_services.hedging import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+# 현재 요청(대화 한 턴)의 단계별 기록 - asyncio.to_thread로 넘긴 동기 코드에도 전달됨
+_current_trace: contextvars.ContextVar[Optional[Dict[str, Any]]] = contextvars.ContextVar("chat_trace", default=None)
+
+LabelKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+def _label_key(name: str, labels: Dict[str, Any]) -> LabelKey:
+    return name, tuple(sorted(
+        (key, str(value).lower() if isinstance(value, bool) else str(value))
+        for key, value in labels.items() if value is not None
+    ))
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...], **extra: str) -> str:
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_bound(bound: float) -> str:
+    return "+Inf" if bound == float("inf") else repr(bound)
+
+
+class Metrics:
+    """프로세스 내 채팅 지표 (단계별 지연 시간 히스토그램, 카운터)
+
+    요청 단위로는 trace에 단계별 시간/토큰/응답 공급자를 모아 요청이 끝날 때 한 줄로 로그를 남깁니다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[LabelKey, LatencyHistogram] = {}
+        self._counters: Dict[LabelKey, float] = {}
+
+    def histogram(self, name: str, **labels) -> LatencyHistogram:
+        key = _label_key(name, labels)
+        with self._lock:
+            if key not in self._histograms:
+                self._histograms[key] = LatencyHistogram()
+            return self._histograms[key]
+
+    def observe(self, name: str, seconds: float, **labels):
+        self.histogram(name, **labels).observe(seconds)
+
+    def increment(self, name: str, amount: float = 1, **labels):
+        key = _label_key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe_stage(self, stage: str, seconds: float, provider: Optional[str] = None):
+        """단계 시간 기록 (히스토그램 + 현재 요청 trace)"""
+        self.observe("chat_stage_duration_seconds", seconds, stage=stage, provider=provider)
+        trace = _current_trace.get()
+        if trace is not None:
+            name = f"{stage}.{provider}" if provider else stage
+            stages = trace["stages_ms"]
+            stages[name] = round(stages.get(name, 0.0) + seconds * 1000, 1)
+
+    @contextmanager
+    def timer(self, stage: str, provider: Optional[str] = None) -> Iterator[None]:
+        """with 블록 실행 시간을 단계 시간으로 기록 (예외/취소된 경우도 기록)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe_stage(stage, time.perf_counter() - started, provider)
+
+    def record_tokens(self, provider: str, stage: str, prompt_tokens: int, completion_tokens: int):
+        """공급자가 돌려준 토큰 수 (현재 요청 trace에도 합산)"""
+        self.increment("llm_tokens_total", prompt_tokens or 0, provider=provider, stage=stage, type="prompt")
+        self.increment("llm_tokens_total", completion_tokens or 0, provider=provider, stage=stage, type="completion")
+        trace = _current_trace.get()
+        if trace is not None:
+            tokens = trace["tokens"]
+            tokens["prompt"] += prompt_tokens or 0
+            tokens["completion"] += completion_tokens or 0
+
+    def record_served(self, provider: str, hop: str):
+        """답변을 만든 공급자와 폴백 단계 (primary / fallback / hedge)"""
+        self.increment("llm_responses_total", provider=provider, hop=hop)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace["served_by"] = provider
+            trace["hop"] = hop
+
+    def mark_first_token(self, trace: Optional[Dict[str, Any]]):
+        """스트리밍 첫 토큰까지 걸린 시간 (요청 시작 기준)"""
+        if trace is None or "first_token_ms" in trace:
+            return
+        elapsed = time.perf_counter() - trace["_started"]
+        trace["first_token_ms"] = round(elapsed * 1000, 1)
+        self.observe("chat_first_token_seconds", elapsed)
+
+    def start_trace(self, **fields) -> Dict[str, Any]:
+        """현재 요청 trace 시작 (이후 같은 컨텍스트의 단계 기록이 모임)"""
+        trace = {"stages_ms": {}, "tokens": {"prompt": 0, "completion": 0}, "served_by": None, "hop": None, **fields}
+        trace["_started"] = time.perf_counter()
+        _current_trace.set(trace)
+        return trace
+
+    def activate(self, trace: Optional[Dict[str, Any]]):
+        """다른 컨텍스트(스트리밍 응답 등)에서 이어서 기록"""
+        _current_trace.set(trace)
+
+    def finish_trace(self, trace: Dict[str, Any], **fields):
+        """전체 시간 기록 후 요청 단위 로그 (status: 응답 상태 코드 - 거부된 요청도 기록)"""
+        elapsed = time.perf_counter() - trace.pop("_started", time.perf_counter())
+        trace.update(fields)
+        trace["total_ms"] = round(elapsed * 1000, 1)
+        self.observe(
+            "chat_request_duration_seconds", elapsed,
+            stream=trace.get("stream"), cached=trace.get("cached"), status=trace.get("status")
+        )
+        logger.info(f"Chat turn: {json.dumps(trace, ensure_ascii=False, default=str)}")
+
+    def render(self, providers=None) -> str:
+        """Prometheus 텍스트 형식"""
+        lines: List[str] = []
+
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+
+        if providers is not None:
+            # 공급자 호출 지연 시간, 토큰 사용량, 서킷 상태는 ProviderRegistry에 있음
+            for provider in providers.latency.stats():
+                histograms.append((("llm_provider_duration_seconds", (("provider", provider),)), providers.latency.histogram(provider)))
+            for name, breaker in providers.stats()["circuit_breakers"].items():
+                counters.append((("llm_circuit_open", (("provider", name),)), 1 if breaker["state"] == "open" else 0))
+            for path, count in providers.answer_paths.items():
+                counters.append((("llm_answer_path_total", (("path", path),)), count))
+
+        seen = set()
+        for (name, labels), histogram in histograms:
+            if name not in seen:
+                lines.append(f"# TYPE {name} histogram")
+                seen.add(name)
+            snapshot = histogram.snapshot()
+            for bound, count in snapshot["buckets"]:
+                lines.append(f"{name}_bucket{_format_labels(labels, le=_format_bound(bound))} {count}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {snapshot['sum']:.6f}")
+            lines.append(f"{name}_count{_format_labels(labels)} {snapshot['count']}")
+
+        for (name, labels), value in counters:
+            if name not in seen:
+                kind = "counter" if name.endswith("_total") else "gauge"
+                lines.append(f"# TYPE {name} {kind}")
+                seen.add(name)
+            lines.append(f"{name}{_format_labels(labels)} {int(value) if float(value).is_integer() else value}")
+
+        return "\n".join(lines) + "\n"
+
+
+_metrics: Optional[Metrics] = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics() -> Metrics:
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = Metrics()
+    return _metrics
@@ -0,0 +1,240 @@
+import json
+import logging
+import os
+import shutil
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+VECTORS_FILE = "vectors.npy"
+META_FILE = "meta.json"
+
+# float16 행렬을 float32로 바꿔 곱할 때 한 번에 처리할 행 수 (메모리 사용량 제한)
+BLOCK_ROWS = 8192
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def maximal_marginal_relevance(
+    query_sims: np.ndarray,
+    candidates: np.ndarray,
+    k: int,
+    lambda_mult: float = 0.5
+) -> List[int]:
+    """벡터화된 MMR → 선택된 후보 인덱스 (선택 순서)
+
+    Args:
+        query_sims: 후보별 질문 유사도
+        candidates: 정규화된 후보 벡터 행렬
+    """
+    if len(candidates) == 0:
+        return []
+    pairwise = candidates @ candidates.T
+
+    first = int(np.argmax(query_sims))  # 가장 유사한 후보부터 선택
+    selected = [first]
+    max_sim_to_selected = pairwise[first].copy()
+    remaining = np.ones(len(candidates), dtype=bool)
+    remaining[first] = False
+
+    while len(selected) < min(k, len(candidates)):
+        mmr_scores = lambda_mult * query_sims - (1 - lambda_mult) * max_sim_to_selected
+        mmr_scores[~remaining] = -np.inf
+        best = int(np.argmax(mmr_scores))
+        selected.append(best)
+        remaining[best] = False
+        np.maximum(max_sim_to_selected, pairwise[best], out=max_sim_to_selected)
+
+    return selected
+
+
+class NumpyVectorStore:
+    """NumPy 메모리 매핑 기반 완전 탐색(brute-force) 벡터 저장소
+
+    - 정규화된 float16 행렬을 .npy 파일로 저장하고 mmap으로 열어서 여러 워커가
+      같은 페이지 캐시를 공유합니다.
+    - 행은 (국가, 문서 타입) 순으로 정렬되어 있어서 태그/국가 필터는 행 범위 슬라이스로 처리합니다.
+    - 읽기 전용 스냅샷이며, Chroma에 기록된 내용을 export해서 만듭니다.
+    """
+
+    def __init__(self, path: str):
+        self.path = os.path.abspath(path)
+        self._lock = threading.Lock()
+        self._loaded_mtime = None
+        self.vectors: Optional[np.ndarray] = None
+        self.ids: List[str] = []
+        self.documents: List[str] = []
+        self.metadatas: List[Dict[str, Any]] = []
+        self.tag_ranges: Dict[str, Tuple[int, int]] = {}
+        self.country_ranges: Dict[str, Tuple[int, int]] = {}
+        self.load()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def build(
+        cls,
+        path: str,
+        ids: List[str],
+        embeddings: List[List[float]],
+        documents: List[str],
+        metadatas: List[Dict[str, Any]]
+    ) -> "NumpyVectorStore":
+        """스냅샷 생성 (임시 디렉토리에 쓰고 교체)"""
+        path = os.path.abspath(path)
+        order = sorted(
+            range(len(ids)),
+            key=lambda i: (
+                metadatas[i].get("country", ""),
+                metadatas[i].get("document_type", ""),
+                metadatas[i].get("source", ""),
+                metadatas[i].get("chunk_index", 0)
+            )
+        )
+
+        matrix = np.asarray(embeddings, dtype=np.float32).reshape(len(ids), -1)
+        matrix = _normalize(matrix)[order].astype(np.float16) if len(ids) else matrix.astype(np.float16)
+
+        ids = [ids[i] for i in order]
+        documents = [documents[i] for i in order]
+        metadatas = [metadatas[i] for i in order]
+
+        tag_ranges: Dict[str, List[int]] = {}
+        country_ranges: Dict[str, List[int]] = {}
+        for row, metadata in enumerate(metadatas):
+            for ranges, key in ((tag_ranges, metadata.get("tag")), (country_ranges, metadata.get("country"))):
+                if key is None:
+                    continue
+                if key in ranges:
+                    ranges[key][1] = row + 1
+                else:
+                    ranges[key] = [row, row + 1]
+
+        tmp_path = f"{path}.tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        np.save(os.path.join(tmp_path, VECTORS_FILE), matrix)
+        with open(os.path.join(tmp_path, META_FILE), "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "ids": ids,
+                    "documents": documents,
+                    "metadatas": metadatas,
+                    "tag_ranges": tag_ranges,
+                    "country_ranges": country_ranges
+                },
+                f,
+                ensure_ascii=False
+            )
+
+        old_path = f"{path}.old"
+        shutil.rmtree(old_path, ignore_errors=True)
+        if os.path.exists(path):
+            os.rename(path, old_path)
+        os.rename(tmp_path, path)
+        shutil.rmtree(old_path, ignore_errors=True)
+
+        logger.info(f"NumPy vector index built: {len(ids)} vectors, {len(tag_ranges)} tags")
+        return cls(path)
+
+    def load(self):
+        """스냅샷 로드 (벡터는 mmap)"""
+        meta_path = os.path.join(self.path, META_FILE)
+        if not os.path.exists(meta_path):
+            return
+        with self._lock:
+            mtime = os.stat(meta_path).st_mtime
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            self.vectors = np.load(os.path.join(self.path, VECTORS_FILE), mmap_mode="r")
+            self.ids = meta["ids"]
+            self.documents = meta["documents"]
+            self.metadatas = meta["metadatas"]
+            self.tag_ranges = {tag: tuple(r) for tag, r in meta["tag_ranges"].items()}
+            self.country_ranges = {country: tuple(r) for country, r in meta["country_ranges"].items()}
+            self._loaded_mtime = mtime
+        logger.info(f"NumPy vector index loaded: {len(self.ids)} vectors")
+
+    def reload_if_changed(self):
+        """스냅샷이 다시 만들어졌으면 다시 로드"""
+        try:
+            mtime = os.stat(os.path.join(self.path, META_FILE)).st_mtime
+        except OSError:
+            return
+        if mtime != self._loaded_mtime:
+            self.load()
+
+    def _row_range(self, tag: Optional[str] = None, country: Optional[str] = None) -> Tuple[int, int]:
+        if tag:
+            return self.tag_ranges.get(tag, (0, 0))
+        if country:
+            return self.country_ranges.get(country, (0, 0))
+        return 0, len(self.ids)
+
+    def _scores(self, query: np.ndarray, start: int, end: int) -> np.ndarray:
+        """행 범위에 대한 코사인 유사도 (블록 단위로 float32 변환)"""
+        scores = np.empty(end - start, dtype=np.float32)
+        for block_start in range(start, end, BLOCK_ROWS):
+            block_end = min(block_start + BLOCK_ROWS, end)
+            block = np.asarray(self.vectors[block_start:block_end], dtype=np.float32)
+            scores[block_start - start:block_end - start] = block @ query
+        return scores
+
+    @staticmethod
+    def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+        """점수 상위 k개 인덱스 (내림차순)"""
+        k = min(k, len(scores))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64)
+        candidates = np.argpartition(-scores, k - 1)[:k]
+        return candidates[np.argsort(-scores[candidates])]
+
+    def similarity_search(
+        self,
+        embedding: List[float],
+        k: int = 5,
+        tag: Optional[str] = None,
+        country: Optional[str] = None
+    ) -> List[Tuple[int, float]]:
+        """정확한 top-k 검색 → [(행 번호, 유사도)]"""
+        if self.vectors is None:
+            return []
+        start, end = self._row_range(tag, country)
+        if end <= start:
+            return []
+
+        query = _normalize(np.asarray(embedding, dtype=np.float32))
+        scores = self._scores(query, start, end)
+        top = self._top_k(scores, k)
+        return [(start + int(i), float(scores[i])) for i in top]
+
+    def max_marginal_relevance_search(
+        self,
+        embedding: List[float],
+        k: int = 5,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.5,
+        tag: Optional[str] = None,
+        country: Optional[str] = None
+    ) -> List[int]:
+        """벡터화된 MMR → 행 번호 목록"""
+        candidates = self.similarity_search(embedding, k=fetch_k, tag=tag, country=country)
+        if not candidates:
+            return []
+
+        rows = np.array([row for row, _ in candidates])
+        query_sims = np.array([score for _, score in candidates], dtype=np.float32)
+        selected = maximal_marginal_relevance(query_sims, np.asarray(self.vectors[rows], dtype=np.float32), k, lambda_mult)
+        return [int(rows[i]) for i in selected]
+
+    def get(self, row: int) -> Tuple[str, str, Dict[str, Any]]:
+        """행 번호 → (id, 본문, 메타데이터)"""
+        return self.ids[row], self.documents[row], self.metadatas[row]
@@ -0,0 +1,235 @@
+import asyncio
+import hashlib
+import logging
+import threading
+import weakref
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional, Tuple
+
+import google.generativeai as genai
+import httpx
+from django.conf import settings
+from openai import AsyncOpenAI
+
+from ai_services.circuit_breaker import CircuitBreaker, HealthMonitor
+from ai_services.continuation import TruncationStats
+from ai_services.hedging import LatencyTracker
+from ai_services.usage import TokenUsage
+
+logger = logging.getLogger(__name__)
+
+
+class ProviderRegistry:
+    """프로세스 전체에서 공유하는 LLM 공급자 클라이언트 레지스트리
+
+    - 공급자/모델별로 연결 풀을 가진 클라이언트를 한 번만 만들고 요청 간에 재사용합니다.
+    - 비동기 클라이언트(AsyncOpenAI, httpx.AsyncClient)의 연결은 이벤트 루프에 묶이므로
+      이벤트 루프별로 만듭니다. ASGI 워커는 루프가 하나라서 사실상 프로세스당 하나입니다.
+    - genai.GenerativeModel은 (모델, 시스템 프롬프트)별로 LRU 캐시합니다.
+    """
+
+    def __init__(
+        self,
+        openai_api_key: Optional[str] = None,
+        google_api_key: Optional[str] = None,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        gemini_cache_size: int = 64,
+        gemini_max_concurrency: int = 8,
+        circuit_failure_threshold: int = 3,
+        circuit_reset_timeout: float = 30.0,
+        health_ttl: float = 15.0,
+        latency: Optional[LatencyTracker] = None
+    ):
+        self.openai_api_key = openai_api_key
+        self.google_api_key = google_api_key
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections
+        )
+        self.gemini_cache_size = gemini_cache_size
+        self.gemini_max_concurrency = gemini_max_concurrency
+        self.circuit_failure_threshold = circuit_failure_threshold
+        self.circuit_reset_timeout = circuit_reset_timeout
+        self.health_ttl = health_ttl
+
+        self._lock = threading.Lock()
+        self._loop_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple[str, str], Any]]" = weakref.WeakKeyDictionary()
+        self._gemini_models: "OrderedDict[Tuple[str, str], genai.GenerativeModel]" = OrderedDict()
+        self._gemini_limiters: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+        self.gemini_in_flight = 0
+        self.gemini_peak_in_flight = 0
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._health_monitors: Dict[str, HealthMonitor] = {}
+
+        # 공급자별 응답 지연 시간 (헤징 기준 시간 계산)
+        self.latency = latency or LatencyTracker()
+
+        # 공급자별 답변 잘림/이어쓰기 통계
+        self.truncation = TruncationStats()
+
+        # 공급자/단계별 토큰 사용량, 한국어 답변 경로별 횟수
+        self.usage = TokenUsage()
+        self.answer_paths: Dict[str, int] = {"direct": 0, "translated": 0, "translated_fallback": 0}
+
+        # 통계
+        self.created: Dict[str, int] = {"openai": 0, "phi": 0, "gemini_model": 0}
+        self.reused: Dict[str, int] = {"openai": 0, "phi": 0, "gemini_model": 0}
+
+        if google_api_key:
+            genai.configure(api_key=google_api_key)
+
+    def _loop_client(self, kind: str, key: str, factory):
+        """현재 이벤트 루프에 묶인 비동기 클라이언트 (없으면 생성)"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clients = self._loop_clients.setdefault(loop, {})
+            client = clients.get((kind, key))
+            if client is not None:
+                self.reused[kind] += 1
+                return client
+            client = factory()
+            clients[(kind, key)] = client
+            self.created[kind] += 1
+        logger.info(f"Created pooled {kind} client ({key})")
+        return client
+
+    def openai_client(self) -> Optional[AsyncOpenAI]:
+        """OpenAI 비동기 클라이언트 (모델과 무관하게 하나의 연결 풀 공유)"""
+        if not self.openai_api_key:
+            return None
+        return self._loop_client(
+            "openai",
+            "default",
+            lambda: AsyncOpenAI(
+                api_key=self.openai_api_key,
+                timeout=60.0,
+                max_retries=3,
+                http_client=httpx.AsyncClient(limits=self.limits, timeout=httpx.Timeout(60.0, connect=10.0))
+            )
+        )
+
+    def phi_client(self, base_url: str) -> httpx.AsyncClient:
+        """GPU 서버(Phi) HTTP 클라이언트 (서버 URL별)"""
+        return self._loop_client(
+            "phi",
+            base_url,
+            lambda: httpx.AsyncClient(
+                base_url=base_url,
+                limits=self.limits,
+                timeout=httpx.Timeout(60.0, connect=10.0)
+            )
+        )
+
+    def gemini_model(self, model_name: str, system_prompt: str) -> genai.GenerativeModel:
+        """(모델, 시스템 프롬프트)별 GenerativeModel"""
+        if not self.google_api_key:
+            raise Exception("Google API key not configured")
+        key = (model_name, hashlib.sha256(system_prompt.encode("utf-8")).hexdigest())
+        with self._lock:
+            model = self._gemini_models.get(key)
+            if model is not None:
+                self._gemini_models.move_to_end(key)
+                self.reused["gemini_model"] += 1
+                return model
+            model = genai.GenerativeModel(model_name, system_instruction=system_prompt)
+            self._gemini_models[key] = model
+            self.created["gemini_model"] += 1
+            while len(self._gemini_models) > self.gemini_cache_size:
+                self._gemini_models.popitem(last=False)
+        return model
+
+    @asynccontextmanager
+    async def gemini_slot(self):
+        """Gemini 동시 요청 수 제한 (세마포어는 이벤트 루프에 묶이므로 루프별로 생성)"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            semaphore = self._gemini_limiters.get(loop)
+            if semaphore is None:
+                semaphore = self._gemini_limiters[loop] = asyncio.Semaphore(self.gemini_max_concurrency)
+
+        async with semaphore:
+            self.gemini_in_flight += 1
+            self.gemini_peak_in_flight = max(self.gemini_peak_in_flight, self.gemini_in_flight)
+            try:
+                yield
+            finally:
+                self.gemini_in_flight -= 1
+
+    def record_answer_path(self, path: str):
+        """한국어 답변 경로 기록 (direct: 바로 한국어로 답변, translated: 영어 답변 번역, translated_fallback: 한국어 요청이 영어로 와서 번역)"""
+        with self._lock:
+            self.answer_paths[path] = self.answer_paths.get(path, 0) + 1
+
+    def circuit_breaker(self, name: str) -> CircuitBreaker:
+        """공급자별 서킷 브레이커 (프로세스 전체에서 공유)"""
+        with self._lock:
+            if name not in self._breakers:
+                self._breakers[name] = CircuitBreaker(
+                    name,
+                    failure_threshold=self.circuit_failure_threshold,
+                    reset_timeout=self.circuit_reset_timeout
+                )
+            return self._breakers[name]
+
+    def health_monitor(self, name: str) -> HealthMonitor:
+        """공급자별 헬스 체크 캐시"""
+        with self._lock:
+            if name not in self._health_monitors:
+                self._health_monitors[name] = HealthMonitor(name, ttl_seconds=self.health_ttl)
+            return self._health_monitors[name]
+
+    def stats(self) -> Dict[str, Any]:
+        """풀 통계"""
+        with self._lock:
+            live_clients: Dict[str, int] = {}
+            for clients in self._loop_clients.values():
+                for kind, _ in clients:
+                    live_clients[kind] = live_clients.get(kind, 0) + 1
+            return {
+                "event_loops": len(self._loop_clients),
+                "live_clients": live_clients,
+                "gemini_models": len(self._gemini_models),
+                "gemini_in_flight": self.gemini_in_flight,
+                "gemini_peak_in_flight": self.gemini_peak_in_flight,
+                "gemini_max_concurrency": self.gemini_max_concurrency,
+                "created": dict(self.created),
+                "reused": dict(self.reused),
+                "max_connections": self.limits.max_connections,
+                "max_keepalive_connections": self.limits.max_keepalive_connections,
+                "circuit_breakers": {name: breaker.stats() for name, breaker in self._breakers.items()},
+                "health": {name: monitor.stats() for name, monitor in self._health_monitors.items()},
+                "latency": self.latency.stats(),
+                "truncation": self.truncation.stats(),
+                "usage": self.usage.stats(),
+                "answer_paths": dict(self.answer_paths)
+            }
+
+
+_provider_registry: Optional[ProviderRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_provider_registry() -> ProviderRegistry:
+    global _provider_registry
+    if _provider_registry is None:
+        with _registry_lock:
+            if _provider_registry is None:
+                _provider_registry = ProviderRegistry(
+                    openai_api_key=getattr(settings, 'OPENAI_API_KEY', None),
+                    google_api_key=getattr(settings, 'GOOGLE_API_KEY', None),
+                    max_connections=getattr(settings, 'LLM_HTTP_MAX_CONNECTIONS', 100),
+                    max_keepalive_connections=getattr(settings, 'LLM_HTTP_MAX_KEEPALIVE', 20),
+                    gemini_cache_size=getattr(settings, 'GEMINI_MODEL_CACHE_SIZE', 64),
+                    gemini_max_concurrency=getattr(settings, 'GEMINI_MAX_CONCURRENCY', 8),
+                    circuit_failure_threshold=getattr(settings, 'PHI_CIRCUIT_FAILURE_THRESHOLD', 3),
+                    circuit_reset_timeout=getattr(settings, 'PHI_CIRCUIT_RESET_TIMEOUT', 30.0),
+                    health_ttl=getattr(settings, 'PHI_HEALTH_TTL', 15.0),
+                    latency=LatencyTracker(
+                        quantile=getattr(settings, 'LLM_HEDGE_QUANTILE', 0.95),
+                        default_delay=getattr(settings, 'LLM_HEDGE_DEFAULT_DELAY', 8.0),
+                        min_samples=getattr(settings, 'LLM_HEDGE_MIN_SAMPLES', 20)
+                    )
+                )
+    return _provider_registry
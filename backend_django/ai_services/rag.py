@@ -6,16 +6,42 @@ import chromadb
 from chromadb import PersistentClient
 from chromadb.utils import embedding_functions
 from langchain_chroma import Chroma
+from langchain_core.documents import Document
+import numpy as np
 import tiktoken
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.document_loaders import PyMuPDFLoader
 from langchain_openai import OpenAIEmbeddings
-from deep_translator import GoogleTranslator
 from django.conf import settings
 import os
+import time
+import uuid
+from ai_services.embedding_cache import CachedEmbeddings
+from ai_services.embeddings import LocalEmbeddings
+from ai_services.metrics import get_metrics
+from ai_services.ingestion import IngestionPipeline
+from ai_services.translation import get_translation_service
+from ai_services.bm25 import BM25Index
+from ai_services.numpy_store import NumpyVectorStore, maximal_marginal_relevance
 
 logger = logging.getLogger(__name__)
 
+
+def reciprocal_rank_fusion(result_lists: List[List[Document]], k: int = 60) -> List[Document]:
+    """여러 검색 결과를 RRF(reciprocal rank fusion)로 결합"""
+    scores: Dict[str, float] = {}
+    documents: Dict[str, Document] = {}
+    
+    for results in result_lists:
+        for rank, doc in enumerate(results):
+            # chunk_id가 없는 예전 청크는 본문으로 식별
+            key = doc.metadata.get("chunk_id") or doc.page_content
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank + 1)
+            documents.setdefault(key, doc)
+    
+    ranked = sorted(scores, key=lambda key: scores[key], reverse=True)
+    return [documents[key] for key in ranked]
+
+
 class RAG:
 
     def __init__(self):
@@ -24,12 +50,8 @@ class RAG:
         os.makedirs(self.persist_directory, exist_ok=True)
         logger.info(f"Vector DB path: {self.persist_directory}")
         
-        # OpenAI 임베딩 설정
-        self.embedding_function = OpenAIEmbeddings(
-            model=settings.EMBEDDING_MODEL,
-            openai_api_key=settings.OPENAI_API_KEY,
-            dimensions=384
-        )
+        # 임베딩 설정 (디스크 캐시로 감싸서 변경되지 않은 청크는 재임베딩하지 않음)
+        self.embedding_function = self._create_embedding_function()
         
         # 텍스트 분할기
         self.text_splitter = RecursiveCharacterTextSplitter(
@@ -38,83 +60,456 @@ class RAG:
         )
         
         # Chroma 벡터스토어 초기화 (langchain-chroma 사용)
-        self.vectorstore = Chroma(
-            collection_name="global-documents",
-            embedding_function=self.embedding_function,
-            persist_directory=self.persist_directory
-        )
+        self.client = PersistentClient(path=self.persist_directory)
+        self.collection_name = "global-documents"
+        self.vectorstore = self._create_vectorstore()
         logger.info("Chroma vectorstore initialized")
         
+        # 하이브리드 검색용 BM25 역색인 (벡터 인덱스와 같은 청크로 증분 갱신)
+        self.hybrid_search = getattr(settings, 'HYBRID_SEARCH_ENABLED', True)
+        self.bm25 = BM25Index(getattr(settings, 'BM25_INDEX_PATH', None))
+        
+        # 마지막 검색 단계별 소요 시간 (ms)
+        self.last_search_timings: Dict[str, float] = {}
+        
+        # 태그(country_doctype)별 파티션 컬렉션 (필요할 때 로드)
+        self.partitioned = getattr(settings, 'VECTOR_PARTITIONED', False)
+        self._partitions: Dict[str, Chroma] = {}
+        
+        # 검색 백엔드: 'chroma' 또는 'numpy' (Chroma 내용을 export한 mmap 스냅샷으로 완전 탐색)
+        self.vector_backend = getattr(settings, 'VECTOR_BACKEND', 'chroma')
+        self._numpy_store = None
+        
         self.tokenizer = tiktoken.get_encoding("cl100k_base")
         
-        # 번역기 초기화
-        self.ko_to_en = GoogleTranslator(source='ko', target='en')
-        self.en_to_ko = GoogleTranslator(source='en', target='ko')
+        # 컨텍스트 토큰 예산
+        self.max_context_tokens = getattr(settings, 'MAX_CONTEXT_TOKENS', 3000)
+        self.last_context_stats: Dict[str, int] = {}
+        
+        # 마지막 인제스트 실행 통계
+        self.last_ingestion_stats = None
+        
+        # 번역 서비스 (LLM과 공유, 캐시 사용)
+        self.translator = get_translation_service()
         
         # 문서 타입 패턴
         self.doc_type_pattern = r"(.*?)_(visa_info|insurance_info|immigration_regulations_info|immigration_safety_info)\.pdf"
     
-    def process_pdf_directory(self, pdf_dir: str):
-        """PDF 디렉토리 처리"""
-        pdf_files = [f for f in os.listdir(pdf_dir) if f.endswith(".pdf")]
-        processed_count = 0
+    def _create_embedding_function(self) -> CachedEmbeddings:
+        """EMBEDDING_BACKEND 설정에 따라 임베딩 백엔드 생성
+
+        - openai: OpenAI 임베딩 API (EMBEDDING_MODEL)
+        - local: CPU에서 실행하는 sentence-transformers/ONNX 모델 (LOCAL_EMBEDDING_MODEL)
+        """
+        backend = getattr(settings, 'EMBEDDING_BACKEND', 'openai')
+        dimensions = getattr(settings, 'EMBEDDING_DIMENSIONS', 384)
         
-        for filename in pdf_files:
-            match = re.match(self.doc_type_pattern, filename)
-            if not match:
-                logger.warning(f"Skipping file with invalid pattern: {filename}")
-                continue
-                
-            country, doc_type = match.groups()
-            pdf_path = os.path.join(pdf_dir, filename)
+        if backend == 'local':
+            runtime = getattr(settings, 'LOCAL_EMBEDDING_RUNTIME', 'torch')
+            model_name = settings.LOCAL_EMBEDDING_MODEL
+            underlying = LocalEmbeddings(
+                model_name,
+                runtime=runtime,
+                batch_size=getattr(settings, 'LOCAL_EMBEDDING_BATCH_SIZE', 64),
+                max_workers=getattr(settings, 'LOCAL_EMBEDDING_THREADS', 2),
+                dimensions=dimensions
+            )
+            self.embedding_model_id = f"local:{model_name}"
+            cache_model_name = self.embedding_model_id
+            cache_queries = True  # 로컬 모델은 결정적이므로 쿼리도 캐시
+        elif backend == 'openai':
+            underlying = OpenAIEmbeddings(
+                model=settings.EMBEDDING_MODEL,
+                openai_api_key=settings.OPENAI_API_KEY,
+                dimensions=dimensions
+            )
+            self.embedding_model_id = f"openai:{settings.EMBEDDING_MODEL}"
+            cache_model_name = settings.EMBEDDING_MODEL  # 기존 캐시 키 유지
+            cache_queries = False
+        else:
+            raise ValueError(f"Unknown EMBEDDING_BACKEND: {backend}")
+        
+        logger.info(f"Embedding backend: {self.embedding_model_id} ({dimensions} dims)")
+        return CachedEmbeddings(
+            underlying,
+            cache_path=settings.EMBEDDING_CACHE_PATH,
+            model_name=cache_model_name,
+            dimensions=dimensions,
+            cache_queries=cache_queries
+        )
+    
+    def _create_vectorstore(self, collection_name: Optional[str] = None) -> Chroma:
+        """Chroma 컬렉션 열기 (없으면 생성)"""
+        vectorstore = Chroma(
+            collection_name=collection_name or self.collection_name,
+            embedding_function=self.embedding_function,
+            client=self.client,
+            collection_metadata={"embedding_model": self.embedding_model_id}
+        )
+        
+        # 다른 임베딩 모델로 만든 컬렉션이면 검색 결과가 의미 없으므로 경고
+        stored_model = (vectorstore._collection.metadata or {}).get("embedding_model")
+        if stored_model and stored_model != self.embedding_model_id:
+            logger.warning(
+                f"Collection '{vectorstore._collection.name}' was embedded with {stored_model}, "
+                f"but the configured backend is {self.embedding_model_id}. "
+                f"Run 'python manage.py reembed_vectors' to migrate."
+            )
+        return vectorstore
+    
+    def list_collections(self) -> List[str]:
+        """RAG가 사용하는 컬렉션 이름 목록"""
+        if self.partitioned:
+            return [self.partition_name(tag) for tag in self.list_partitions()]
+        return [self.collection_name]
+    
+    def reembed_collections(self, batch_size: int = 256) -> Dict[str, int]:
+        """저장된 청크를 현재 임베딩 백엔드로 다시 임베딩 (백엔드 변경 시 마이그레이션)
+
+        컬렉션마다 임시 컬렉션에 새 벡터를 채운 뒤 기존 컬렉션과 교체합니다.
+        PDF를 다시 파싱하지 않고 Chroma에 저장된 본문과 메타데이터를 그대로 사용합니다.
+        """
+        migrated = {}
+        for name in self.list_collections():
+            source = self.client.get_collection(name)
+            tmp_name = f"{name[:55]}-reembed"
+            try:
+                self.client.delete_collection(tmp_name)
+            except ValueError:
+                pass
+            target = self.client.create_collection(
+                tmp_name,
+                metadata={"embedding_model": self.embedding_model_id}
+            )
             
-            logger.info(f"Processing {country.upper()} - {doc_type}")
+            count = 0
+            offset = 0
+            while True:
+                batch = source.get(include=["documents", "metadatas"], limit=batch_size, offset=offset)
+                if not batch["ids"]:
+                    break
+                target.upsert(
+                    ids=batch["ids"],
+                    embeddings=self.embedding_function.embed_documents(batch["documents"]),
+                    metadatas=batch["metadatas"],
+                    documents=batch["documents"]
+                )
+                count += len(batch["ids"])
+                offset += len(batch["ids"])
+                logger.info(f"Re-embedded {count} chunks of '{name}'")
             
-            try:
-                # PDF 로드 및 처리
-                docs = PyMuPDFLoader(pdf_path).load()
-                splits = self.text_splitter.split_documents(docs)
-                texts = [doc.page_content for doc in splits]
-                
-                # 메타데이터
-                metadatas = [
-                    {
-                        "country": country,
-                        "document_type": doc_type,
-                        "tag": f"{country}_{doc_type}",
-                        "updated_at": datetime.now().isoformat(),
-                        "source": filename
-                    }
-                    for _ in splits
-                ]
-                
-                # 배치 크기 제한
-                MAX_BATCH_SIZE = 500
-                
-                # 배치 처리
-                total_texts = len(texts)
-                logger.info(f"Total chunks to process: {total_texts}")
-                
-                for i in range(0, total_texts, MAX_BATCH_SIZE):
-                    end_idx = min(i + MAX_BATCH_SIZE, total_texts)
-                    batch_texts = texts[i:end_idx]
-                    batch_metadatas = metadatas[i:end_idx]
-                    
-                    logger.info(f"Processing batch {i//MAX_BATCH_SIZE + 1}: chunks {i} to {end_idx-1}")
-                    
-                    # 벡터 스토어에 배치 추가
-                    self.vectorstore.add_texts(texts=batch_texts, metadatas=batch_metadatas)
-                    
-                logger.info(f"Successfully indexed {country}_{doc_type}")
-                processed_count += 1
-                
-            except Exception as e:
-                logger.error(f"Error processing {filename}: {e}")
+            # 기존 컬렉션을 새 컬렉션으로 교체
+            self.client.delete_collection(name)
+            target.modify(name=name)
+            migrated[name] = count
+        
+        # 열려 있던 컬렉션 핸들 다시 로드
+        self._partitions = {}
+        self.vectorstore = self._create_vectorstore()
+        return migrated
+    
+    PARTITION_PREFIX = "docs-"
+    
+    @classmethod
+    def partition_name(cls, tag: str) -> str:
+        """태그에 해당하는 파티션 컬렉션 이름 (Chroma 이름 규칙에 맞게 변환)"""
+        name = re.sub(r"[^a-zA-Z0-9_-]", "-", f"{cls.PARTITION_PREFIX}{tag}")
+        return name[:63]
+    
+    def get_partition(self, tag: str) -> Chroma:
+        """태그 파티션 로드 (없으면 생성)"""
+        if tag not in self._partitions:
+            self._partitions[tag] = self._create_vectorstore(self.partition_name(tag))
+            logger.info(f"Loaded vector partition: {tag}")
+        return self._partitions[tag]
+    
+    def list_partitions(self, country: Optional[str] = None) -> List[str]:
+        """디스크에 존재하는 파티션 태그 목록 (국가 지정 시 해당 국가만)"""
+        tags = []
+        for collection in self.client.list_collections():
+            name = collection.name if hasattr(collection, "name") else str(collection)
+            if not name.startswith(self.PARTITION_PREFIX):
                 continue
+            tag = name[len(self.PARTITION_PREFIX):]
+            if country is None or tag.startswith(f"{country}_"):
+                tags.append(tag)
+        return sorted(tags)
+    
+    def get_vectorstore(self, tag: Optional[str] = None) -> Chroma:
+        """청크를 기록할 벡터스토어 (파티션 모드면 태그 파티션)"""
+        if self.partitioned and tag:
+            return self.get_partition(tag)
+        return self.vectorstore
+    
+    def rebuild_partition(self, tag: str):
+        """파티션 하나만 삭제하고 새로 생성 (다른 파티션은 건드리지 않음)"""
+        name = self.partition_name(tag)
+        try:
+            self.client.delete_collection(name)
+        except ValueError:
+            pass  # 아직 없는 파티션
+        self._partitions.pop(tag, None)
+        self.bm25.remove_where(lambda metadata: metadata.get("tag") == tag)
+        self.bm25.save()
+        logger.info(f"Vector partition '{name}' reset")
+    
+    @staticmethod
+    def chunk_id(source: str, chunk_index: int) -> str:
+        """청크 ID (같은 파일을 다시 인덱싱해도 중복되지 않도록 고정된 값 사용)"""
+        return f"{source}#{chunk_index}"
+    
+    def parse_filename(self, filename: str) -> Optional[Tuple[str, str]]:
+        """파일명에서 (국가, 문서 타입) 추출"""
+        match = re.match(self.doc_type_pattern, filename)
+        if not match:
+            return None
+        return match.groups()
+    
+    def build_chunk_metadatas(self, filename: str, chunk_count: int, pages: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+        """PDF 청크 메타데이터 생성"""
+        country, doc_type = self.parse_filename(filename)
+        updated_at = datetime.now().isoformat()
+        return [
+            {
+                "country": country,
+                "document_type": doc_type,
+                "tag": f"{country}_{doc_type}",
+                "updated_at": updated_at,
+                "source": filename,
+                "page": pages[i] if pages else 0,
+                "chunk_index": i,
+                "chunk_id": self.chunk_id(filename, i)
+            }
+            for i in range(chunk_count)
+        ]
+    
+    def write_chunks(self, texts: List[str], embeddings: List[List[float]], metadatas: List[Dict[str, Any]]):
+        """미리 계산된 임베딩으로 청크 기록 (파티션 모드면 태그별로 나눠서 기록)"""
+        groups: Dict[Optional[str], List[int]] = {}
+        for i, metadata in enumerate(metadatas):
+            groups.setdefault(metadata.get("tag") if self.partitioned else None, []).append(i)
+        
+        for tag, indices in groups.items():
+            self.get_vectorstore(tag)._collection.upsert(
+                ids=[metadatas[i]["chunk_id"] for i in indices],
+                embeddings=[embeddings[i] for i in indices],
+                metadatas=[metadatas[i] for i in indices],
+                documents=[texts[i] for i in indices]
+            )
+        
+        # BM25 색인도 같이 갱신 (저장은 인제스트가 끝난 뒤 한 번)
+        self.bm25.add([metadata["chunk_id"] for metadata in metadatas], texts, metadatas)
+    
+    def process_pdf_directory(
+        self,
+        pdf_dir: str,
+        filenames: Optional[List[str]] = None,
+        parse_workers: Optional[int] = None,
+        embed_concurrency: Optional[int] = None
+    ) -> Dict[str, int]:
+        """PDF 디렉토리 처리
+
+        filenames가 주어지면 해당 파일만 처리합니다. 파싱은 프로세스 풀, 임베딩은
+        동시 요청, Chroma 기록은 단일 writer로 처리합니다. 성공한 파일별 청크 수를 반환합니다.
+        """
+        if filenames is None:
+            filenames = [f for f in os.listdir(pdf_dir) if f.endswith(".pdf")]
+        
+        valid_files = []
+        for filename in filenames:
+            if not self.parse_filename(filename):
+                logger.warning(f"Skipping file with invalid pattern: {filename}")
+                continue
+            valid_files.append(filename)
+        
+        pipeline = IngestionPipeline(
+            self,
+            parse_workers=parse_workers or getattr(settings, 'INGEST_PARSE_WORKERS', None),
+            embed_concurrency=embed_concurrency or getattr(settings, 'INGEST_EMBED_CONCURRENCY', 4),
+            embed_batch_size=getattr(settings, 'INGEST_EMBED_BATCH_SIZE', 100),
+            requests_per_minute=getattr(settings, 'EMBEDDING_REQUESTS_PER_MINUTE', None)
+        )
+        processed, stats = pipeline.run(pdf_dir, valid_files)
+        self.last_ingestion_stats = stats
+        self.bm25.save()
         
         # 모든 문서 처리 완료
-        logger.info(f"Processed {processed_count} PDF files")
+        logger.info(f"Processed {len(processed)} PDF files")
+        logger.info(f"Embedding cache stats: {self.embedding_function.stats()}")
         logger.info("Vector database automatically persisted to disk")
+        return processed
+    
+    def delete_source(self, source: str):
+        """source 메타데이터가 일치하는 청크 삭제"""
+        parsed = self.parse_filename(source)
+        tag = f"{parsed[0]}_{parsed[1]}" if parsed else None
+        self.get_vectorstore(tag)._collection.delete(where={"source": source})
+        self.bm25.remove_where(lambda metadata: metadata.get("source") == source)
+        self.bm25.save()
+        logger.info(f"Deleted chunks from source: {source}")
+    
+    def reset_index(self):
+        """컬렉션을 삭제하고 새로 생성 (파티션 모드면 모든 파티션 삭제)"""
+        self.bm25.clear()
+        self.bm25.save()
+        if self.partitioned:
+            for tag in self.list_partitions():
+                self.rebuild_partition(tag)
+            return
+        self.vectorstore.delete_collection()
+        self.vectorstore = self._create_vectorstore()
+        logger.info(f"Vector collection '{self.collection_name}' reset")
+    
+    @property
+    def numpy_store(self) -> NumpyVectorStore:
+        """NumPy 검색 스냅샷 (필요할 때 로드)"""
+        if self._numpy_store is None:
+            self._numpy_store = NumpyVectorStore(settings.NUMPY_INDEX_PATH)
+        return self._numpy_store
+    
+    def export_numpy_index(self, batch_size: int = 1000) -> int:
+        """Chroma에 저장된 벡터로 NumPy 검색 스냅샷 생성"""
+        ids, embeddings, documents, metadatas = [], [], [], []
+        for name in self.list_collections():
+            collection = self.client.get_collection(name)
+            offset = 0
+            while True:
+                batch = collection.get(
+                    include=["embeddings", "documents", "metadatas"],
+                    limit=batch_size,
+                    offset=offset
+                )
+                if not batch["ids"]:
+                    break
+                ids.extend(batch["ids"])
+                embeddings.extend(batch["embeddings"])
+                documents.extend(batch["documents"])
+                metadatas.extend(metadata or {} for metadata in batch["metadatas"])
+                offset += len(batch["ids"])
+        
+        self._numpy_store = NumpyVectorStore.build(settings.NUMPY_INDEX_PATH, ids, embeddings, documents, metadatas)
+        return len(ids)
+    
+    def rebuild_lexical_index(self, batch_size: int = 1000) -> int:
+        """Chroma에 저장된 청크로 BM25 색인 재구축 (기존 인덱스 마이그레이션용)"""
+        self.bm25.clear()
+        if self.partitioned:
+            stores = [self.get_partition(tag) for tag in self.list_partitions()]
+        else:
+            stores = [self.vectorstore]
+        
+        for store in stores:
+            offset = 0
+            while True:
+                batch = store._collection.get(
+                    include=["documents", "metadatas"],
+                    limit=batch_size,
+                    offset=offset
+                )
+                if not batch["ids"]:
+                    break
+                metadatas = [metadata or {} for metadata in batch["metadatas"]]
+                chunk_ids = [metadata.get("chunk_id", chunk_id) for chunk_id, metadata in zip(batch["ids"], metadatas)]
+                self.bm25.add(chunk_ids, batch["documents"], metadatas)
+                offset += len(batch["ids"])
+        
+        self.bm25.save()
+        logger.info(f"BM25 index rebuilt: {len(self.bm25)} chunks")
+        return len(self.bm25)
+    
+    def retrieve(
+        self,
+        translated_query: str,
+        country: Optional[str] = None,
+        doc_type: Optional[str] = None
+    ) -> List[Document]:
+        """영어 질문으로 문서 검색 (MMR)"""
+        k = settings.TOP_K_RESULTS
+        
+        if self.vector_backend == 'numpy':
+            # mmap 스냅샷에서 태그/국가 행 범위만 완전 탐색 + 벡터화된 MMR
+            store = self.numpy_store
+            store.reload_if_changed()
+            embedding = self.embedding_function.embed_query(translated_query)
+            rows = store.max_marginal_relevance_search(
+                embedding,
+                k=k,
+                fetch_k=max(20, k * 4),
+                tag=f"{country}_{doc_type}" if country and doc_type else None,
+                country=country
+            )
+            docs = []
+            for row in rows:
+                _, text, metadata = store.get(row)
+                docs.append(Document(page_content=text, metadata=metadata))
+            return docs
+        
+        if not self.partitioned:
+            # 전역 컬렉션 + 메타데이터 필터
+            search_kwargs = {"k": k}
+            if country and doc_type:
+                search_kwargs["filter"] = {"tag": f"{country}_{doc_type}"}
+            elif country:
+                search_kwargs["filter"] = {"country": country}
+            
+            retriever = self.vectorstore.as_retriever(
+                search_type="mmr",
+                search_kwargs=search_kwargs
+            )
+            return retriever.invoke(translated_query)
+        
+        # 국가 + 문서 타입: 해당 파티션 하나만 검색 (필터 없음)
+        if country and doc_type:
+            return self.get_partition(f"{country}_{doc_type}").max_marginal_relevance_search(translated_query, k=k)
+        
+        # 국가만 지정 (또는 미지정): 파티션별 후보를 모아서 전역 컬렉션과 같은 MMR 적용
+        tags = self.list_partitions(country)
+        if not tags:
+            return []
+        
+        embedding = self.embedding_function.embed_query(translated_query)
+        fetch_k = max(20, k * 4)
+        texts, metadatas, vectors = [], [], []
+        for tag in tags:
+            collection = self.get_partition(tag)._collection
+            n_results = min(fetch_k, collection.count())
+            if n_results == 0:
+                continue
+            result = collection.query(
+                query_embeddings=[embedding],
+                n_results=n_results,
+                include=["documents", "metadatas", "embeddings"]
+            )
+            texts.extend(result["documents"][0])
+            metadatas.extend(result["metadatas"][0])
+            vectors.extend(result["embeddings"][0])
+        if not texts:
+            return []
+        
+        candidates = np.asarray(vectors, dtype=np.float32)
+        candidates /= np.maximum(np.linalg.norm(candidates, axis=1, keepdims=True), 1e-12)
+        query = np.asarray(embedding, dtype=np.float32)
+        query /= max(float(np.linalg.norm(query)), 1e-12)
+        selected = maximal_marginal_relevance(candidates @ query, candidates, k)
+        return [Document(page_content=texts[i], metadata=metadatas[i]) for i in selected]
+    
+    def retrieve_lexical(
+        self,
+        translated_query: str,
+        country: Optional[str] = None,
+        doc_type: Optional[str] = None
+    ) -> List[Document]:
+        """영어 질문으로 BM25 검색"""
+        self.bm25.reload_if_changed()
+        
+        metadata_filter = None
+        if country and doc_type:
+            metadata_filter = {"tag": f"{country}_{doc_type}"}
+        elif country:
+            metadata_filter = {"country": country}
+        
+        hits = self.bm25.search(translated_query, k=settings.TOP_K_RESULTS, metadata_filter=metadata_filter)
+        return [Document(page_content=doc["text"], metadata=doc["metadata"]) for _, _, doc in hits]
     
     def search_with_translation(
         self,
@@ -124,46 +519,145 @@ class RAG:
     ) -> Tuple[str, List[Dict[str, Any]]]:
         """한국어 질문을 영어로 번역하여 검색"""
         
-        # 태그 구성
-        tag = f"{country}_{doc_type}" if country and doc_type else country
+        timings = {}
+        started = time.perf_counter()
         
         # 한국어 질문을 영어로 번역
-        translated_query = self.ko_to_en.translate(query)
+        translated_query = self.translator.translate(query, source='ko', target='en')
         logger.info(f"Translated query: {translated_query}")
+        timings["translate"] = (time.perf_counter() - started) * 1000
         
-        # 검색 실행 (MMR 사용)
-        search_kwargs = {"k": settings.TOP_K_RESULTS}
-        if tag:
-            search_kwargs["filter"] = {"tag": tag}
+        # 벡터 검색
+        stage_started = time.perf_counter()
+        docs = self.retrieve(translated_query, country=country, doc_type=doc_type)
+        timings["dense"] = (time.perf_counter() - stage_started) * 1000
+        
+        # BM25 검색 후 RRF로 결합
+        if self.hybrid_search:
+            stage_started = time.perf_counter()
+            lexical_docs = self.retrieve_lexical(translated_query, country=country, doc_type=doc_type)
+            timings["lexical"] = (time.perf_counter() - stage_started) * 1000
             
-        retriever = self.vectorstore.as_retriever(
-            search_type="mmr",
-            search_kwargs=search_kwargs
-        )
+            stage_started = time.perf_counter()
+            docs = reciprocal_rank_fusion(
+                [docs, lexical_docs],
+                k=getattr(settings, 'RRF_K', 60)
+            )[:settings.TOP_K_RESULTS]
+            timings["fuse"] = (time.perf_counter() - stage_started) * 1000
         
-        # 문서 검색
-        docs = retriever.invoke(translated_query)
+        timings["total"] = (time.perf_counter() - started) * 1000
+        self.last_search_timings = timings
+        metrics = get_metrics()
+        for name, ms in timings.items():
+            if name != "total":
+                metrics.observe_stage("translate_query" if name == "translate" else f"retrieval_{name}", ms / 1000)
+        logger.info("Retrieval timings: " + ", ".join(f"{name}={ms:.1f}ms" for name, ms in timings.items()))
         
         if not docs:
             return "관련 문서를 찾지 못했습니다.", []
         
-        # 컨텍스트와 참조 구성
-        context_parts = []
-        references = []
+        # 토큰 예산 안에서 컨텍스트 구성 (인접 청크 병합)
+        context, selected, tokens_used = self.assemble_context(docs)
+        self.last_context_stats = {
+            "tokens": tokens_used,
+            "budget": self.max_context_tokens,
+            "candidates": len(docs),
+            "selected": len(selected)
+        }
+        logger.info(
+            f"Context assembled: {tokens_used}/{self.max_context_tokens} tokens, "
+            f"{len(selected)}/{len(docs)} chunks"
+        )
         
-        for i, doc in enumerate(docs[:3]):  # 최대 3개 문서
-            context_parts.append(doc.page_content)
+        # 참조 구성 (중복 제거)
+        references = []
+        for doc in selected:
             metadata = doc.metadata
-            references.append({
+            reference = {
                 "title": metadata.get("document_type", "Unknown"),
                 "country": metadata.get("country", "Unknown"),
                 "tag": metadata.get("tag", ""),
                 "updated_at": metadata.get("updated_at", "")
-            })
+            }
+            if reference not in references:
+                references.append(reference)
         
-        context = "\n\n---\n\n".join(context_parts)
         return context, references
     
+    CONTEXT_SEPARATOR = "\n\n---\n\n"
+    
+    @staticmethod
+    def _merge_overlap(first: str, second: str, max_overlap: int) -> str:
+        """인접 청크 병합 (CHUNK_OVERLAP으로 겹친 부분은 한 번만 포함)"""
+        limit = min(len(first), len(second), max_overlap)
+        for size in range(limit, 0, -1):
+            if first.endswith(second[:size]):
+                return first + second[size:]
+        return f"{first}\n{second}"
+    
+    def _render_group(self, chunks: List[Tuple[int, str]]) -> str:
+        """같은 source의 청크들을 chunk_index 순서로 이어 붙임"""
+        chunks = sorted(chunks)
+        text = chunks[0][1]
+        for (prev_index, _), (index, chunk_text) in zip(chunks, chunks[1:]):
+            if index == prev_index + 1:
+                text = self._merge_overlap(text, chunk_text, settings.CHUNK_OVERLAP)
+            else:
+                text = f"{text}{self.CONTEXT_SEPARATOR}{chunk_text}"
+        return text
+    
+    def count_tokens(self, text: str) -> int:
+        """토큰 수 (cl100k_base)"""
+        return len(self.tokenizer.encode(text))
+    
+    def assemble_context(self, docs: List[Document]) -> Tuple[str, List[Document], int]:
+        """관련도 순서대로 MAX_CONTEXT_TOKENS 안에 들어가는 만큼 청크 선택
+
+        같은 source의 인접 청크는 겹친 부분을 제거하고 합치므로, 추가 비용은
+        병합 후 늘어나는 토큰 수만 계산합니다.
+
+        Returns:
+            (컨텍스트, 선택된 문서, 사용한 토큰 수)
+        """
+        budget = self.max_context_tokens
+        groups: Dict[str, List[Tuple[int, str]]] = {}  # source -> [(chunk_index, text)]
+        group_tokens: Dict[str, int] = {}
+        group_order: List[str] = []  # 관련도가 가장 높은 청크 기준 순서
+        separator_tokens = self.count_tokens(self.CONTEXT_SEPARATOR)
+        selected = []
+        used = 0
+        
+        for position, doc in enumerate(docs):
+            metadata = doc.metadata
+            chunk_index = metadata.get("chunk_index")
+            # 위치 정보가 없는 청크는 단독 그룹
+            key = metadata.get("source") if chunk_index is not None and metadata.get("source") else f"#{position}"
+            chunk = (chunk_index if chunk_index is not None else 0, doc.page_content)
+            
+            if key in groups:
+                if chunk in groups[key]:
+                    continue
+                candidate_tokens = self.count_tokens(self._render_group(groups[key] + [chunk]))
+                cost = candidate_tokens - group_tokens[key]
+            else:
+                candidate_tokens = self.count_tokens(doc.page_content)
+                cost = candidate_tokens + (separator_tokens if group_order else 0)
+            
+            # 예산을 넘으면 건너뛰고 더 작은 다음 청크 시도
+            if used + cost > budget:
+                continue
+            
+            if key not in groups:
+                groups[key] = []
+                group_order.append(key)
+            groups[key].append(chunk)
+            group_tokens[key] = candidate_tokens
+            selected.append(doc)
+            used += cost
+        
+        context = self.CONTEXT_SEPARATOR.join(self._render_group(groups[key]) for key in group_order)
+        return context, selected, self.count_tokens(context)
+    
     def add_document(self, text: str, metadata: Dict[str, Any]) -> bool:
         """단일 문서 추가"""
         try:
@@ -172,12 +666,14 @@ class RAG:
             texts = splits
             
             # 각 청크에 메타데이터 추가
+            source = metadata.get("source") or uuid.uuid4().hex
             metadatas = []
             for i in range(len(splits)):
                 chunk_metadata = {
                     **metadata,
                     "chunk_index": i,
-                    "total_chunks": len(splits)
+                    "total_chunks": len(splits),
+                    "chunk_id": self.chunk_id(source, i)
                 }
                 metadatas.append(chunk_metadata)
             
@@ -191,8 +687,15 @@ class RAG:
                 batch_metadatas = metadatas[i:end_idx]
                 
                 # 벡터 스토어에 배치 추가
-                self.vectorstore.add_texts(texts=batch_texts, metadatas=batch_metadatas)
-                
+                batch_ids = [chunk_metadata["chunk_id"] for chunk_metadata in batch_metadatas]
+                self.get_vectorstore(metadata.get("tag")).add_texts(
+                    texts=batch_texts,
+                    metadatas=batch_metadatas,
+                    ids=batch_ids
+                )
+                self.bm25.add(batch_ids, batch_texts, batch_metadatas)
+            
+            self.bm25.save()
             return True
             
         except Exception as e:
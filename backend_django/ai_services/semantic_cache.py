@@ -0,0 +1,196 @@
+import logging
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ai_services.index_manifest import IndexManifest
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_question(text: str) -> str:
+    """질문 정규화 (공백, 대소문자, 끝 문장부호)"""
+    text = re.sub(r"\s+", " ", (text or "").strip().lower())
+    return text.rstrip("?!.。？！ ")
+
+
+@dataclass
+class CachedAnswer:
+    """캐시된 답변"""
+    question: str
+    answer: str
+    references: List[Dict[str, Any]]
+    created_at: float
+    similarity: float = 0.0
+
+
+@dataclass
+class _Scope:
+    """(국가, 토픽, 모델) 단위 캐시 영역"""
+    entries: List[CachedAnswer] = field(default_factory=list)
+    vectors: Optional[np.ndarray] = None
+
+
+class SemanticAnswerCache:
+    """의미 기반 답변 캐시
+
+    정규화된 질문의 임베딩을 (국가, 토픽, 모델) 범위 안에서 비교해서 유사도가
+    threshold 이상이면 이전 답변을 그대로 반환합니다. 벡터 인덱스가 다시
+    만들어지면 (manifest 버전 변경) 전체 캐시를 비웁니다.
+    """
+
+    def __init__(
+        self,
+        embed_query: Callable[[str], List[float]],
+        threshold: float = 0.95,
+        ttl_seconds: int = 86400,
+        max_entries_per_scope: int = 1000,
+        manifest_path: Optional[str] = None
+    ):
+        self.embed_query = embed_query
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries_per_scope = max_entries_per_scope
+        self.manifest_path = manifest_path
+
+        self._scopes: Dict[Tuple[str, str, str], _Scope] = {}
+        self._lock = threading.Lock()
+        self._manifest_mtime = None
+        self._index_version = None
+
+        # 통계
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _scope_key(country: Optional[str], topic: Optional[str], model: Optional[str]) -> Tuple[str, str, str]:
+        return (country or "", topic or "", model or "")
+
+    def _embed(self, question: str) -> np.ndarray:
+        vector = np.asarray(self.embed_query(normalize_question(question)), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _check_index_version(self):
+        """벡터 인덱스가 바뀌었으면 캐시 비우기"""
+        if not self.manifest_path:
+            return
+        try:
+            mtime = os.stat(self.manifest_path).st_mtime
+        except OSError:
+            return
+        if mtime == self._manifest_mtime:
+            return
+
+        version = IndexManifest(self.manifest_path).version
+        if self._index_version is not None and version != self._index_version:
+            logger.info("Vector index changed, clearing semantic answer cache")
+            self.invalidate()
+        self._manifest_mtime = mtime
+        self._index_version = version
+
+    def _evict_expired(self, scope: _Scope):
+        """TTL이 지난 항목 제거 (락 안에서 호출)"""
+        now = time.time()
+        keep = [i for i, entry in enumerate(scope.entries) if now - entry.created_at < self.ttl_seconds]
+        if len(keep) == len(scope.entries):
+            return
+        scope.entries = [scope.entries[i] for i in keep]
+        scope.vectors = scope.vectors[keep] if keep else None
+
+    def lookup(
+        self,
+        question: str,
+        country: Optional[str],
+        topic: Optional[str],
+        model: Optional[str]
+    ) -> Tuple[Optional[CachedAnswer], np.ndarray]:
+        """유사한 질문의 답변 조회
+
+        Returns:
+            (캐시된 답변 또는 None, 질문 임베딩) - 임베딩은 store()에 다시 전달
+        """
+        self._check_index_version()
+        vector = self._embed(question)
+        key = self._scope_key(country, topic, model)
+
+        with self._lock:
+            scope = self._scopes.get(key)
+            if scope is not None:
+                self._evict_expired(scope)
+            if scope is None or scope.vectors is None:
+                self.misses += 1
+                return None, vector
+
+            similarities = scope.vectors @ vector
+            best = int(np.argmax(similarities))
+            similarity = float(similarities[best])
+            if similarity < self.threshold:
+                self.misses += 1
+                return None, vector
+
+            self.hits += 1
+            entry = scope.entries[best]
+
+        logger.info(f"Semantic cache hit (similarity={similarity:.3f}): '{entry.question[:50]}'")
+        return CachedAnswer(
+            question=entry.question,
+            answer=entry.answer,
+            references=entry.references,
+            created_at=entry.created_at,
+            similarity=similarity
+        ), vector
+
+    def store(
+        self,
+        question: str,
+        country: Optional[str],
+        topic: Optional[str],
+        model: Optional[str],
+        answer: str,
+        references: List[Dict[str, Any]],
+        vector: Optional[np.ndarray] = None
+    ):
+        """답변 저장"""
+        if vector is None:
+            vector = self._embed(question)
+        key = self._scope_key(country, topic, model)
+        entry = CachedAnswer(
+            question=normalize_question(question),
+            answer=answer,
+            references=references or [],
+            created_at=time.time()
+        )
+
+        with self._lock:
+            scope = self._scopes.setdefault(key, _Scope())
+            scope.entries.append(entry)
+            row = vector.reshape(1, -1)
+            scope.vectors = row if scope.vectors is None else np.vstack([scope.vectors, row])
+
+            # 오래된 항목부터 제거
+            overflow = len(scope.entries) - self.max_entries_per_scope
+            if overflow > 0:
+                scope.entries = scope.entries[overflow:]
+                scope.vectors = scope.vectors[overflow:]
+
+    def invalidate(self, country: Optional[str] = None, topic: Optional[str] = None):
+        """캐시 비우기 (국가/토픽을 지정하면 해당 범위만)"""
+        with self._lock:
+            if country is None and topic is None:
+                self._scopes.clear()
+                return
+            for key in list(self._scopes):
+                if (country is None or key[0] == country) and (topic is None or key[1] == topic):
+                    del self._scopes[key]
+
+    def stats(self) -> dict:
+        """캐시 통계"""
+        with self._lock:
+            size = sum(len(scope.entries) for scope in self._scopes.values())
+        return {"hits": self.hits, "misses": self.misses, "size": size, "scopes": len(self._scopes)}
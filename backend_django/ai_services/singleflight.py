@@ -0,0 +1,137 @@
+import asyncio
+import hashlib
+import json
+import logging
+import weakref
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def history_fingerprint(history: Optional[List[Dict[str, str]]]) -> str:
+    """LLM에 보내는 히스토리(요약 포함)가 같은지 비교하기 위한 해시"""
+    if not history:
+        return ""
+    encoded = json.dumps(
+        [(message.get("role"), message.get("content")) for message in history],
+        ensure_ascii=False
+    )
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class _Broadcast:
+    """스트림 하나를 여러 구독자에게 전달 (늦게 온 구독자는 이미 나온 조각부터 다시 받음)
+
+    모든 구독자가 떠나면 원본 스트림도 취소합니다.
+    """
+
+    def __init__(self, source: AsyncIterator[Any], on_done: Callable[[], None]):
+        self.items: List[Any] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self._updated = asyncio.Event()
+        self._on_done = on_done
+        self._task = asyncio.ensure_future(self._pump(source))
+
+    async def _pump(self, source: AsyncIterator[Any]):
+        try:
+            async for item in source:
+                self.items.append(item)
+                self._notify()
+        except asyncio.CancelledError:
+            self.error = ConnectionAbortedError("shared stream cancelled")
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+            self._on_done()
+            self._notify()
+            if hasattr(source, "aclose"):
+                await source.aclose()
+
+    def _notify(self):
+        updated, self._updated = self._updated, asyncio.Event()
+        updated.set()
+
+    async def subscribe(self) -> AsyncIterator[Any]:
+        self.subscribers += 1
+        index = 0
+        try:
+            while True:
+                while index < len(self.items):
+                    yield self.items[index]
+                    index += 1
+                if self.done:
+                    if self.error is not None:
+                        raise self.error
+                    return
+                await self._updated.wait()
+        finally:
+            self.subscribers -= 1
+            if not self.subscribers and not self.done:
+                # 새 요청이 취소 중인 스트림에 붙지 않도록 먼저 목록에서 제거
+                self._on_done()
+                self._task.cancel()
+
+
+class SingleFlight:
+    """같은 키로 동시에 들어온 요청을 하나의 계산으로 합침 (진행 중인 동안만, 결과는 저장하지 않음)
+
+    계산은 요청한 쪽과 분리된 작업으로 실행되므로 한 호출자가 취소되어도 다른 호출자는 결과를 받습니다.
+    asyncio 객체는 이벤트 루프에 묶이므로 진행 중인 계산은 루프별로 관리합니다.
+    """
+
+    def __init__(self):
+        self._calls: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Hashable, Any]]" = weakref.WeakKeyDictionary()
+        self.leaders = 0
+        self.followers = 0
+
+    def _in_flight(self) -> Dict[Hashable, Any]:
+        return self._calls.setdefault(asyncio.get_running_loop(), {})
+
+    def _forget(self, calls: Dict[Hashable, Any], key: Hashable, value: Any):
+        if calls.get(key) is value:
+            del calls[key]
+
+    async def do(self, key: Optional[Hashable], fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """(결과, 다른 요청의 계산을 공유했는지) - key가 None이면 합치지 않고 바로 실행"""
+        if key is None:
+            return await fn(), False
+        calls = self._in_flight()
+        task = calls.get(key)
+        shared = task is not None
+        if shared:
+            self.followers += 1
+        else:
+            self.leaders += 1
+            task = asyncio.ensure_future(fn())
+            calls[key] = task
+            task.add_done_callback(lambda done: self._forget(calls, key, done))
+        return await asyncio.shield(task), shared
+
+    def stream(self, key: Optional[Hashable], factory: Callable[[], AsyncIterator[Any]]) -> Tuple[AsyncIterator[Any], bool]:
+        """(구독 스트림, 다른 요청의 스트림을 공유했는지) - key가 None이면 원본 스트림 그대로"""
+        if key is None:
+            return factory(), False
+        calls = self._in_flight()
+        broadcast = calls.get(key)
+        shared = broadcast is not None
+        if shared:
+            self.followers += 1
+        else:
+            self.leaders += 1
+            holder: Dict[str, _Broadcast] = {}
+            broadcast = holder["broadcast"] = _Broadcast(
+                factory(),
+                on_done=lambda: self._forget(calls, key, holder["broadcast"])
+            )
+            calls[key] = broadcast
+        return broadcast.subscribe(), shared
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": sum(len(calls) for calls in self._calls.values()),
+            "leaders": self.leaders,
+            "followers": self.followers
+        }
@@ -0,0 +1,168 @@
+import asyncio
+import logging
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from deep_translator import GoogleTranslator
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+HANGUL_PATTERN = re.compile(r"[가-힣ᄀ-ᇿ㄰-㆏]")
+
+
+def has_hangul(text: str) -> bool:
+    """한글 포함 여부"""
+    return bool(HANGUL_PATTERN.search(text or ""))
+
+
+def is_korean(text: str, min_ratio: float = 0.5) -> bool:
+    """문자(글자) 중 한글 비율이 min_ratio 이상인지 (영어 답변 속 한글 고유명사 등은 제외)"""
+    letters = [char for char in text or "" if char.isalpha()]
+    if not letters:
+        return False
+    hangul = sum(1 for char in letters if HANGUL_PATTERN.match(char))
+    return hangul / len(letters) >= min_ratio
+
+
+class TranslationService:
+    """RAG와 LLM이 함께 사용하는 번역 서비스
+
+    - 메모리 LRU 캐시 + 선택적 SQLite 디스크 캐시
+    - 한국어 → 영어 번역 시 한글이 없으면 번역 생략
+    """
+
+    def __init__(self, max_entries: int = 2048, cache_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[Tuple[str, str, str], str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._translators: Dict[Tuple[str, str], GoogleTranslator] = {}
+
+        # 통계
+        self.hits = 0
+        self.misses = 0
+        self.skipped = 0
+
+        # 디스크 캐시 (선택)
+        self._conn = None
+        if cache_path:
+            cache_path = os.path.abspath(cache_path)
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            self._conn = sqlite3.connect(cache_path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                "source TEXT NOT NULL, target TEXT NOT NULL, text TEXT NOT NULL, result TEXT NOT NULL, "
+                "PRIMARY KEY (source, target, text))"
+            )
+            self._conn.commit()
+            logger.info(f"Translation disk cache path: {cache_path}")
+
+    def _get_translator(self, source: str, target: str) -> GoogleTranslator:
+        key = (source, target)
+        if key not in self._translators:
+            self._translators[key] = GoogleTranslator(source=source, target=target)
+        return self._translators[key]
+
+    def _lookup(self, key: Tuple[str, str, str]) -> Optional[str]:
+        """메모리 → 디스크 순서로 캐시 조회"""
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+
+            if self._conn is None:
+                return None
+            row = self._conn.execute(
+                "SELECT result FROM translations WHERE source = ? AND target = ? AND text = ?",
+                key
+            ).fetchone()
+
+        if row is None:
+            return None
+        self._remember(key, row[0], persist=False)
+        return row[0]
+
+    def _remember(self, key: Tuple[str, str, str], result: str, persist: bool = True):
+        """캐시에 번역 결과 저장"""
+        with self._lock:
+            self._cache[key] = result
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+            if persist and self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO translations (source, target, text, result) VALUES (?, ?, ?, ?)",
+                    (*key, result)
+                )
+                self._conn.commit()
+
+    def translate(self, text: str, source: str = "ko", target: str = "en") -> str:
+        """텍스트 번역 (캐시 사용, 실패 시 원문 반환)"""
+        text = (text or "").strip()
+        if not text:
+            return text
+
+        # 한국어 → 다른 언어 번역인데 한글이 없으면 번역할 필요 없음
+        if source == "ko" and not has_hangul(text):
+            self.skipped += 1
+            return text
+
+        key = (source, target, text)
+        cached = self._lookup(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        try:
+            result = self._get_translator(source, target).translate(text)
+        except Exception as e:
+            logger.error(f"Translation failed ({source}->{target}): {e}")
+            return text
+
+        if not result:
+            return text
+        self._remember(key, result)
+        return result
+
+    async def atranslate(self, text: str, source: str = "ko", target: str = "en") -> str:
+        """비동기 번역 (네트워크 호출은 스레드에서 실행)"""
+        text = (text or "").strip()
+        if source == "ko" and not has_hangul(text):
+            self.skipped += 1
+            return text
+
+        cached = self._lookup((source, target, text))
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        return await asyncio.to_thread(self.translate, text, source, target)
+
+    def stats(self) -> dict:
+        """캐시 통계"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "skipped": self.skipped,
+            "size": len(self._cache)
+        }
+
+
+# 프로세스 전체에서 공유하는 인스턴스
+_translation_service = None
+
+
+def get_translation_service() -> TranslationService:
+    global _translation_service
+    if _translation_service is None:
+        _translation_service = TranslationService(
+            max_entries=getattr(settings, 'TRANSLATION_CACHE_SIZE', 2048),
+            cache_path=getattr(settings, 'TRANSLATION_CACHE_PATH', None)
+        )
+    return _translation_service
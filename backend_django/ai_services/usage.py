@@ -0,0 +1,47 @@
+import threading
+from typing import Any, Dict, Tuple
+
+from ai_services.metrics import get_metrics
+
+
+class TokenUsage:
+    """(공급자, 단계)별 토큰 사용량 (공급자가 usage를 돌려주는 호출만 기록)
+
+    단계: answer(답변 생성), translation(영어 답변 번역), summary(대화 요약)
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._usage: Dict[Tuple[str, str], Dict[str, int]] = {}
+
+    def record(self, provider: str, stage: str, prompt_tokens: int, completion_tokens: int):
+        get_metrics().record_tokens(provider, stage, prompt_tokens, completion_tokens)
+        with self._lock:
+            usage = self._usage.setdefault(
+                (provider, stage),
+                {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0}
+            )
+            usage["calls"] += 1
+            usage["prompt_tokens"] += prompt_tokens or 0
+            usage["completion_tokens"] += completion_tokens or 0
+
+    def record_response(self, provider: str, stage: str, response: Any):
+        """OpenAI 응답의 usage 기록 (usage가 없으면 무시)"""
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            self.record(provider, stage, usage.prompt_tokens, usage.completion_tokens)
+
+    def totals(self) -> Dict[str, int]:
+        """전체 합계"""
+        with self._lock:
+            return {
+                key: sum(usage[key] for usage in self._usage.values())
+                for key in ("calls", "prompt_tokens", "completion_tokens")
+            }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                f"{provider}.{stage}": dict(usage)
+                for (provider, stage), usage in self._usage.items()
+            }
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ChatConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'chat'
+
+    def ready(self):
+        # 메시지 생성/삭제 시 대화 히스토리 캐시 갱신
+        from chat import signals  # noqa: F401
@@ -0,0 +1,349 @@
+import asyncio
+import bisect
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+
+from core.models import Message
+
+logger = logging.getLogger(__name__)
+
+# 대화별 메시지 목록에 저장하는 필드
+MESSAGE_FIELDS = ('id', 'role', 'content', 'references', 'created_at')
+
+
+def slice_page(messages, limit, before=None, after=None):
+    """id 순 메시지 목록에서 한 페이지 → (시간순 메시지, 페이지 방향으로 더 있는지)
+
+    after가 있으면 after 다음부터 오래된 순으로, 아니면 before 이전(없으면 마지막)부터 최신 limit개.
+    """
+    if after is not None:
+        start = bisect.bisect_right(messages, after, key=lambda message: message['id'])
+        return messages[start:start + limit], len(messages) - start > limit
+    end = len(messages) if before is None else bisect.bisect_left(messages, before, key=lambda message: message['id'])
+    return messages[max(end - limit, 0):end], end > limit
+
+
+def message_entry(message):
+    """Message 인스턴스 → 캐시 항목"""
+    return {field: getattr(message, field) for field in MESSAGE_FIELDS}
+
+
+# 캐시에 없는 대화에 추가/무효화가 있었던 시각을 기억하는 시간(초)
+# 그 사이 DB에서 읽기 시작한 목록은 해당 메시지가 빠졌을 수 있으므로 캐시에 저장하지 않음
+MISSED_WINDOW = 60
+
+
+class LocalHistoryBackend:
+    """프로세스 메모리 백엔드 (LRU, 대화 수 제한)
+
+    대화의 요청이 한 프로세스로만 들어오는 배포(워커 1개)에서 사용합니다.
+    워커가 여러 개면 다른 워커가 추가한 메시지를 모르므로 공유 백엔드를 사용해야 합니다.
+    """
+
+    def __init__(self, max_conversations=1000, ttl_seconds=1800):
+        self.max_conversations = max_conversations
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # 대화 id → (저장 시각, 메시지 목록)
+        self._missed = OrderedDict()  # 대화 id → 캐시에 반영하지 못한 변경 시각
+
+    @staticmethod
+    def now():
+        return time.monotonic()
+
+    def _get_locked(self, conversation_id):
+        entry = self._entries.get(conversation_id)
+        if entry is None:
+            return None
+        stored_at, messages = entry
+        if time.monotonic() - stored_at > self.ttl_seconds:
+            del self._entries[conversation_id]
+            return None
+        self._entries.move_to_end(conversation_id)
+        return messages
+
+    def _mark_missed_locked(self, conversation_id):
+        now = time.monotonic()
+        self._missed[conversation_id] = now
+        self._missed.move_to_end(conversation_id)
+        while self._missed and now - next(iter(self._missed.values())) > MISSED_WINDOW:
+            self._missed.popitem(last=False)
+
+    def get(self, conversation_id):
+        with self._lock:
+            messages = self._get_locked(conversation_id)
+            # 호출한 쪽이 받은 목록은 이후 추가되는 메시지에 영향받지 않도록 복사
+            return list(messages) if messages is not None else None
+
+    def fill(self, conversation_id, messages, started=None):
+        """DB에서 읽은 목록 저장 (이미 있거나, 읽기 시작한 뒤 반영하지 못한 변경이 있으면 저장하지 않음)"""
+        with self._lock:
+            if self._get_locked(conversation_id) is not None:
+                return
+            missed = self._missed.get(conversation_id)
+            if started is not None and missed is not None and missed >= started:
+                return
+            self._entries[conversation_id] = (time.monotonic(), list(messages))
+            while len(self._entries) > self.max_conversations:
+                self._entries.popitem(last=False)
+
+    def append(self, conversation_id, message):
+        """캐시된 대화에만 추가 (없으면 다음 조회 때 DB에서 읽음)"""
+        with self._lock:
+            messages = self._get_locked(conversation_id)
+            if messages is None:
+                self._mark_missed_locked(conversation_id)
+                return
+            if messages and messages[-1]['id'] >= message['id']:
+                if not any(cached['id'] == message['id'] for cached in messages):
+                    # 순서가 어긋나면 다음 조회 때 DB에서 다시 읽음
+                    del self._entries[conversation_id]
+                    self._mark_missed_locked(conversation_id)
+                return
+            messages.append(message)
+
+    def delete(self, conversation_id):
+        with self._lock:
+            self._entries.pop(conversation_id, None)
+            self._mark_missed_locked(conversation_id)
+
+    async def aget(self, conversation_id):
+        return self.get(conversation_id)
+
+    async def afill(self, conversation_id, messages, started=None):
+        self.fill(conversation_id, messages, started)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'conversations': len(self._entries),
+                'messages': sum(len(messages) for _, messages in self._entries.values())
+            }
+
+
+class DjangoCacheHistoryBackend:
+    """Django 캐시 백엔드 (settings.CACHES의 별칭, 예: Redis) - 워커 간 공유
+
+    추가는 읽고-쓰기이므로 대화별 잠금 키(cache.add)를 잡고 실행합니다.
+    잠금을 잡지 못하면 항목을 지워서 다음 조회 때 DB에서 다시 읽게 합니다.
+    """
+
+    # 잠금 유지 최대 시간(초, 잠금을 잡은 워커가 죽은 경우 대비), 잠금 대기 횟수/간격(초)
+    LOCK_TIMEOUT = 5
+    LOCK_ATTEMPTS = 50
+    LOCK_INTERVAL = 0.01
+
+    def __init__(self, alias='default', ttl_seconds=1800):
+        self.cache = caches[alias]
+        self.ttl_seconds = ttl_seconds
+
+    @staticmethod
+    def now():
+        # 워커 간 비교하므로 벽시계 시각 사용
+        return time.time()
+
+    @staticmethod
+    def _key(conversation_id):
+        return f"chat_history:{conversation_id}"
+
+    @contextmanager
+    def _locked(self, conversation_id):
+        """대화별 잠금 (잡았는지 여부를 돌려줌)"""
+        lock_key = f"chat_history_lock:{conversation_id}"
+        acquired = False
+        for _ in range(self.LOCK_ATTEMPTS):
+            if self.cache.add(lock_key, 1, self.LOCK_TIMEOUT):
+                acquired = True
+                break
+            time.sleep(self.LOCK_INTERVAL)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                self.cache.delete(lock_key)
+
+    def _mark_missed(self, conversation_id):
+        self.cache.set(f"chat_history_missed:{conversation_id}", time.time(), MISSED_WINDOW)
+
+    def get(self, conversation_id):
+        return self.cache.get(self._key(conversation_id))
+
+    def fill(self, conversation_id, messages, started=None):
+        with self._locked(conversation_id) as acquired:
+            if not acquired:
+                return
+            missed = self.cache.get(f"chat_history_missed:{conversation_id}")
+            if started is not None and missed is not None and missed >= started:
+                return
+            self.cache.add(self._key(conversation_id), list(messages), self.ttl_seconds)
+
+    def append(self, conversation_id, message):
+        key = self._key(conversation_id)
+        with self._locked(conversation_id) as acquired:
+            if not acquired:
+                self.cache.delete(key)
+                self._mark_missed(conversation_id)
+                return
+            messages = self.cache.get(key)
+            if messages is None:
+                self._mark_missed(conversation_id)
+                return
+            if messages and messages[-1]['id'] >= message['id']:
+                if not any(cached['id'] == message['id'] for cached in messages):
+                    self.cache.delete(key)
+                    self._mark_missed(conversation_id)
+                return
+            messages.append(message)
+            self.cache.set(key, messages, self.ttl_seconds)
+
+    def delete(self, conversation_id):
+        with self._locked(conversation_id):
+            # 잠금을 잡지 못해도 삭제 (잡고 있는 쪽이 다시 쓰더라도 missed 표시로 다음 채우기는 막힘)
+            self.cache.delete(self._key(conversation_id))
+            self._mark_missed(conversation_id)
+
+    async def aget(self, conversation_id):
+        return await self.cache.aget(self._key(conversation_id))
+
+    async def afill(self, conversation_id, messages, started=None):
+        await asyncio.to_thread(self.fill, conversation_id, messages, started)
+
+    def stats(self):
+        return {'backend': type(self.cache).__name__}
+
+
+class NullHistoryBackend:
+    """캐시하지 않음 (항상 DB에서 읽음) - 워커가 여러 개인데 공유 캐시가 없는 경우"""
+
+    now = staticmethod(time.monotonic)
+
+    def get(self, conversation_id):
+        return None
+
+    def fill(self, conversation_id, messages, started=None):
+        pass
+
+    def append(self, conversation_id, message):
+        pass
+
+    def delete(self, conversation_id):
+        pass
+
+    async def aget(self, conversation_id):
+        return None
+
+    async def afill(self, conversation_id, messages, started=None):
+        pass
+
+    def stats(self):
+        return {'backend': 'none'}
+
+
+class HistoryCache:
+    """대화별 메시지 목록 캐시 (추가만 하고, 삭제되면 무효화)
+
+    Message가 생성되면 커밋 후 캐시된 대화에 추가하고(chat/signals.py), 메시지나 대화가 삭제되면 항목을 지웁니다.
+    캐시가 채워진 대화는 채팅 턴과 대화 기록 조회에서 이전 메시지를 DB에서 읽지 않습니다.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    async def get_messages(self, conversation_id):
+        """대화의 메시지 목록 (저장 순서, 캐시에 없으면 DB에서 한 번 읽어서 채움)
+
+        반환된 목록과 항목은 캐시와 공유될 수 있으므로 수정하지 않습니다.
+        """
+        messages = await self.backend.aget(conversation_id)
+        if messages is not None:
+            self.hits += 1
+            return messages
+
+        self.misses += 1
+        started = self.backend.now()
+        # id는 저장 순서이고 기록 조회 페이지의 커서이므로 id 순으로 보관
+        messages = [
+            message
+            async for message in Message.objects.filter(conversation_id=conversation_id)
+            .order_by('id')
+            .values(*MESSAGE_FIELDS)
+        ]
+        await self.backend.afill(conversation_id, messages, started)
+        return messages
+
+    async def get_page(self, conversation_id, limit, before=None, after=None, fields=MESSAGE_FIELDS):
+        """대화 기록 한 페이지 → (시간순 메시지, 페이지 방향으로 더 있는지)
+
+        캐시된 대화는 캐시에서 자르고, 아니면 필요한 행과 필드만 DB에서 읽습니다 (전체를 읽어 캐시를 채우지 않음).
+        """
+        messages = await self.backend.aget(conversation_id)
+        if messages is not None:
+            self.hits += 1
+            page, has_more = slice_page(messages, limit, before, after)
+            return [{field: message[field] for field in fields} for message in page], has_more
+
+        # (conversation_id, id) 범위 조회 - FK 인덱스에 기본 키가 포함되므로 인덱스 순서대로 limit+1개만 읽음
+        queryset = Message.objects.filter(conversation_id=conversation_id)
+        if after is not None:
+            queryset = queryset.filter(id__gt=after).order_by('id')
+        else:
+            if before is not None:
+                queryset = queryset.filter(id__lt=before)
+            queryset = queryset.order_by('-id')
+        page = [message async for message in queryset.values(*fields)[:limit + 1]]
+        has_more = len(page) > limit
+        page = page[:limit]
+        if after is None:
+            page.reverse()
+        return page, has_more
+
+    def prime(self, conversation_id):
+        """새 대화 (메시지가 없으므로 DB를 읽지 않고 빈 목록으로 시작)"""
+        self.backend.delete(conversation_id)
+        self.backend.fill(conversation_id, [])
+
+    def append(self, message):
+        self.backend.append(message.conversation_id, message_entry(message))
+
+    def invalidate(self, conversation_id):
+        self.backend.delete(conversation_id)
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, **self.backend.stats()}
+
+
+_history_cache = None
+_history_cache_lock = threading.Lock()
+
+
+def get_history_cache():
+    """설정된 백엔드의 대화 히스토리 캐시 (CHAT_HISTORY_CACHE: 'local' 또는 CACHES 별칭)"""
+    global _history_cache
+    if _history_cache is None:
+        with _history_cache_lock:
+            if _history_cache is None:
+                backend_name = getattr(settings, 'CHAT_HISTORY_CACHE', 'local')
+                ttl_seconds = getattr(settings, 'CHAT_HISTORY_CACHE_TTL', 1800)
+                if backend_name == 'local' and getattr(settings, 'WEB_CONCURRENCY', 1) > 1:
+                    # 워커별 메모리 캐시는 다른 워커가 추가한 메시지를 모르므로 사용하지 않음
+                    logger.warning("CHAT_HISTORY_CACHE is 'local' with multiple workers; reading history from the database")
+                    backend_name = 'none'
+                    backend = NullHistoryBackend()
+                elif backend_name == 'local':
+                    backend = LocalHistoryBackend(
+                        max_conversations=getattr(settings, 'CHAT_HISTORY_CACHE_SIZE', 1000),
+                        ttl_seconds=ttl_seconds
+                    )
+                else:
+                    backend = DjangoCacheHistoryBackend(alias=backend_name, ttl_seconds=ttl_seconds)
+                logger.info(f"Chat history cache backend: {backend_name}")
+                _history_cache = HistoryCache(backend)
+    return _history_cache
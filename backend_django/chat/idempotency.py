@@ -0,0 +1,144 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from core.models import IdempotencyRecord
+
+logger = logging.getLogger(__name__)
+
+# 처리 중인 원 요청을 다른 프로세스에서 기다릴 때 DB 확인 간격(초)
+POLL_INTERVAL = 0.5
+
+# 만료된 키 정리 간격(초, 프로세스별)
+PURGE_INTERVAL = 600
+
+# 같은 프로세스에서 처리 중인 요청 (키 → 응답 Future, 원 요청이 실패하면 None)
+_in_flight = {}
+_last_purge = 0.0
+
+
+class IdempotencyConflict(Exception):
+    """같은 키로 내용이 다른 요청을 보냄"""
+
+
+class IdempotencyInProgress(Exception):
+    """원 요청이 아직 처리 중 (기다리는 시간 초과)"""
+
+
+def request_fingerprint(data):
+    """요청 본문 해시 (스트리밍 여부는 제외 - 스트리밍 실패 후 일반 요청으로 재시도하는 경우 허용)"""
+    body = {key: value for key, value in data.items() if key not in ('stream', 'idempotency_key')}
+    return hashlib.sha256(json.dumps(body, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8')).hexdigest()
+
+
+async def _purge_expired(cutoff):
+    global _last_purge
+    now = time.monotonic()
+    if now - _last_purge < PURGE_INTERVAL:
+        return
+    _last_purge = now
+    deleted, _ = await IdempotencyRecord.objects.filter(created_at__lt=cutoff).adelete()
+    if deleted:
+        logger.info(f"Purged {deleted} expired idempotency keys")
+
+
+async def _wait_for_original(key):
+    """원 요청의 (status_code, 응답) - 원 요청이 실패해서 키가 풀렸으면 None"""
+    timeout = getattr(settings, 'CHAT_IDEMPOTENCY_WAIT_TIMEOUT', 120)
+
+    future = _in_flight.get(key)
+    if future is not None:
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            raise IdempotencyInProgress(key)
+
+    # 다른 프로세스에서 처리 중 - 완료될 때까지 DB 확인
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        await asyncio.sleep(POLL_INTERVAL)
+        record = await IdempotencyRecord.objects.filter(key=key).afirst()
+        if record is None:
+            return None
+        if record.status_code is not None:
+            return record.status_code, record.response
+    raise IdempotencyInProgress(key)
+
+
+@sync_to_async
+def _try_create(key, fingerprint):
+    """키 레코드 생성 (이미 있으면 False)
+
+    바깥 트랜잭션(ATOMIC_REQUESTS, 테스트)이 있어도 중복 키 오류 뒤에 계속 쿼리할 수 있도록 세이브포인트 안에서 생성합니다.
+    """
+    try:
+        with transaction.atomic():
+            IdempotencyRecord.objects.create(key=key, request_hash=fingerprint)
+        return True
+    except IntegrityError:
+        return False
+
+
+async def begin(key, fingerprint):
+    """키 처리 시작
+
+    Returns:
+        None이면 새 요청 (처리 후 complete 또는 release 호출 필요),
+        아니면 이전 요청의 (status_code, 응답) - 처리 중이면 끝날 때까지 기다림
+    """
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=getattr(settings, 'CHAT_IDEMPOTENCY_TTL', 60 * 60 * 24))
+    # 대기 시간보다 오래 처리 중인 키는 원 요청이 정리되지 못하고 끝난 것으로 봄 (프로세스 종료 등)
+    abandoned = now - timedelta(seconds=getattr(settings, 'CHAT_IDEMPOTENCY_WAIT_TIMEOUT', 120))
+    await _purge_expired(cutoff)
+
+    while True:
+        if await _try_create(key, fingerprint):
+            _in_flight[key] = asyncio.get_running_loop().create_future()
+            return None
+
+        record = await IdempotencyRecord.objects.filter(key=key).afirst()
+        if record is None:
+            # 원 요청이 방금 실패해서 키가 풀림 - 새 요청으로 처리
+            continue
+        if record.created_at < cutoff or (record.status_code is None and record.created_at < abandoned):
+            await IdempotencyRecord.objects.filter(pk=record.pk).adelete()
+            continue
+        if record.request_hash != fingerprint:
+            raise IdempotencyConflict(key)
+        if record.status_code is not None:
+            return record.status_code, record.response
+
+        result = await _wait_for_original(key)
+        if result is not None:
+            return result
+
+
+def _resolve(key, result):
+    future = _in_flight.pop(key, None)
+    if future is not None and not future.done():
+        future.set_result(result)
+
+
+async def complete(key, status_code, response):
+    """응답 저장 (보관 시간 동안 같은 키의 재시도에 그대로 반환)"""
+    try:
+        await IdempotencyRecord.objects.filter(key=key).aupdate(status_code=status_code, response=response)
+    finally:
+        _resolve(key, (status_code, response))
+
+
+async def release(key):
+    """처리 실패 - 키를 지워서 재시도하면 다시 처리"""
+    try:
+        await IdempotencyRecord.objects.filter(key=key).adelete()
+    finally:
+        _resolve(key, None)
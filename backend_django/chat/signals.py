@@ -0,0 +1,34 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from chat.history_cache import get_history_cache
+from core.models import Conversation, Message
+
+# 캐시는 커밋된 내용만 반영 (롤백된 메시지가 캐시에 남지 않도록 커밋 후 실행)
+
+
+@receiver(post_save, sender=Conversation)
+def prime_history(sender, instance, created, **kwargs):
+    """새 대화는 빈 히스토리로 캐시 (첫 메시지에서 DB를 읽지 않도록)"""
+    if created:
+        transaction.on_commit(lambda: get_history_cache().prime(instance.id))
+
+
+@receiver(post_save, sender=Message)
+def append_history(sender, instance, created, **kwargs):
+    """메시지가 생성되면 캐시된 대화 히스토리에 추가 (수정되면 무효화)"""
+    if created:
+        transaction.on_commit(lambda: get_history_cache().append(instance))
+    else:
+        transaction.on_commit(lambda: get_history_cache().invalidate(instance.conversation_id))
+
+
+@receiver(post_delete, sender=Message)
+def invalidate_history_on_message_delete(sender, instance, **kwargs):
+    transaction.on_commit(lambda: get_history_cache().invalidate(instance.conversation_id))
+
+
+@receiver(post_delete, sender=Conversation)
+def invalidate_history_on_conversation_delete(sender, instance, **kwargs):
+    transaction.on_commit(lambda: get_history_cache().invalidate(instance.id))
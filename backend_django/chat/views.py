@@ -3,27 +3,48 @@ import json
 import asyncio
 from django.db.models import F
 from django.shortcuts import render
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
+from django.core.serializers.json import DjangoJSONEncoder
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
 from core.models import Conversation, Message, FAQ, Document
-from ai_services.llm import LLM
+from django.conf import settings
+from ai_services.history import HistoryWindow
+from ai_services.llm import LLM, FALLBACK_MESSAGES, SERVICE_ERROR_MESSAGE
+from ai_services.metrics import get_metrics
+from ai_services.providers import get_provider_registry
 from ai_services.rag import RAG
+from ai_services.semantic_cache import SemanticAnswerCache, normalize_question
+from ai_services.singleflight import SingleFlight, history_fingerprint
+from chat import idempotency
+from chat.history_cache import MESSAGE_FIELDS, get_history_cache
 
 logger = logging.getLogger(__name__)
 
 # LLM과 RAG 인스턴스 생성 (싱글톤)
-llm_instance = None
+llm_instances = {}
 rag_instance = None
+semantic_cache_instance = None
+history_window_instance = None
+singleflight_instance = None
 
-def get_llm():
-    global llm_instance
-    if llm_instance is None:
-        llm_instance = LLM()
-    return llm_instance
+# 진행 중인 대화 요약 작업 (대화 id → Task, 같은 대화를 동시에 두 번 요약하지 않도록)
+summary_tasks = {}
+
+# 클라이언트가 임의의 model_id를 보낼 수 있으므로 모델별 LLM 캐시 크기 제한
+MAX_CACHED_LLMS = 16
+
+def get_llm(model_name=None):
+    """모델별 LLM 인스턴스 (공급자 클라이언트는 ProviderRegistry에서 공유)"""
+    llm = llm_instances.get(model_name)
+    if llm is None:
+        llm = LLM(model_name=model_name)
+        if len(llm_instances) < MAX_CACHED_LLMS:
+            llm_instances[model_name] = llm
+    return llm
 
 def get_rag():
     global rag_instance
@@ -31,91 +52,354 @@ def get_rag():
         rag_instance = RAG()
     return rag_instance
 
-@api_view(['POST'])
+def get_semantic_cache():
+    """의미 기반 답변 캐시 (비활성화된 경우 None)"""
+    global semantic_cache_instance
+    if not getattr(settings, 'SEMANTIC_CACHE_ENABLED', False):
+        return None
+    if semantic_cache_instance is None:
+        semantic_cache_instance = SemanticAnswerCache(
+            embed_query=get_rag().embedding_function.embed_query,
+            threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+            ttl_seconds=settings.SEMANTIC_CACHE_TTL,
+            max_entries_per_scope=settings.SEMANTIC_CACHE_MAX_ENTRIES,
+            manifest_path=settings.INDEX_MANIFEST_PATH
+        )
+    return semantic_cache_instance
+
+def get_history_window():
+    global history_window_instance
+    if history_window_instance is None:
+        history_window_instance = HistoryWindow(
+            max_turns=getattr(settings, 'CHAT_HISTORY_MAX_TURNS', 6),
+            token_budget=getattr(settings, 'CHAT_HISTORY_TOKEN_BUDGET', 2000)
+        )
+    return history_window_instance
+
+async def load_history(conversation):
+    """LLM에 보낼 히스토리 (누적 요약 + 최근 메시지)
+
+    메시지는 대화 히스토리 캐시에서 가져오고(캐시가 비어 있을 때만 DB 조회), 요약에 이미 합친 메시지는 제외합니다.
+    창에서 밀려난 메시지는 백그라운드에서 요약에 합칩니다.
+    """
+    messages = await get_history_cache().get_messages(conversation.id)
+    if conversation.summary_through_id:
+        messages = [message for message in messages if message['id'] > conversation.summary_through_id]
+    
+    window = get_history_window()
+    recent, overflow = window.split(messages, conversation.summary)
+    if overflow:
+        schedule_summary(conversation, overflow)
+    return window.build(conversation.summary, recent)
+
+def schedule_summary(conversation, overflow):
+    """창에서 밀려난 메시지를 요약에 합치는 작업 예약 (응답을 기다리게 하지 않음)"""
+    if conversation.id in summary_tasks:
+        return
+    task = asyncio.create_task(update_summary(conversation, overflow))
+    summary_tasks[conversation.id] = task
+    task.add_done_callback(lambda _: summary_tasks.pop(conversation.id, None))
+
+async def update_summary(conversation, overflow):
+    """기존 요약 + 밀려난 메시지 → 새 요약 저장"""
+    try:
+        summary = await get_llm().summarize_history(conversation.summary, overflow)
+        if not summary:
+            return
+        # 다른 프로세스가 먼저 갱신했으면 덮어쓰지 않음
+        updated = await Conversation.objects.filter(
+            id=conversation.id,
+            summary_through_id=conversation.summary_through_id
+        ).aupdate(summary=summary, summary_through_id=overflow[-1]['id'])
+        if updated:
+            logger.info(f"Conversation {conversation.id} summary updated through message {overflow[-1]['id']}")
+    except Exception as e:
+        logger.warning(f"Conversation {conversation.id} summary update failed: {e}")
+
+def get_singleflight():
+    global singleflight_instance
+    if singleflight_instance is None:
+        singleflight_instance = SingleFlight()
+    return singleflight_instance
+
+def coalescing_key(stream, question, country, topic, model_name, history):
+    """동시 요청 합치기 키 (비활성화된 경우 None - 합치지 않음)"""
+    if not getattr(settings, 'CHAT_COALESCING_ENABLED', True):
+        return None
+    return (
+        "stream" if stream else "json",
+        normalize_question(question),
+        country,
+        topic,
+        model_name,
+        history_fingerprint(history)
+    )
+
+def record_coalescing(trace, shared):
+    trace["coalesced"] = shared
+    if shared:
+        get_metrics().increment("chat_coalesced_requests_total")
+
+async def save_assistant_message(conversation, content, references):
+    """어시스턴트 응답 저장"""
+    with get_metrics().timer("db_write"):
+        return await Message.objects.acreate(
+            conversation=conversation,
+            role="assistant",
+            content=content,
+            references=references or None
+        )
+
+def serialize_message(message, conversation, references):
+    """응답용 메시지 직렬화"""
+    return {
+        'id': message.id,
+        'conversation_id': conversation.id,
+        'role': message.role,
+        'content': message.content,
+        'references': references,
+        'created_at': message.created_at
+    }
+
+def parse_json_body(request):
+    """JSON 요청 본문 파싱 (잘못된 형식이면 None)"""
+    try:
+        data = json.loads(request.body or b'{}')
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None
+    return data if isinstance(data, dict) else None
+
+def sse_event(event, data):
+    """Server-Sent Events 형식으로 인코딩"""
+    return f"event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False)}\n\n"
+
+async def stream_message_events(conversation, chunks, references, on_complete=None, trace=None, on_finish=None):
+    """응답 청크를 SSE 이벤트로 전달하고, 스트림이 끝나면 메시지를 저장
+
+    이벤트 순서: meta(대화 ID, 참고 문서) → token(증분 텍스트)* → done(저장된 메시지) 또는 error
+    trace를 넘기면 스트림이 끝날 때 요청 단위 지표를 마무리합니다.
+    on_finish는 스트림이 끝날 때 (상태 코드, done/error 이벤트 내용)으로 호출됩니다 (취소되면 (None, None)).
+    """
+    metrics = get_metrics()
+    if trace is not None:
+        # 스트림은 뷰가 반환된 뒤에 소비되므로 요청 trace를 다시 연결
+        metrics.activate(trace)
+    status_code, result = None, None
+    try:
+        yield sse_event('meta', {'conversation_id': conversation.id, 'references': references})
+
+        parts = []
+        try:
+            async for chunk in chunks:
+                if not parts:
+                    metrics.mark_first_token(trace)
+                parts.append(chunk)
+                yield sse_event('token', {'delta': chunk})
+        except Exception as e:
+            logger.error(f"Error streaming message: {e}")
+            # 이미 보낸 부분 응답은 그대로 저장 (없으면 오류 메시지)
+            content = "".join(parts) or SERVICE_ERROR_MESSAGE
+            assistant_message = await save_assistant_message(conversation, content, references)
+            status_code, result = 500, {
+                'error': 'Failed to process message',
+                'message': serialize_message(assistant_message, conversation, references)
+            }
+            yield sse_event('error', result)
+            return
+        finally:
+            # 클라이언트 연결이 끊겨 스트림이 취소된 경우에도 LLM 스트림 정리
+            if hasattr(chunks, 'aclose'):
+                await chunks.aclose()
+
+        response_text = "".join(parts)
+        logger.info(f"Streamed response length: {len(response_text)}")
+
+        assistant_message = await save_assistant_message(conversation, response_text, references)
+        if on_complete:
+            await on_complete(response_text)
+
+        status_code, result = 200, {
+            'message': serialize_message(assistant_message, conversation, references),
+            'conversation_id': conversation.id
+        }
+        yield sse_event('done', result)
+    finally:
+        if trace is not None:
+            # 클라이언트 연결이 끊겨 취소된 경우는 499 (nginx 관례)
+            metrics.finish_trace(trace, status=status_code or 499)
+        if on_finish:
+            await on_finish(status_code, json.loads(json.dumps(result, cls=DjangoJSONEncoder)) if result else None)
+
+def reject(trace, body, status_code):
+    """처리하지 않은 요청의 오류 응답 (요청 trace도 상태와 함께 마무리)"""
+    get_metrics().finish_trace(trace, status=status_code)
+    return JsonResponse(body, status=status_code)
+
+async def replay_message_events(response):
+    """저장된 응답(멱등성 키 재시도)을 스트리밍 요청과 같은 SSE 이벤트로 전달"""
+    message = response.get('message') or {}
+    yield sse_event('meta', {'conversation_id': response.get('conversation_id'), 'references': message.get('references')})
+    if message.get('content'):
+        yield sse_event('token', {'delta': message['content']})
+    yield sse_event('done', response)
+
+async def single_chunk(text):
+    yield text
+
+def streaming_response(events):
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # nginx 프록시 버퍼링 비활성화
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+# 채팅 뷰는 ASGI(config/asgi.py)에서 네이티브 async 뷰로 실행됩니다.
+# DB는 async ORM으로, RAG 검색/임베딩 같은 동기 작업은 스레드로 넘겨서 이벤트 루프를 막지 않습니다.
+
 @csrf_exempt
-def create_conversation(request):
+@require_http_methods(["POST"])
+async def create_conversation(request):
     """새 대화 세션 시작"""
     try:
-        data = request.data if hasattr(request, 'data') else json.loads(request.body)
+        data = parse_json_body(request)
+        if data is None:
+            return JsonResponse({'error': 'Invalid JSON body'}, status=400)
         
         session_id = data.get('session_id')
         country_id = data.get('country_id')
         topic_id = data.get('topic_id')
         
         if not session_id:
-            return Response(
+            return JsonResponse(
                 {'error': 'session_id is required'}, 
-                status=status.HTTP_400_BAD_REQUEST
+                status=400
             )
         
-        conversation = Conversation.objects.create(
+        conversation = await Conversation.objects.acreate(
             session_id=session_id,
             country=country_id,
             topic=topic_id
         )
         
-        return Response({
+        return JsonResponse({
             'id': conversation.id,
             'session_id': conversation.session_id,
             'country': conversation.country,
             'topic': conversation.topic,
             'created_at': conversation.created_at
-        }, status=status.HTTP_201_CREATED)
+        }, status=201)
         
     except Exception as e:
         logger.error(f"Error creating conversation: {e}")
-        return Response(
+        return JsonResponse(
             {'error': 'Failed to create conversation'}, 
-            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            status=500
         )
 
-@api_view(['POST'])
 @csrf_exempt
-def process_message(request):
-    """사용자 메시지 처리"""
+@require_http_methods(["POST"])
+async def process_message(request):
+    """사용자 메시지 처리
+
+    Idempotency-Key 헤더(또는 idempotency_key 필드)가 있으면 같은 키로 재시도했을 때
+    다시 생성하지 않고, 원 요청이 처리 중이면 끝날 때까지 기다렸다가 저장된 응답을 반환합니다.
+    """
+    metrics = get_metrics()
+    # 단계별 시간/토큰/응답 공급자 기록 (요청이 끝나면 한 줄 로그 + 히스토그램)
+    trace = metrics.start_trace()
+    data = parse_json_body(request)
+    if data is None:
+        return reject(trace, {'error': 'Invalid JSON body'}, 400)
+    
+    key = request.headers.get('Idempotency-Key') or data.get('idempotency_key')
+    if not key:
+        return await handle_message(data, trace)
+    
+    try:
+        previous = await idempotency.begin(key, idempotency.request_fingerprint(data))
+    except idempotency.IdempotencyConflict:
+        return reject(trace, {'error': 'Idempotency-Key was already used for a different request'}, 422)
+    except idempotency.IdempotencyInProgress:
+        return reject(trace, {'error': 'Original request is still in progress'}, 409)
+    
+    if previous is not None:
+        status_code, body = previous
+        metrics.finish_trace(trace, status=status_code, idempotent_replay=True)
+        metrics.increment("chat_idempotent_replays_total")
+        if data.get('stream') and status_code == 200:
+            return streaming_response(replay_message_events(body))
+        return JsonResponse(body, status=status_code)
+    
+    # 대화/사용자 메시지를 저장한 뒤에 실패하면 키를 풀지 않고 오류 응답을 저장
+    # (같은 키로 재시도했을 때 메시지가 다시 저장되지 않도록 - 다시 보내려면 새 키 사용)
+    saved = False
+    
+    def on_saved():
+        nonlocal saved
+        saved = True
+    
+    async def finish(status_code, body):
+        if status_code == 200 or saved:
+            await idempotency.complete(key, status_code, body)
+        else:
+            await idempotency.release(key)
+    
+    async def on_finish(status_code, body):
+        # 스트리밍 응답이 끝난 뒤 저장 (연결이 끊겨 취소된 경우도 오류 응답으로 저장)
+        if body is None:
+            status_code, body = 500, {'error': 'Request was interrupted'}
+        await finish(status_code, body)
+    
+    try:
+        response = await handle_message(data, trace, on_finish=on_finish, on_saved=on_saved)
+    except BaseException:
+        await finish(500, {'error': 'Failed to process message'})
+        raise
+    
+    if not response.streaming:
+        await finish(response.status_code, json.loads(response.content))
+    return response
+
+async def handle_message(data, trace, on_finish=None, on_saved=None):
+    """메시지 저장, 검색, 응답 생성
+
+    on_finish는 스트리밍 응답이 끝날 때, on_saved는 대화나 사용자 메시지를 DB에 저장했을 때 호출합니다.
+    """
+    metrics = get_metrics()
     try:
-        data = request.data if hasattr(request, 'data') else json.loads(request.body)
-        
         message_content = data.get('message')
         if not message_content:
-            return Response(
-                {'error': 'message is required'}, 
-                status=status.HTTP_400_BAD_REQUEST
-            )
+            return reject(trace, {'error': 'message is required'}, 400)
         
         # 대화 가져오기 또는 생성
         conversation_id = data.get('conversation_id')
         if conversation_id:
             try:
-                conversation = Conversation.objects.get(id=conversation_id)
+                conversation = await Conversation.objects.aget(id=conversation_id)
             except Conversation.DoesNotExist:
-                return Response(
-                    {'error': f'Conversation {conversation_id} not found'}, 
-                    status=status.HTTP_404_NOT_FOUND
-                )
+                return reject(trace, {'error': f'Conversation {conversation_id} not found'}, 404)
         else:
-            conversation = Conversation.objects.create(
+            conversation = await Conversation.objects.acreate(
                 session_id=data.get('session_id', f'session_{conversation_id}'),
                 country=data.get('country'),
                 topic=data.get('topic')
             )
-        
-        # 사용자 메시지 저장
-        user_message = Message.objects.create(
-            conversation=conversation,
-            role="user",
-            content=message_content
-        )
-        
-        # 이전 메시지들 가져오기 (현재 메시지 제외)
-        previous_messages = conversation.messages.exclude(
-            id=user_message.id
-        ).order_by('created_at')
-        
-        history = [
-            {"role": m.role, "content": m.content}
-            for m in previous_messages
-        ]
+            if on_saved:
+                on_saved()
+        
+        # 이전 대화 (누적 요약 + 토큰 예산 안의 최근 턴) - 현재 메시지를 저장하기 전에 가져옴
+        with metrics.timer("load_history"):
+            history = await load_history(conversation)
+        
+        # 사용자 메시지 저장 (히스토리 캐시에는 저장 시그널로 추가됨)
+        with metrics.timer("db_write"):
+            await Message.objects.acreate(
+                conversation=conversation,
+                role="user",
+                content=message_content
+            )
+        if on_saved:
+            on_saved()
         
         # 디버그: 히스토리 확인
         logger.info(f"Conversation {conversation.id} history: {len(history)} messages")
@@ -133,115 +417,209 @@ def process_message(request):
             else:
                 topic = topic + "_info"
         
-        # RAG 인스턴스 가져오기
-        rag = get_rag()
-        
-        # RAG 검색 (번역 포함)
-        context, references = rag.search_with_translation(
-            query=message_content,
-            country=country,
-            doc_type=topic
-        )
-        
-        # RAG 검색 결과 로그
-        logger.info(f"RAG search country: {country}, topic: {topic}")
-        logger.info(f"RAG context length: {len(context) if context else 0}")
-        logger.info(f"References found: {len(references) if references else 0}")
-        
-        # LLM 응답 생성 (번역 포함)
         model_id = data.get('model_id')
         llm = get_llm()
+        model_name = model_id or llm.model_name
+        stream = bool(data.get('stream'))
+        trace.update(conversation_id=conversation.id, model=model_name, stream=stream, history_messages=len(history))
+        
+        # 의미 기반 답변 캐시 조회 (이전 대화가 없는 질문만 - 답변이 히스토리에 의존하지 않도록)
+        semantic_cache = await asyncio.to_thread(get_semantic_cache) if not history else None
+        cached_answer, question_vector = None, None
+        if semantic_cache:
+            try:
+                with metrics.timer("semantic_cache"):
+                    cached_answer, question_vector = await asyncio.to_thread(
+                        semantic_cache.lookup, message_content, country, topic, model_name
+                    )
+            except Exception as e:
+                logger.warning(f"Semantic cache lookup failed: {e}")
         
-        message_content = message_content + f" 이 질문은 {country}의 {topic}에 대한 내용입니다. 반드시 완성된 문장으로만 답변해주세요. 반드시 문장이 중간에 잘리지 않도록 답변해주세요. 마지막 문장을 자연스럽게 마무리해주세요. 마지막 문장까지 완성해주세요."
-
-        if model_id:
-            llm_with_model = LLM(model_name=model_id)
-            response_text = asyncio.run(llm_with_model.generate_with_translation(
-                query=message_content,
-                context=context,
-                references=references,
-                history=history,
-                translate_to_korean=True
-            ))
+        trace["cached"] = bool(cached_answer)
+        if cached_answer:
+            response_text = cached_answer.answer
+            references = cached_answer.references
+            
+            if stream:
+                # 캐시된 답변은 한 번에 전달
+                return streaming_response(
+                    stream_message_events(conversation, single_chunk(response_text), references, trace=trace, on_finish=on_finish)
+                )
         else:
-            response_text = asyncio.run(llm.generate_with_translation(
-                query=message_content,
-                context=context,
-                references=references,
-                history=history,
-                translate_to_korean=True
-            ))
+            # 고정 지시문은 번역하지 않도록 질문과 분리해서 영어로 전달
+            # (잘린 답변은 LLM에서 이어쓰기로 처리하므로 문장을 끝맺으라는 지시는 필요 없음)
+            instructions = f"This question is about {topic} for {country}."
+            
+            target_llm = get_llm(model_id) if model_id else llm
+            
+            async def retrieve():
+                # RAG 인스턴스 가져오기 (최초 생성 시 벡터 DB 로딩이 있으므로 스레드에서)
+                rag = await asyncio.to_thread(get_rag)
+                
+                # RAG 검색 (번역 포함) - 임베딩/벡터 검색은 동기 코드
+                with metrics.timer("retrieval"):
+                    context, references = await asyncio.to_thread(
+                        rag.search_with_translation,
+                        query=message_content,
+                        country=country,
+                        doc_type=topic
+                    )
+                
+                # RAG 검색 결과 로그
+                logger.info(f"RAG search country: {country}, topic: {topic}")
+                logger.info(f"RAG context length: {len(context) if context else 0}")
+                logger.info(f"References found: {len(references) if references else 0}")
+                return context, references
+            
+            async def store_in_cache(response_text, references):
+                # 의미 기반 캐시에 저장 (오류 응답은 저장하지 않음)
+                if semantic_cache and response_text and response_text not in FALLBACK_MESSAGES:
+                    try:
+                        await asyncio.to_thread(
+                            semantic_cache.store,
+                            message_content, country, topic, model_name,
+                            answer=response_text,
+                            references=references,
+                            vector=question_vector
+                        )
+                    except Exception as e:
+                        logger.warning(f"Semantic cache store failed: {e}")
+            
+            # 같은 질문이 동시에 여러 번 들어오면 검색/생성은 한 번만 하고 결과를 공유 (메시지 저장은 요청별로)
+            key = coalescing_key(stream, message_content, country, topic, model_name, history)
+            
+            if stream:
+                async def produce():
+                    # 첫 항목은 참고 문서, 이후는 응답 조각 (토큰 스트리밍, 한국어 번역은 문장 단위)
+                    context, references = await retrieve()
+                    yield references
+                    answer = target_llm.stream_with_translation(
+                        query=message_content,
+                        context=context,
+                        references=references,
+                        history=history,
+                        translate_to_korean=True,
+                        instructions=instructions
+                    )
+                    parts = []
+                    try:
+                        async for chunk in answer:
+                            parts.append(chunk)
+                            yield chunk
+                    finally:
+                        # 모든 요청이 연결을 끊어 스트림이 취소된 경우에도 LLM 스트림 정리
+                        await answer.aclose()
+                    await store_in_cache("".join(parts), references)
+                
+                chunks, shared = get_singleflight().stream(key, produce)
+                record_coalescing(trace, shared)
+                try:
+                    references = await chunks.__anext__()
+                except BaseException:
+                    await chunks.aclose()
+                    raise
+                return streaming_response(
+                    stream_message_events(conversation, chunks, references, trace=trace, on_finish=on_finish)
+                )
+            
+            async def generate():
+                context, references = await retrieve()
+                # LLM 응답 생성 (번역 포함)
+                response_text = await target_llm.generate_with_translation(
+                    query=message_content,
+                    context=context,
+                    references=references,
+                    history=history,
+                    translate_to_korean=True,
+                    instructions=instructions
+                )
+                await store_in_cache(response_text, references)
+                return response_text, references
+            
+            (response_text, references), shared = await get_singleflight().do(key, generate)
+            record_coalescing(trace, shared)
         
         # 응답 길이 로그
         logger.info(f"Generated response length: {len(response_text) if response_text else 0}")
         
         # 응답 저장
-        assistant_message = Message.objects.create(
-            conversation=conversation,
-            role="assistant",
-            content=response_text,
-            references=json.dumps(references) if references else None
-        )
+        assistant_message = await save_assistant_message(conversation, response_text, references)
+        metrics.finish_trace(trace, status=200)
         
-        return Response({
-            'message': {
-                'id': assistant_message.id,
-                'conversation_id': conversation.id,
-                'role': assistant_message.role,
-                'content': assistant_message.content,
-                'references': references,
-                'created_at': assistant_message.created_at
-            },
+        return JsonResponse({
+            'message': serialize_message(assistant_message, conversation, references),
             'conversation_id': conversation.id
-        }, status=status.HTTP_200_OK)
+        }, status=200)
         
     except Exception as e:
         logger.error(f"Error processing message: {e}")
-        return Response(
+        metrics.finish_trace(trace, status=500, error=str(e))
+        return JsonResponse(
             {'error': 'Failed to process message'}, 
-            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            status=500
         )
 
-@api_view(['GET'])
-def get_conversation_history(request, conversation_id):
-    """대화 기록 조회"""
+def parse_history_page(params):
+    """대화 기록 조회 쿼리 파라미터 → (limit, before, after, fields) (잘못된 값이면 ValueError)"""
+    default_size = getattr(settings, 'CHAT_HISTORY_PAGE_SIZE', 50)
+    max_size = getattr(settings, 'CHAT_HISTORY_MAX_PAGE_SIZE', 200)
     try:
-        conversation = Conversation.objects.get(id=conversation_id)
-        messages = conversation.messages.all().order_by('created_at')
+        limit = min(int(params.get('limit', default_size)), max_size)
+        before = int(params['before']) if params.get('before') else None
+        after = int(params['after']) if params.get('after') else None
+    except ValueError:
+        raise ValueError('limit, before, after must be integers')
+    if limit < 1:
+        raise ValueError('limit must be positive')
+    if before is not None and after is not None:
+        raise ValueError('Use either before or after, not both')
+    
+    fields = MESSAGE_FIELDS
+    if params.get('fields'):
+        requested = [field.strip() for field in params['fields'].split(',') if field.strip()]
+        unknown = set(requested) - set(MESSAGE_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+        # 다음 페이지 커서로 쓰므로 id는 항상 포함
+        fields = tuple(field for field in MESSAGE_FIELDS if field == 'id' or field in requested)
+    return limit, before, after, fields
+
+@require_http_methods(["GET"])
+async def get_conversation_history(request, conversation_id):
+    """대화 기록 조회 (커서 페이지)
+
+    쿼리 파라미터 없이 호출하면 최신 페이지, before=<메시지 id>이면 그 이전, after=<메시지 id>이면 그 이후.
+    limit은 페이지 크기(최대 CHAT_HISTORY_MAX_PAGE_SIZE), fields=id,role,content처럼 필요한 필드만 받을 수 있습니다.
+    """
+    try:
+        try:
+            limit, before, after, fields = parse_history_page(request.GET)
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        
+        if not await Conversation.objects.filter(id=conversation_id).aexists():
+            logger.error(f"Conversation {conversation_id} not found")
+            return JsonResponse(
+                {'error': 'Conversation not found'}, 
+                status=404
+            )
         
-        message_data = []
-        for message in messages:
-            references = None
-            if message.references:
-                try:
-                    references = json.loads(message.references)
-                except json.JSONDecodeError:
-                    references = None
-            
-            message_data.append({
-                'id': message.id,
-                'role': message.role,
-                'content': message.content,
-                'references': references,
-                'created_at': message.created_at
-            })
+        messages, has_more = await get_history_cache().get_page(
+            conversation_id, limit, before=before, after=after, fields=fields
+        )
         
-        return Response({
-            'conversation_id': conversation.id,
-            'messages': message_data
-        }, status=status.HTTP_200_OK)
+        return JsonResponse({
+            'conversation_id': conversation_id,
+            'messages': messages,
+            # 페이지 방향(after면 이후, 아니면 이전)으로 메시지가 더 있는지
+            'has_more': has_more
+        }, status=200)
         
-    except Conversation.DoesNotExist:
-        logger.error(f"Conversation {conversation_id} not found")
-        return Response(
-            {'error': 'Conversation not found'}, 
-            status=status.HTTP_404_NOT_FOUND
-        )
     except Exception as e:
         logger.error(f"Error fetching conversation history: {e}")
-        return Response(
+        return JsonResponse(
             {'error': 'Failed to fetch conversation history'}, 
-            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            status=500
         )
 
 @api_view(['GET'])
@@ -272,6 +650,11 @@ def get_available_models(request):
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
+@api_view(['GET'])
+def get_provider_stats(request):
+    """LLM 공급자 클라이언트 풀 통계"""
+    return Response(get_provider_registry().stats(), status=status.HTTP_200_OK)
+
 @api_view(['GET'])
 def get_example_questions(request):
     """예시 질문 반환"""
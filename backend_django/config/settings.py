@@ -1,6 +1,7 @@
 import os
 from pathlib import Path
 from dotenv import load_dotenv
+from corsheaders.defaults import default_headers
 
 load_dotenv()
 
@@ -72,6 +73,8 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'config.wsgi.application'
+# 채팅 뷰는 async 뷰이므로 ASGI 서버(uvicorn)로 실행
+ASGI_APPLICATION = 'config.asgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
@@ -146,10 +149,22 @@ CORS_ALLOWED_ORIGINS = [
 
 CORS_ALLOW_ALL_ORIGINS = DEBUG  # Only in development
 
+# 메시지 전송 재시도용 멱등성 키 헤더 허용
+CORS_ALLOW_HEADERS = (*default_headers, "idempotency-key")
+
 # Custom settings for AI services
 # OpenAI
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 EMBEDDING_MODEL = 'text-embedding-3-small'
+EMBEDDING_DIMENSIONS = 384
+
+# 임베딩 백엔드: 'openai' (API) 또는 'local' (CPU, sentence-transformers)
+# 변경 후에는 'python manage.py reembed_vectors'로 기존 벡터를 다시 임베딩해야 함
+EMBEDDING_BACKEND = os.getenv('EMBEDDING_BACKEND', 'openai')
+LOCAL_EMBEDDING_MODEL = os.getenv('LOCAL_EMBEDDING_MODEL', 'sentence-transformers/all-MiniLM-L6-v2')
+LOCAL_EMBEDDING_RUNTIME = os.getenv('LOCAL_EMBEDDING_RUNTIME', 'torch')  # 'torch' 또는 'onnx'
+LOCAL_EMBEDDING_BATCH_SIZE = 64
+LOCAL_EMBEDDING_THREADS = int(os.getenv('LOCAL_EMBEDDING_THREADS', 2))
 DEFAULT_LLM_MODEL = 'gpt-4'
 
 # Google
@@ -158,13 +173,102 @@ GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY', '')
 # Vector DB
 VECTOR_DB_PATH = os.getenv('VECTOR_DB_PATH', str(BASE_DIR / 'Ready_To_Go' / 'backend_django' / 'data' / 'vectors'))
 
+# 임베딩 캐시 (벡터 DB 옆에 저장, 변경되지 않은 청크는 재임베딩하지 않음)
+EMBEDDING_CACHE_PATH = os.getenv('EMBEDDING_CACHE_PATH', os.path.join(os.path.dirname(VECTOR_DB_PATH), 'embedding_cache.sqlite3'))
+
+# 태그(country_doctype)별로 컬렉션을 나눠 저장/검색 (False면 global-documents 하나에 저장, 변경 시 index_pdfs --force 필요)
+VECTOR_PARTITIONED = os.getenv('VECTOR_PARTITIONED', 'False').lower() == 'true'
+
+# 검색 백엔드: 'chroma' (HNSW) 또는 'numpy' (Chroma를 export한 float16 mmap 스냅샷으로 완전 탐색)
+VECTOR_BACKEND = os.getenv('VECTOR_BACKEND', 'chroma')
+NUMPY_INDEX_PATH = os.getenv('NUMPY_INDEX_PATH', os.path.join(os.path.dirname(VECTOR_DB_PATH), 'numpy_index'))
+
+# 하이브리드 검색 (BM25 + 벡터, RRF 결합)
+HYBRID_SEARCH_ENABLED = os.getenv('HYBRID_SEARCH_ENABLED', 'True').lower() == 'true'
+BM25_INDEX_PATH = os.getenv('BM25_INDEX_PATH', os.path.join(os.path.dirname(VECTOR_DB_PATH), 'bm25_index.pkl'))
+RRF_K = 60
+
+# 인덱싱된 PDF 목록 (크기, 수정 시각, 해시) - 변경된 파일만 재인덱싱
+INDEX_MANIFEST_PATH = os.getenv('INDEX_MANIFEST_PATH', os.path.join(os.path.dirname(VECTOR_DB_PATH), 'index_manifest.json'))
+
 # LLM Settings
 MAX_CONTEXT_TOKENS = 3000
 TOP_K_RESULTS = 5
 
+# 번역 캐시 (메모리 LRU 크기, 디스크 캐시 경로 - 비어 있으면 디스크 캐시 사용 안 함)
+TRANSLATION_CACHE_SIZE = 2048
+TRANSLATION_CACHE_PATH = os.getenv('TRANSLATION_CACHE_PATH') or None
+
+# 의미 기반 답변 캐시 (유사도 임계값, TTL 초, 범위별 최대 항목 수)
+SEMANTIC_CACHE_ENABLED = os.getenv('SEMANTIC_CACHE_ENABLED', 'True').lower() == 'true'
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv('SEMANTIC_CACHE_THRESHOLD', 0.95))
+SEMANTIC_CACHE_TTL = int(os.getenv('SEMANTIC_CACHE_TTL', 60 * 60 * 24))
+SEMANTIC_CACHE_MAX_ENTRIES = 1000
+
 # GPU AI 서버 설정
 GPU_AI_SERVER_URL = "https://9c6b-34-168-217-150.ngrok-free.app"  # 실제 GPU 서버 IP로 변경
 
+# LLM 공급자 클라이언트 연결 풀 (클라이언트당 최대 연결 수, keep-alive 연결 수, Gemini 모델 캐시 크기)
+LLM_HTTP_MAX_CONNECTIONS = int(os.getenv('LLM_HTTP_MAX_CONNECTIONS', 100))
+LLM_HTTP_MAX_KEEPALIVE = int(os.getenv('LLM_HTTP_MAX_KEEPALIVE', 20))
+GEMINI_MODEL_CACHE_SIZE = 64
+
+# Gemini 요청 타임아웃(초)과 프로세스당 동시 요청 수
+GEMINI_TIMEOUT = float(os.getenv('GEMINI_TIMEOUT', 60))
+GEMINI_MAX_CONCURRENCY = int(os.getenv('GEMINI_MAX_CONCURRENCY', 8))
+
+# GPU 서버(Phi) 서킷 브레이커 (연속 실패 횟수, open 유지 시간 초, 헬스 체크 캐시 초)
+PHI_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('PHI_CIRCUIT_FAILURE_THRESHOLD', 3))
+PHI_CIRCUIT_RESET_TIMEOUT = float(os.getenv('PHI_CIRCUIT_RESET_TIMEOUT', 30))
+PHI_HEALTH_TTL = float(os.getenv('PHI_HEALTH_TTL', 15))
+
+# 답변이 잘렸을 때(OpenAI max_tokens, Phi 미완성 문장) 처음부터 다시 생성하지 않고 이어쓰기 요청하는 최대 횟수
+LLM_MAX_CONTINUATIONS = int(os.getenv('LLM_MAX_CONTINUATIONS', 2))
+
+# 헤징 요청 (기본 공급자가 관측된 p95 안에 응답하지 않으면 폴백 공급자에도 요청)
+# 관측값이 LLM_HEDGE_MIN_SAMPLES개 미만이면 LLM_HEDGE_DEFAULT_DELAY초 후 헤징
+LLM_HEDGING_ENABLED = os.getenv('LLM_HEDGING_ENABLED', 'False').lower() == 'true'
+LLM_HEDGE_QUANTILE = 0.95
+LLM_HEDGE_DEFAULT_DELAY = float(os.getenv('LLM_HEDGE_DEFAULT_DELAY', 8))
+LLM_HEDGE_MIN_SAMPLES = 20
+
+# 한국어 답변 방식 (direct: 영어 context로 한국어 답변을 바로 생성, 영어로 답한 경우에만 번역 / translate: 영어 답변 생성 후 번역)
+# 두 방식 비교: python manage.py benchmark_answer_modes
+LLM_ANSWER_MODE = os.getenv('LLM_ANSWER_MODE', 'direct')
+
+# 대화 히스토리 창 (최근 N턴은 원문, 토큰 예산 초과분과 이전 턴은 대화별 누적 요약으로 전달)
+CHAT_HISTORY_MAX_TURNS = int(os.getenv('CHAT_HISTORY_MAX_TURNS', 6))
+CHAT_HISTORY_TOKEN_BUDGET = int(os.getenv('CHAT_HISTORY_TOKEN_BUDGET', 2000))
+CHAT_SUMMARY_MAX_TOKENS = 300
+
+# 캐시 (REDIS_URL을 설정하면 워커 간 공유 캐시를 'shared' 별칭으로 추가)
+REDIS_URL = os.getenv('REDIS_URL', '')
+CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+}
+if REDIS_URL:
+    CACHES['shared'] = {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': REDIS_URL}
+
+# 워커 프로세스 수 (gunicorn/uvicorn과 같은 WEB_CONCURRENCY 환경 변수)
+WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', 1))
+
+# 대화 히스토리 캐시 (메시지 생성 시 추가, 삭제 시 무효화) - 'local'(프로세스 메모리, 워커 1개) 또는 CACHES 별칭(예: 'shared', 워커 간 공유)
+# 워커가 여러 개인데 'local'이면 캐시를 쓰지 않고 DB에서 읽음 (다른 워커가 추가한 메시지가 빠지지 않도록)
+CHAT_HISTORY_CACHE = os.getenv('CHAT_HISTORY_CACHE', 'shared' if REDIS_URL else 'local')
+CHAT_HISTORY_CACHE_TTL = int(os.getenv('CHAT_HISTORY_CACHE_TTL', 60 * 30))
+CHAT_HISTORY_CACHE_SIZE = 1000
+
+# 대화 기록 조회 API 페이지 크기 (기본, 최대)
+CHAT_HISTORY_PAGE_SIZE = 50
+CHAT_HISTORY_MAX_PAGE_SIZE = 200
+
+# 같은 질문(정규화한 질문, 국가, 토픽, 모델, 히스토리)이 동시에 들어오면 검색/생성을 한 번만 실행하고 결과 공유
+CHAT_COALESCING_ENABLED = os.getenv('CHAT_COALESCING_ENABLED', 'True').lower() == 'true'
+
+# 메시지 전송 멱등성 키 (Idempotency-Key 헤더) - 응답 보관 시간(초), 처리 중인 원 요청을 기다리는 최대 시간(초)
+CHAT_IDEMPOTENCY_TTL = int(os.getenv('CHAT_IDEMPOTENCY_TTL', 60 * 60 * 24))
+CHAT_IDEMPOTENCY_WAIT_TIMEOUT = 120
+
 # 실시간 정보 API 키
 FIXER_API_KEY = os.getenv('FIXER_API_KEY', '')  # 환율 API
 OPENWEATHER_API_KEY = os.getenv('OPENWEATHER_API_KEY', '')  # 날씨 API
@@ -173,6 +277,12 @@ OPENWEATHER_API_KEY = os.getenv('OPENWEATHER_API_KEY', '')  # 날씨 API
 CHUNK_SIZE = 1000
 CHUNK_OVERLAP = 200
 
+# 인제스트 파이프라인 (PDF 파싱 프로세스 수, 동시 임베딩 요청 수, 임베딩 API 분당 요청 제한)
+INGEST_PARSE_WORKERS = int(os.getenv('INGEST_PARSE_WORKERS', os.cpu_count() or 1))
+INGEST_EMBED_CONCURRENCY = int(os.getenv('INGEST_EMBED_CONCURRENCY', 4))
+INGEST_EMBED_BATCH_SIZE = 100
+EMBEDDING_REQUESTS_PER_MINUTE = int(os.getenv('EMBEDDING_REQUESTS_PER_MINUTE', 3000))
+
 # Logging
 LOGGING = {
     'version': 1,
@@ -0,0 +1,136 @@
+import asyncio
+import time
+from django.core.management.base import BaseCommand
+import numpy as np
+from ai_services.llm import ANSWER_MODE_DIRECT, ANSWER_MODE_TRANSLATE, FALLBACK_MESSAGES, LLM
+from ai_services.rag import RAG
+from ai_services.translation import is_korean
+from core.models import FAQ
+
+# FAQ가 없을 때 사용하는 질문
+SAMPLE_QUESTIONS = [
+    ("usa", "visa_info", "미국 관광 비자 신청 절차가 어떻게 되나요?"),
+    ("japan", "visa_info", "일본 워킹홀리데이 비자 조건을 알려주세요."),
+    ("canada", "insurance_info", "캐나다 유학생은 어떤 보험에 가입해야 하나요?"),
+    ("australia", "immigration_regulations_info", "호주 입국 시 반입 금지 물품이 있나요?"),
+    ("germany", "immigration_safety_info", "독일에서 여권을 분실하면 어떻게 해야 하나요?"),
+]
+
+MODES = (ANSWER_MODE_TRANSLATE, ANSWER_MODE_DIRECT)
+
+# FAQ 토픽 → 문서 태그 (chat.views.process_message와 같은 규칙)
+TOPIC_TAGS = {"immigration": "immigration_regulations_info", "safety": "immigration_safety_info"}
+
+
+class Command(BaseCommand):
+    help = '영어 답변 후 번역(translate)과 한국어 바로 답변(direct) 방식의 지연 시간과 토큰 비용을 비교합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--questions',
+            type=int,
+            default=5,
+            help='측정할 질문 수 (FAQ에서 선택, 없으면 샘플 질문)',
+        )
+        parser.add_argument(
+            '--model',
+            type=str,
+            default='gpt-3.5-turbo',
+            help='답변 생성 모델 (토큰 사용량은 OpenAI 모델만 집계됨)',
+        )
+        parser.add_argument(
+            '--stream',
+            action='store_true',
+            help='스트리밍 첫 조각까지의 시간도 측정',
+        )
+        parser.add_argument(
+            '--input-price',
+            type=float,
+            default=0.0005,
+            help='입력 1K 토큰당 비용 (USD)',
+        )
+        parser.add_argument(
+            '--output-price',
+            type=float,
+            default=0.0015,
+            help='출력 1K 토큰당 비용 (USD)',
+        )
+
+    def handle(self, *args, **options):
+        questions = [
+            (faq.country.replace(" ", "").lower(), TOPIC_TAGS.get(faq.topic, f'{faq.topic}_info'), faq.question)
+            for faq in FAQ.objects.order_by('?')[:options['questions']]
+        ] or SAMPLE_QUESTIONS[:options['questions']]
+
+        rag = RAG()
+        llm = LLM(options['model'])
+
+        # 같은 질문은 같은 context로 비교 (RAG 검색은 측정에서 제외)
+        cases = []
+        for country, topic, question in questions:
+            context, references = rag.search_with_translation(query=question, country=country, doc_type=topic)
+            cases.append((question, context, references, f"This question is about {topic} for {country}."))
+
+        results = asyncio.run(self._run(llm, cases, options['stream']))
+
+        self.stdout.write(f'모델: {options["model"]}, 질문 수: {len(cases)}')
+        for mode in MODES:
+            result = results[mode]
+            cost = (
+                result['prompt_tokens'] * options['input_price']
+                + result['completion_tokens'] * options['output_price']
+            ) / 1000
+            self.stdout.write(f'  {mode}:')
+            self.stdout.write(f'    지연 시간: {self._summarize(result["latency"])}')
+            if result['first_chunk']:
+                self.stdout.write(f'    첫 조각(스트리밍): {self._summarize(result["first_chunk"])}')
+            self.stdout.write(
+                f'    호출 {result["calls"]}회, 입력 {result["prompt_tokens"]} / 출력 {result["completion_tokens"]} 토큰, '
+                f'비용 ${cost:.4f} (질문당 ${cost / len(cases):.5f})'
+            )
+            self.stdout.write(f'    한국어 답변: {result["korean"]}/{len(cases)}, 실패: {result["failed"]}')
+
+    async def _run(self, llm, cases, stream):
+        results = {}
+        for mode in MODES:
+            result = {'latency': [], 'first_chunk': [], 'korean': 0, 'failed': 0}
+            before = llm.providers.usage.totals()
+
+            for question, context, references, instructions in cases:
+                started = time.perf_counter()
+                answer = await llm.generate_with_translation(
+                    query=question,
+                    context=context,
+                    references=references,
+                    instructions=instructions,
+                    answer_mode=mode
+                )
+                result['latency'].append((time.perf_counter() - started) * 1000)
+                if answer in FALLBACK_MESSAGES:
+                    result['failed'] += 1
+                elif is_korean(answer):
+                    result['korean'] += 1
+
+                if stream:
+                    started = time.perf_counter()
+                    chunks = llm.stream_with_translation(
+                        query=question,
+                        context=context,
+                        references=references,
+                        instructions=instructions,
+                        answer_mode=mode
+                    )
+                    async for _ in chunks:
+                        result['first_chunk'].append((time.perf_counter() - started) * 1000)
+                        break
+                    await chunks.aclose()
+
+            # 스트리밍 호출은 usage를 돌려주지 않으므로 일반 호출만 집계됨
+            after = llm.providers.usage.totals()
+            result.update({key: after[key] - before[key] for key in after})
+            results[mode] = result
+        return results
+
+    @staticmethod
+    def _summarize(times):
+        return f'p50={np.percentile(times, 50):.0f}ms p95={np.percentile(times, 95):.0f}ms mean={np.mean(times):.0f}ms'
@@ -0,0 +1,88 @@
+import random
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+import numpy as np
+from ai_services.rag import RAG
+from ai_services.index_manifest import IndexManifest
+
+class Command(BaseCommand):
+    help = 'Chroma(HNSW)와 NumPy 완전 탐색 백엔드의 검색 지연 시간과 recall을 비교합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--queries',
+            type=int,
+            default=200,
+            help='측정할 쿼리 수',
+        )
+        parser.add_argument(
+            '--k',
+            type=int,
+            default=5,
+            help='검색 결과 수',
+        )
+        parser.add_argument(
+            '--export',
+            action='store_true',
+            help='측정 전에 Chroma 내용으로 NumPy 스냅샷을 다시 생성',
+        )
+        parser.add_argument(
+            '--no-filter',
+            action='store_true',
+            help='태그 필터 없이 전체 검색',
+        )
+
+    def handle(self, *args, **options):
+        rag = RAG()
+        store = rag.numpy_store
+        if options['export'] or not len(store):
+            self.stdout.write('NumPy 스냅샷을 생성합니다...')
+            rag.export_numpy_index()
+            store = rag.numpy_store
+            # 서비스가 NumPy 백엔드를 쓰면 검색 결과가 바뀌므로 인덱스 버전 갱신 (의미 기반 캐시 무효화)
+            IndexManifest(settings.INDEX_MANIFEST_PATH).save(bump_version=True)
+
+        if not len(store):
+            self.stdout.write(self.style.ERROR('벡터 DB가 비어 있습니다. 먼저 index_pdfs를 실행하세요.'))
+            return
+
+        k = options['k']
+        use_filter = not options['no_filter']
+
+        # 저장된 청크 벡터를 쿼리로 사용 (임베딩 API 호출 없이 측정)
+        rows = random.sample(range(len(store)), min(options['queries'], len(store)))
+
+        chroma_times, numpy_times, recalls = [], [], []
+        for row in rows:
+            _, _, metadata = store.get(row)
+            query = np.asarray(store.vectors[row], dtype=np.float32).tolist()
+            tag = metadata.get('tag') if use_filter else None
+
+            # NumPy: 완전 탐색 결과를 정답으로 사용
+            started = time.perf_counter()
+            exact = store.similarity_search(query, k=k, tag=tag)
+            numpy_times.append((time.perf_counter() - started) * 1000)
+            exact_ids = {store.get(r)[0] for r, _ in exact}
+
+            # Chroma: HNSW + 메타데이터 필터
+            collection = rag.get_vectorstore(tag)._collection
+            started = time.perf_counter()
+            result = collection.query(
+                query_embeddings=[query],
+                n_results=k,
+                where={'tag': tag} if tag and not rag.partitioned else None
+            )
+            chroma_times.append((time.perf_counter() - started) * 1000)
+
+            chroma_ids = set(result['ids'][0])
+            if exact_ids:
+                recalls.append(len(exact_ids & chroma_ids) / len(exact_ids))
+
+        def summarize(times):
+            return f'p50={np.percentile(times, 50):.2f}ms p95={np.percentile(times, 95):.2f}ms mean={np.mean(times):.2f}ms'
+
+        self.stdout.write(f'벡터 수: {len(store)}, 쿼리 수: {len(rows)}, k={k}, 태그 필터: {use_filter}')
+        self.stdout.write(f'  Chroma (HNSW):  {summarize(chroma_times)}')
+        self.stdout.write(f'  NumPy (exact):  {summarize(numpy_times)}')
+        self.stdout.write(f'  Chroma recall@{k} (NumPy 완전 탐색 기준): {np.mean(recalls):.3f}')
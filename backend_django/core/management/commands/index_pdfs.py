@@ -1,9 +1,11 @@
+from django.conf import settings
 from django.core.management.base import BaseCommand
 from ai_services.rag import RAG
+from ai_services.index_manifest import IndexManifest
 import os
 
 class Command(BaseCommand):
-    help = 'PDF 문서들을 벡터 데이터베이스에 인덱싱합니다.'
+    help = 'PDF 문서들을 벡터 데이터베이스에 인덱싱합니다. (변경된 파일만 재인덱싱)'
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -17,33 +19,131 @@ class Command(BaseCommand):
             action='store_true',
             help='기존 벡터 DB를 삭제하고 새로 생성',
         )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            help='PDF 파싱 프로세스 수 (기본값: INGEST_PARSE_WORKERS)',
+        )
+        parser.add_argument(
+            '--embed-concurrency',
+            type=int,
+            help='동시 임베딩 요청 수 (기본값: INGEST_EMBED_CONCURRENCY)',
+        )
+        parser.add_argument(
+            '--tag',
+            type=str,
+            help='해당 태그(예: france_visa_info)의 파일만 처리 (--force와 함께 쓰면 해당 파티션만 재구축)',
+        )
+        parser.add_argument(
+            '--rebuild-lexical',
+            action='store_true',
+            help='PDF를 다시 읽지 않고 벡터 DB에 저장된 청크로 BM25 색인만 재구축',
+        )
 
     def handle(self, *args, **options):
         self.stdout.write('PDF 인덱싱을 시작합니다...')
-        
+
         pdf_dir = options['pdf_dir']
         if not os.path.exists(pdf_dir):
             self.stdout.write(
                 self.style.ERROR(f'PDF 디렉토리가 존재하지 않습니다: {pdf_dir}')
             )
             return
-        
+
         try:
             # RAG 시스템 초기화
             rag = RAG()
-            
+            manifest = IndexManifest(settings.INDEX_MANIFEST_PATH)
+
+            if options['rebuild_lexical']:
+                count = rag.rebuild_lexical_index()
+                # 하이브리드 검색 결과가 바뀌므로 인덱스 버전 갱신 (의미 기반 캐시 무효화)
+                manifest.save(bump_version=True)
+                self.stdout.write(self.style.SUCCESS(f'BM25 색인을 재구축했습니다. ({count}개 청크)'))
+                return
+
+            tag = options['tag']
+
+            def matches_tag(filename):
+                parsed = rag.parse_filename(filename)
+                return tag is None or (parsed is not None and f'{parsed[0]}_{parsed[1]}' == tag)
+
             # 기존 데이터 삭제 (force 옵션)
             if options['force']:
-                self.stdout.write('기존 벡터 데이터를 삭제합니다...')
-                # 여기에 벡터 DB 초기화 로직 추가 가능
-            
-            # PDF 처리
-            rag.process_pdf_directory(pdf_dir)
-            
+                if tag:
+                    self.stdout.write(f'{tag} 벡터 데이터를 삭제합니다...')
+                    if rag.partitioned:
+                        rag.rebuild_partition(tag)
+                    for filename in [f for f in manifest.files if matches_tag(f)]:
+                        if not rag.partitioned:
+                            rag.delete_source(filename)
+                        manifest.remove(filename)
+                else:
+                    self.stdout.write('기존 벡터 데이터를 삭제합니다...')
+                    rag.reset_index()
+                    manifest.clear()
+
+            pdf_files = sorted(f for f in os.listdir(pdf_dir) if f.endswith(".pdf"))
+            # 파일명에서 국가/문서 타입을 알 수 없는 파일은 인덱싱할 수 없으므로 해시 계산/재시도 대상에서 제외
+            skipped = [f for f in pdf_files if rag.parse_filename(f) is None]
+            pdf_files = [f for f in pdf_files if f not in skipped and matches_tag(f)]
+            if skipped:
+                self.stdout.write(
+                    self.style.WARNING(f'파일명 형식이 맞지 않아 건너뛴 파일: {", ".join(skipped)}')
+                )
+            new_files, changed_files, removed_files, current = manifest.diff(pdf_dir, pdf_files)
+            removed_files = [f for f in removed_files if matches_tag(f)]
+
             self.stdout.write(
-                self.style.SUCCESS('PDF 인덱싱이 완료되었습니다!')
+                f'새 파일 {len(new_files)}개, 변경 {len(changed_files)}개, '
+                f'삭제 {len(removed_files)}개, 변경 없음 {len(pdf_files) - len(new_files) - len(changed_files)}개'
+            )
+
+            # 변경되거나 삭제된 파일의 기존 청크 삭제
+            # (manifest에 없는 새 파일도 manifest 도입 전 인덱스에 청크가 남아 있을 수 있으므로 삭제 - 없으면 아무 일도 없음)
+            for filename in new_files + changed_files + removed_files:
+                rag.delete_source(filename)
+            for filename in removed_files:
+                manifest.remove(filename)
+
+            # 새 파일/변경된 파일만 처리
+            processed = rag.process_pdf_directory(
+                pdf_dir,
+                new_files + changed_files,
+                parse_workers=options['workers'],
+                embed_concurrency=options['embed_concurrency']
             )
-            
+            if new_files or changed_files:
+                self.stdout.write(f'처리 통계: {rag.last_ingestion_stats.summary()}')
+
+            pending = set(new_files + changed_files)
+            for filename, entry in current.items():
+                if filename in processed:
+                    manifest.record(filename, entry, chunks=processed[filename])
+                elif filename not in pending and filename in manifest.files:
+                    # 내용은 같고 수정 시각만 바뀐 경우 등
+                    manifest.record(filename, entry, chunks=manifest.files[filename].get('chunks'))
+
+            index_changed = bool(processed or changed_files or removed_files or options['force'])
+
+            # NumPy 검색 백엔드를 쓰는 경우 스냅샷 갱신
+            if index_changed and rag.vector_backend == 'numpy':
+                count = rag.export_numpy_index()
+                self.stdout.write(f'NumPy 검색 스냅샷을 갱신했습니다. ({count}개 벡터)')
+
+            # 인덱스 내용이 바뀐 경우에만 버전 갱신 (스냅샷까지 바뀐 뒤에 갱신해야 이전 검색 결과로 만든 답변이 새 버전으로 캐시되지 않음)
+            manifest.save(bump_version=index_changed)
+
+            failed = [f for f in new_files + changed_files if f not in processed]
+            if failed:
+                self.stdout.write(
+                    self.style.WARNING(f'인덱싱 실패 파일 (다음 실행 시 재시도): {", ".join(failed)}')
+                )
+
+            self.stdout.write(
+                self.style.SUCCESS(f'PDF 인덱싱이 완료되었습니다! ({len(processed)}개 파일 처리)')
+            )
+
         except Exception as e:
             self.stdout.write(
                 self.style.ERROR(f'인덱싱 중 오류 발생: {str(e)}')
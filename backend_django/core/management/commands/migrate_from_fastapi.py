@@ -137,15 +137,13 @@ class Command(BaseCommand):
         """메시지 마이그레이션"""
         self.stdout.write('메시지 데이터를 마이그레이션합니다...')
         
-        with source_conn.cursor() as cursor:
+        # 메시지 테이블은 크므로 서버 측 커서로 나눠서 읽음 (전체를 메모리에 올리지 않음)
+        with source_conn.cursor(pymysql.cursors.SSCursor) as cursor:
             cursor.execute("SELECT * FROM messages")
-            messages = cursor.fetchall()
-            
-            cursor.execute("DESCRIBE messages")
-            columns = [col[0] for col in cursor.fetchall()]
+            columns = [col[0] for col in cursor.description]
             
             count = 0
-            for msg_row in messages:
+            for msg_row in self.iter_rows(cursor):
                 msg_dict = dict(zip(columns, msg_row))
                 
                 if not dry_run:
@@ -159,7 +157,7 @@ class Command(BaseCommand):
                                 'conversation': conversation,
                                 'role': msg_dict.get('role', 'user'),
                                 'content': msg_dict.get('content', ''),
-                                'references': msg_dict.get('references', ''),
+                                'references': self.decode_references(msg_dict.get('references')),
                             }
                         )
                     except Conversation.DoesNotExist:
@@ -173,6 +171,27 @@ class Command(BaseCommand):
                 
         self.stdout.write(f'메시지 {count}개 마이그레이션 완료')
 
+    @staticmethod
+    def iter_rows(cursor, batch_size=1000):
+        """커서 결과를 batch_size개씩 가져오면서 한 행씩 반환"""
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield from rows
+
+    @staticmethod
+    def decode_references(raw):
+        """원본의 JSON 문자열 → JSON 컬럼 값 (빈 값/잘못된 형식은 None)"""
+        if not raw:
+            return None
+        if isinstance(raw, (bytes, bytearray)):
+            raw = raw.decode('utf-8')
+        try:
+            return json.loads(raw)
+        except (TypeError, ValueError):
+            return None
+
     def migrate_faqs(self, source_conn, dry_run):
         """FAQ 마이그레이션"""
         self.stdout.write('FAQ 데이터를 마이그레이션합니다...')
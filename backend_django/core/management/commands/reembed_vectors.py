@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from ai_services.rag import RAG
+from ai_services.index_manifest import IndexManifest
+
+class Command(BaseCommand):
+    help = '벡터 DB에 저장된 청크를 현재 임베딩 백엔드(EMBEDDING_BACKEND)로 다시 임베딩합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=256,
+            help='한 번에 다시 임베딩할 청크 수',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            rag = RAG()
+            self.stdout.write(f'임베딩 백엔드: {rag.embedding_model_id}')
+
+            migrated = rag.reembed_collections(batch_size=options['batch_size'])
+            for name, count in migrated.items():
+                self.stdout.write(f'  {name}: {count}개 청크')
+
+            if rag.vector_backend == 'numpy':
+                rag.export_numpy_index()
+
+            # 벡터가 바뀌었으므로 인덱스 버전 갱신 (의미 기반 캐시 무효화 - NumPy 스냅샷까지 바뀐 뒤에)
+            manifest = IndexManifest(settings.INDEX_MANIFEST_PATH)
+            manifest.save(bump_version=True)
+
+            self.stdout.write(
+                self.style.SUCCESS(f'다시 임베딩을 완료했습니다! ({sum(migrated.values())}개 청크)')
+            )
+
+        except Exception as e:
+            self.stdout.write(
+                self.style.ERROR(f'다시 임베딩 중 오류 발생: {str(e)}')
+            )
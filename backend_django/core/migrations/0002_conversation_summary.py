@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversation',
+            name='summary',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='summary_through_id',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
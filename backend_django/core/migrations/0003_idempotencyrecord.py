@@ -0,0 +1,27 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_conversation_summary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdempotencyRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('key', models.CharField(max_length=255, unique=True)),
+                ('request_hash', models.CharField(max_length=64)),
+                ('status_code', models.IntegerField(blank=True, null=True)),
+                ('response', models.JSONField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'idempotency_records',
+            },
+        ),
+    ]
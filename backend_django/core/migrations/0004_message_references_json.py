@@ -0,0 +1,75 @@
+# Generated by Django 5.2.1 on 2026-10-18 12:00
+
+import json
+
+from django.db import migrations, models, transaction
+
+# 한 번에 변환하는 메시지 수 (배치마다 커밋 - 메시지 테이블 전체를 한 트랜잭션/메모리에 올리지 않음)
+BATCH_SIZE = 1000
+
+
+def _batches(queryset):
+    """id 순서로 BATCH_SIZE개씩 (OFFSET 없이 마지막 id 다음부터)"""
+    last_id = 0
+    while True:
+        batch = list(queryset.filter(id__gt=last_id).order_by('id')[:BATCH_SIZE])
+        if not batch:
+            return
+        yield batch
+        last_id = batch[-1].id
+
+
+def decode_references(apps, schema_editor):
+    """JSON 문자열 → JSON 컬럼 (빈 값/잘못된 형식은 NULL)"""
+    Message = apps.get_model('core', 'Message')
+    messages = Message.objects.using(schema_editor.connection.alias).exclude(references__isnull=True).exclude(references='')
+    for batch in _batches(messages.only('id', 'references')):
+        for message in batch:
+            try:
+                message.references_json = json.loads(message.references)
+            except (TypeError, ValueError):
+                message.references_json = None
+        with transaction.atomic(using=schema_editor.connection.alias):
+            Message.objects.using(schema_editor.connection.alias).bulk_update(batch, ['references_json'])
+
+
+def encode_references(apps, schema_editor):
+    Message = apps.get_model('core', 'Message')
+    messages = Message.objects.using(schema_editor.connection.alias).exclude(references_json__isnull=True)
+    for batch in _batches(messages.only('id', 'references_json')):
+        for message in batch:
+            message.references = json.dumps(message.references_json)
+        with transaction.atomic(using=schema_editor.connection.alias):
+            Message.objects.using(schema_editor.connection.alias).bulk_update(batch, ['references'])
+
+
+class Migration(migrations.Migration):
+
+    # 배치별로 커밋 (MySQL DDL은 어차피 트랜잭션으로 묶이지 않음)
+    atomic = False
+
+    dependencies = [
+        ('core', '0003_idempotencyrecord'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='message',
+            name='references_json',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.RunPython(decode_references, encode_references),
+        migrations.RemoveField(
+            model_name='message',
+            name='references',
+        ),
+        migrations.RenameField(
+            model_name='message',
+            old_name='references_json',
+            new_name='references',
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['conversation', 'created_at'], name='messages_conv_created_idx'),
+        ),
+    ]
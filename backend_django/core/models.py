@@ -30,12 +30,29 @@ class Conversation(BaseModel):
     country = models.CharField(max_length=100, null=True, blank=True)
     topic = models.CharField(max_length=100, null=True, blank=True)
     
+    # 히스토리 창에서 밀려난 이전 대화의 누적 요약과 요약에 포함된 마지막 메시지 id
+    summary = models.TextField(blank=True, default='')
+    summary_through_id = models.BigIntegerField(null=True, blank=True)
+    
     class Meta:
         db_table = 'conversations'
         
     def __str__(self):
         return f"Session {self.session_id} - {self.country}/{self.topic}"
 
+class IdempotencyRecord(BaseModel):
+    """메시지 전송 멱등성 키 (재시도하면 저장된 응답을 그대로 반환)"""
+    key = models.CharField(max_length=255, unique=True)
+    request_hash = models.CharField(max_length=64)  # 같은 키로 다른 요청을 보냈는지 확인
+    status_code = models.IntegerField(null=True, blank=True)  # None이면 처리 중
+    response = models.JSONField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'idempotency_records'
+        
+    def __str__(self):
+        return f"{self.key} ({self.status_code or 'in progress'})"
+
 class Message(BaseModel):
     """채팅 메시지"""
     conversation = models.ForeignKey(
@@ -46,12 +63,16 @@ class Message(BaseModel):
     role = models.CharField(max_length=20)  # user, assistant
     content = models.TextField()
     
-    # RAG 참조 (JSON 형태로 저장)
-    references = models.TextField(null=True, blank=True)  # JSON string
+    # RAG 참조 (JSON 컬럼 - 조회 시 디코딩 불필요)
+    references = models.JSONField(null=True, blank=True)
     
     class Meta:
         db_table = 'messages'
         ordering = ['created_at']
+        indexes = [
+            # 대화별 시간순 조회 (히스토리, 기본 정렬)를 인덱스로 처리
+            models.Index(fields=['conversation', 'created_at'], name='messages_conv_created_idx'),
+        ]
         
     def __str__(self):
         return f"{self.role}: {self.content[:50]}..."
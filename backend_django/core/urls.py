@@ -3,6 +3,7 @@ from django.urls import path
 
 urlpatterns = [
     path('health/', views.health_check, name='health_check'),
+    path('metrics/', views.metrics, name='metrics'),
     path('', views.app_info, name='app_info'),
     path('countries/', views.countries, name='countries'),
     path('topics/', views.topics, name='topics'),
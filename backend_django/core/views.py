@@ -1,6 +1,10 @@
+from django.http import HttpResponse
+from django.views.decorators.http import require_http_methods
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
+from ai_services.metrics import get_metrics
+from ai_services.providers import get_provider_registry
 import logging
 
 logger = logging.getLogger(__name__)
@@ -10,6 +14,14 @@ def health_check(request):
     """헬스 체크"""
     return Response({"status": "healthy"})
 
+@require_http_methods(["GET"])
+def metrics(request):
+    """채팅 단계별 지연 시간, 토큰 수, 폴백 지표 (Prometheus 텍스트 형식)"""
+    return HttpResponse(
+        get_metrics().render(providers=get_provider_registry()),
+        content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
 @api_view(['GET'])
 def app_info(request):
     """앱 정보"""
@@ -225,7 +225,11 @@ class TravelBotApp {
     this.ui.showLoading()
     this.ui.updateInterface()
 
-    const success = await this.chat.sendMessage(text, true) // skipUserMessage 플래그 추가
+    // 스트리밍 토큰이 도착할 때마다 로딩 표시를 지우고 다시 렌더링
+    const success = await this.chat.sendMessage(text, true, () => {
+      this.ui.hideLoading()
+      this.ui.renderChat()
+    })
     if (success) {
       this.ui.hideLoading()
       this.ui.renderChat()
@@ -41,11 +41,11 @@ export class APIManager {
     // HTTP 요청 헬퍼 (기존 call 메서드를 확장)
     async call(endpoint, options = {}) {
         const config = {
+            ...options,
             headers: {
                 'Content-Type': 'application/json',
                 ...options.headers
-            },
-            ...options
+            }
         };
 
         try {
@@ -149,9 +149,11 @@ export class APIManager {
         });
     }
 
-    async sendMessage(message, conversationId, sessionId, country, topic, model, stream = false) {
+    // idempotencyKey: 같은 메시지를 재시도할 때 같은 키를 보내면 서버가 다시 생성하지 않고 저장된 응답을 반환
+    async sendMessage(message, conversationId, sessionId, country, topic, model, stream = false, idempotencyKey = null) {
         return await this.call('/chat/message/', {
             method: 'POST',
+            headers: idempotencyKey ? { 'Idempotency-Key': idempotencyKey } : {},
             body: JSON.stringify({
                 message,
                 conversation_id: conversationId,
@@ -164,8 +166,76 @@ export class APIManager {
         });
     }
 
-    async getHistory(conversationId) {
-        return await this.call(`/chat/history/${conversationId}/`);
+    // 스트리밍 채팅 API (Server-Sent Events)
+    // onToken(delta)는 한국어 응답 조각이 도착할 때마다 호출되고, 저장된 최종 메시지를 반환합니다.
+    async sendMessageStream(message, conversationId, sessionId, country, topic, model, onToken, idempotencyKey = null) {
+        const response = await fetch(`${this.baseURL}/chat/message/`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                ...(idempotencyKey ? { 'Idempotency-Key': idempotencyKey } : {})
+            },
+            body: JSON.stringify({
+                message,
+                conversation_id: conversationId,
+                session_id: sessionId,
+                country,
+                topic,
+                model_id: model,
+                stream: true
+            })
+        });
+
+        if (!response.ok || !response.body) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let result = null;
+
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+
+            // 이벤트는 빈 줄로 구분
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const raw = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+
+                let event = 'message';
+                let data = '';
+                for (const line of raw.split('\n')) {
+                    if (line.startsWith('event:')) event = line.slice(6).trim();
+                    else if (line.startsWith('data:')) data += line.slice(5).trim();
+                }
+                if (!data) continue;
+
+                const payload = JSON.parse(data);
+                if (event === 'token') {
+                    onToken?.(payload.delta);
+                } else if (event === 'done' || event === 'error') {
+                    result = payload;
+                }
+            }
+        }
+
+        return result;
+    }
+
+    // 대화 기록 (옵션 없이 호출하면 최신 페이지, 이전 페이지는 before에 첫 메시지 id를 넘겨서 has_more가 false일 때까지)
+    async getHistory(conversationId, { before = null, after = null, limit = null, fields = null } = {}) {
+        const params = new URLSearchParams();
+        if (before) params.append('before', before);
+        if (after) params.append('after', after);
+        if (limit) params.append('limit', limit);
+        if (fields) params.append('fields', Array.isArray(fields) ? fields.join(',') : fields);
+        
+        const query = params.toString();
+        return await this.call(`/chat/history/${conversationId}/${query ? `?${query}` : ''}`);
     }
 
     // FAQ & 소스 API
@@ -59,7 +59,7 @@ export class ChatManager {
         this.state.addChat(newChat);
     }
 
-    async sendMessage(text, skipUserMessage = false) {
+    async sendMessage(text, skipUserMessage = false, onUpdate = null) {
         const activeChat = this.state.getActiveChat();
         if (!activeChat || !text.trim()) return false;
 
@@ -68,8 +68,15 @@ export class ChatManager {
             activeChat.messages.push({ role: "user", text });
         }
 
+        // 스트리밍 실패 후 일반 요청으로 재시도해도 서버에서 한 번만 처리되도록 같은 키 사용
+        const idempotencyKey = crypto.randomUUID();
+
         try {
             this.state.set('loading', true);
+
+            if (await this.sendMessageStream(activeChat, text, onUpdate, idempotencyKey)) {
+                return true;
+            }
             
             // API 호출
             const response = await this.api.sendMessage(
@@ -78,7 +85,9 @@ export class ChatManager {
                 this.state.data.sessionId,
                 this.state.country,
                 this.state.topic,
-                this.state.model
+                this.state.model,
+                false,
+                idempotencyKey
             );
 
             // 봇 응답 추가
@@ -101,6 +110,47 @@ export class ChatManager {
         }
     }
 
+    // 스트리밍으로 응답 받기 - 첫 토큰 전에 실패하면 false를 반환해서 일반 요청으로 재시도
+    async sendMessageStream(activeChat, text, onUpdate, idempotencyKey = null) {
+        let botMessage = null;
+
+        try {
+            const result = await this.api.sendMessageStream(
+                text,
+                activeChat.conversationId,
+                this.state.data.sessionId,
+                this.state.country,
+                this.state.topic,
+                this.state.model,
+                (delta) => {
+                    if (!botMessage) {
+                        botMessage = { role: "bot", text: "" };
+                        activeChat.messages.push(botMessage);
+                    }
+                    botMessage.text += delta;
+                    onUpdate?.();
+                },
+                idempotencyKey
+            );
+
+            if (!botMessage) {
+                if (!result?.message) return false;
+                botMessage = { role: "bot", text: "" };
+                activeChat.messages.push(botMessage);
+            }
+            // 서버에 저장된 최종 내용으로 맞춤
+            if (result?.message?.content) {
+                botMessage.text = result.message.content;
+            }
+            return true;
+
+        } catch (error) {
+            if (botMessage) throw error;
+            console.warn('스트리밍 응답 실패, 일반 요청으로 재시도합니다:', error);
+            return false;
+        }
+    }
+
     select(chatId) {
         this.state.set('activeChat', chatId);
     }